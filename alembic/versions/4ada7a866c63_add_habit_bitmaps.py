@@ -0,0 +1,40 @@
+"""add habit_bitmaps
+
+Revision ID: 4ada7a866c63
+Revises: dc1698efa6a8
+Create Date: 2026-10-17 05:31:08.224671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4ada7a866c63'
+down_revision: Union[str, Sequence[str], None] = 'dc1698efa6a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('habit_bitmaps',
+    sa.Column('habit_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('origin', sa.Date(), nullable=False),
+    sa.Column('bits', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('habit_id')
+    )
+    op.create_index(op.f('ix_habit_bitmaps_user_id'), 'habit_bitmaps', ['user_id'], unique=False)
+    # Existing habits get their bitmap lazily on first read, or eagerly via
+    # `python -m app.cli rebuild-bitmaps`.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_habit_bitmaps_user_id'), table_name='habit_bitmaps')
+    op.drop_table('habit_bitmaps')
@@ -0,0 +1,39 @@
+"""add dashboard_snapshots
+
+Revision ID: 89ae0037cd8e
+Revises: 2f61638a79c0
+Create Date: 2026-10-17 06:17:47.528152
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '89ae0037cd8e'
+down_revision: Union[str, Sequence[str], None] = '2f61638a79c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dashboard_snapshots',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('data_version', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Snapshots are written by the precompute scheduler or
+    # `python -m app.cli precompute-dashboards`; until then the dashboard is
+    # computed per request as before.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('dashboard_snapshots')
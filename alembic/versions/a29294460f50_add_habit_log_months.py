@@ -0,0 +1,41 @@
+"""add habit_log_months
+
+Revision ID: a29294460f50
+Revises: 89ae0037cd8e
+Create Date: 2026-10-17 11:02:31.804117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a29294460f50'
+down_revision: Union[str, Sequence[str], None] = '89ae0037cd8e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('habit_log_months',
+    sa.Column('habit_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('days', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('habit_id', 'month')
+    )
+    op.create_index('ix_habit_log_months_user_month', 'habit_log_months', ['user_id', 'month'], unique=False)
+    # Empty until `python -m app.cli compact-logs` runs; reads merge it with
+    # habit_logs either way.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_habit_log_months_user_month', table_name='habit_log_months')
+    op.drop_table('habit_log_months')
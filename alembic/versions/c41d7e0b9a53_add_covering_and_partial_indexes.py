@@ -0,0 +1,41 @@
+"""add covering and partial indexes
+
+Revision ID: c41d7e0b9a53
+Revises: a29294460f50
+Create Date: 2026-10-17 14:48:09.226731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e0b9a53'
+down_revision: Union[str, Sequence[str], None] = 'a29294460f50'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_username', 'users', ['username'], unique=False)
+    op.create_index('ix_habits_user_created', 'habits', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_habits_active_user_created', 'habits',
+        ['user_id', 'created_at', 'id', 'start_date', 'goal_type', 'target_per_period', 'name'],
+        unique=False,
+        sqlite_where=sa.text('is_archived = 0'),
+        postgresql_where=sa.text('is_archived = false'),
+    )
+    # Every query that used it is served by one of the two above, in order.
+    op.drop_index('ix_habits_user_archived', table_name='habits')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_habits_user_archived', 'habits', ['user_id', 'is_archived'], unique=False)
+    op.drop_index('ix_habits_active_user_created', table_name='habits')
+    op.drop_index('ix_habits_user_created', table_name='habits')
+    op.drop_index('ix_users_username', table_name='users')
@@ -0,0 +1,38 @@
+"""add user_daily_counts
+
+Revision ID: dc1698efa6a8
+Revises: df1feb06913a
+Create Date: 2026-10-17 05:02:41.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dc1698efa6a8'
+down_revision: Union[str, Sequence[str], None] = 'df1feb06913a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_daily_counts',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'date')
+    )
+    op.execute(
+        "INSERT INTO user_daily_counts (user_id, date, count) "
+        "SELECT user_id, date, COUNT(*) FROM habit_logs GROUP BY user_id, date"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_daily_counts')
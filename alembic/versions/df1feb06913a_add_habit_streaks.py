@@ -0,0 +1,45 @@
+"""add habit_streaks
+
+Revision ID: df1feb06913a
+Revises: 455a2bb9cb91
+Create Date: 2026-10-17 04:40:12.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'df1feb06913a'
+down_revision: Union[str, Sequence[str], None] = '455a2bb9cb91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('habit_streaks',
+    sa.Column('habit_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('goal_type', sa.String(), nullable=False),
+    sa.Column('target_per_period', sa.Integer(), nullable=False),
+    sa.Column('current_run', sa.Integer(), nullable=False),
+    sa.Column('best_run', sa.Integer(), nullable=False),
+    sa.Column('last_period_end', sa.Date(), nullable=True),
+    sa.Column('last_log_date', sa.Date(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('habit_id')
+    )
+    op.create_index(op.f('ix_habit_streaks_user_id'), 'habit_streaks', ['user_id'], unique=False)
+    # Existing habits get their state lazily on first read, or eagerly via
+    # `python -m app.cli rebuild-streaks`.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_habit_streaks_user_id'), table_name='habit_streaks')
+    op.drop_table('habit_streaks')
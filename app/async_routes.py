@@ -0,0 +1,127 @@
+import inspect
+
+from fastapi import APIRouter, Depends
+from fastapi.dependencies.utils import get_typed_signature
+from fastapi.params import Depends as DependsParam
+from fastapi.routing import APIRoute
+
+from app.dependencies import get_async_db, get_current_user, get_current_user_async, get_db
+
+# With DB_ASYNC=1 every router is served through `asyncify_router`: each
+# endpoint, and each dependency that needs the database, becomes an
+# `async def` that takes an AsyncSession and runs the original body on it
+# with `run_sync`. The handler's queries then await the driver on the event
+# loop rather than blocking a threadpool thread, and the sync handlers stay
+# the single source of the logic.
+
+_ASYNC_DEPENDENCIES = {
+    get_db: get_async_db,
+    get_current_user: get_current_user_async,
+}
+
+
+_converted = {}
+
+
+def _uses_sync_db(fn) -> bool:
+    try:
+        params = get_typed_signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    for param in params:
+        dependency = param.default.dependency if isinstance(param.default, DependsParam) else None
+        if dependency is not None and (dependency in _ASYNC_DEPENDENCIES or _uses_sync_db(dependency)):
+            return True
+    return False
+
+
+def _async_dependency(dependency):
+    """
+    The async counterpart of a dependency: the mapped one for get_db and
+    get_current_user, a converted copy for anything that uses them, and the
+    dependency itself otherwise. Conversions are reused so FastAPI's
+    per-request dependency cache still applies.
+    """
+    if dependency in _ASYNC_DEPENDENCIES:
+        return _ASYNC_DEPENDENCIES[dependency]
+    if dependency not in _converted:
+        _converted[dependency] = asyncify_endpoint(dependency) if _uses_sync_db(dependency) else dependency
+    return _converted[dependency]
+
+
+def _swap_depends(depends: DependsParam) -> DependsParam:
+    if depends.dependency is None:
+        return depends
+    dependency = _async_dependency(depends.dependency)
+    if dependency is depends.dependency:
+        return depends
+    return Depends(dependency, use_cache=depends.use_cache)
+
+
+def _swap_dependency(param: inspect.Parameter) -> inspect.Parameter:
+    default = param.default
+    if isinstance(default, DependsParam):
+        swapped = _swap_depends(default)
+        if swapped is not default:
+            return param.replace(default=swapped, annotation=inspect.Parameter.empty)
+    return param
+
+
+def _db_param(signature: inspect.Signature):
+    for name, param in signature.parameters.items():
+        if isinstance(param.default, DependsParam) and param.default.dependency is get_db:
+            return name
+    return None
+
+
+def asyncify_endpoint(fn):
+    signature = get_typed_signature(fn)
+    db_param = _db_param(signature)
+
+    if inspect.iscoroutinefunction(fn):
+        # already async; it only needs the async session and user
+        async def endpoint(**kwargs):
+            return await fn(**kwargs)
+    elif db_param is None:
+        async def endpoint(**kwargs):
+            return fn(**kwargs)
+    else:
+        async def endpoint(**kwargs):
+            db = kwargs.pop(db_param)
+            return await db.run_sync(lambda session: fn(**kwargs, **{db_param: session}))
+
+    endpoint.__name__ = fn.__name__
+    endpoint.__doc__ = fn.__doc__
+    endpoint.__signature__ = signature.replace(
+        parameters=[_swap_dependency(p) for p in signature.parameters.values()]
+    )
+    return endpoint
+
+
+def asyncify_router(router: APIRouter) -> APIRouter:
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+        async_router.add_api_route(
+            route.path,
+            asyncify_endpoint(route.endpoint),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=[_swap_depends(d) for d in route.dependencies],
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            deprecated=route.deprecated,
+            methods=route.methods,
+            operation_id=route.operation_id,
+            response_model_exclude_unset=route.response_model_exclude_unset,
+            response_model_exclude_none=route.response_model_exclude_none,
+            include_in_schema=route.include_in_schema,
+            response_class=route.response_class,
+            name=route.name,
+        )
+    return async_router
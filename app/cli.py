@@ -0,0 +1,100 @@
+"""
+Maintenance commands. Run with `python -m app.cli <command>`.
+"""
+import argparse
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.db import SessionLocal
+from app.services.bitmaps import rebuild_all_bitmaps
+from app.services.compaction import COMPACTION_HORIZON_DAYS, CompactionMismatch, compact_logs
+from app.services.daily_counts import rebuild_daily_counts
+from app.services.dashboard_snapshot import precompute_all
+from app.services.streak_state import rebuild_all_streak_states
+
+
+def rebuild_streaks(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        count = rebuild_all_streak_states(db, user_id=args.user_id)
+    finally:
+        db.close()
+    print(f"Rebuilt streak state for {count} habits.")
+
+
+def rebuild_counts(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        count = rebuild_daily_counts(db, user_id=args.user_id)
+    finally:
+        db.close()
+    print(f"Wrote {count} user_daily_counts rows.")
+
+
+def rebuild_bitmaps(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        count = rebuild_all_bitmaps(db, user_id=args.user_id)
+    finally:
+        db.close()
+    print(f"Rebuilt completion bitmaps for {count} habits.")
+
+
+def precompute_dashboards(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        counts = precompute_all(db)
+    finally:
+        db.close()
+    print(f"Precomputed dashboards for {sum(counts.values())} users in {len(counts)} time zones.")
+
+
+def compact(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        result = compact_logs(
+            db, datetime.now(timezone.utc).date(), horizon_days=args.horizon_days,
+            user_id=args.user_id, verify=args.verify, dry_run=args.dry_run,
+        )
+    except CompactionMismatch as exc:
+        raise SystemExit(f"Verification failed, user rolled back: {exc}")
+    finally:
+        db.close()
+    action = "Would fold" if args.dry_run else "Folded"
+    print(f"{action} {result['logs']} logs of {result['users']} users into habit_log_months.")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("rebuild-streaks", help="Backfill or rebuild the habit_streaks table.")
+    p.add_argument("--user-id", type=int, default=None, help="Only rebuild habits owned by this user.")
+    p.set_defaults(func=rebuild_streaks)
+
+    p = subparsers.add_parser("rebuild-daily-counts", help="Backfill or rebuild the user_daily_counts rollup.")
+    p.add_argument("--user-id", type=int, default=None, help="Only rebuild rows for this user.")
+    p.set_defaults(func=rebuild_counts)
+
+    p = subparsers.add_parser("rebuild-bitmaps", help="Backfill or rebuild the habit_bitmaps table.")
+    p.add_argument("--user-id", type=int, default=None, help="Only rebuild habits owned by this user.")
+    p.set_defaults(func=rebuild_bitmaps)
+
+    p = subparsers.add_parser("precompute-dashboards", help="Build today's dashboard snapshots for every user.")
+    p.set_defaults(func=precompute_dashboards)
+
+    p = subparsers.add_parser("compact-logs", help="Fold logs older than the horizon into monthly summaries.")
+    p.add_argument("--horizon-days", type=int, default=COMPACTION_HORIZON_DAYS,
+                   help="Keep raw logs for at least this many days.")
+    p.add_argument("--user-id", type=int, default=None, help="Only compact this user's logs.")
+    p.add_argument("--verify", action="store_true",
+                   help="Check each user's analytics are unchanged; stop and roll back on a difference.")
+    p.add_argument("--dry-run", action="store_true", help="Roll every user back after compacting (with --verify, a check only).")
+    p.set_defaults(func=compact)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,111 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.instrumentation import instrument_engine
 
 DATABASE_URL = os.getenv("DATABASE_URL", 'sqlite:///Habit-Tracker.db')
 
 if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://",1)
 
+# Pool settings for file-backed engines, defaulting to SQLAlchemy's own.
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+}
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# writer, and busy_timeout makes a second writer wait instead of failing with
+# "database is locked". SQLITE_MMAP_SIZE (bytes, default off) enables
+# memory-mapped reads.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),
+    "temp_store": "MEMORY",
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", "0"),
+}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def configure_sqlite(engine) -> None:
+    """
+    Register the pragma hook on `engine` (or an AsyncEngine's sync_engine).
+    """
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+
+
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread":False},
+        **({} if ":memory:" in DATABASE_URL else POOL_OPTIONS),
     )
+    configure_sqlite(engine)
 else:
     engine = create_engine(
         DATABASE_URL,
         pool_pre_ping=True,
+        **POOL_OPTIONS,
     )
+instrument_engine(engine)
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# DB_ASYNC=1 serves the routers from an AsyncSession on aiosqlite/asyncpg
+# instead of the sync engine and the request threadpool.
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"
+
+
+def async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+
+def make_async_sessionmaker(async_engine):
+    # Handlers return ORM objects that are serialized after the session's
+    # greenlet has exited, so committed objects must stay loaded.
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    if DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(async_url(DATABASE_URL), **POOL_OPTIONS)
+        configure_sqlite(async_engine.sync_engine)
+    else:
+        async_engine = create_async_engine(async_url(DATABASE_URL), pool_pre_ping=True, **POOL_OPTIONS)
+    instrument_engine(async_engine.sync_engine)
+    AsyncSessionLocal = make_async_sessionmaker(async_engine)
 
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+def dialect_insert(db: Session, table):
+    """
+    Return an INSERT construct for the session's dialect so callers can use
+    `on_conflict_do_update` / `on_conflict_do_nothing` on SQLite and Postgres.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
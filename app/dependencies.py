@@ -1,11 +1,14 @@
-from typing import Generator
+from typing import AsyncGenerator, AsyncIterator, Generator, List
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
 from sqlalchemy.orm import Session
 
+from . import db as db_module
 from .db import SessionLocal
 from . import models
-from .security import decode_access_token, TokenPayload
+from .security import decode_access_token, oauth2_scheme
+from .services.principal_cache import principal_cache
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -14,14 +17,66 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator:
+    async with db_module.AsyncSessionLocal() as db:
+        yield db
+
+def _user_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="User not found"
+    )
+
 def get_current_user(
     db: Session = Depends(get_db),
-    token: TokenPayload = Depends(decode_access_token),
+    token: str = Depends(oauth2_scheme),
+):
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached[1]
+
+    payload = decode_access_token(token)
+    user = db.query(models.User).filter(models.User.id == payload.sub).first()
+    if not user:
+        raise _user_not_found()
+    principal_cache.put(token, payload, user)
+    return user
+
+async def get_current_user_async(
+    db=Depends(get_async_db),
+    token: str = Depends(oauth2_scheme),
 ):
-    user = db.query(models.User).filter(models.User.id == token.sub).first()
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached[1]
+
+    payload = decode_access_token(token)
+    user = await db.get(models.User, payload.sub)
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-    return user
\ No newline at end of file
+        raise _user_not_found()
+    principal_cache.put(token, payload, user)
+    return user
+
+async def run_db(db, fn, *args):
+    """
+    Call `fn(session, *args)` without blocking the event loop: through
+    `run_sync` on an AsyncSession, or on the threadpool for a sync Session.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args)
+    return await db.run_sync(fn, *args)
+
+async def stream_partitions(db, stmt, size: int) -> AsyncIterator[List]:
+    """
+    Yield a query's rows `size` at a time from a server-side cursor, for
+    either kind of session, so only one partition is held in memory.
+    """
+    stmt = stmt.execution_options(yield_per=size)
+    if isinstance(db, Session):
+        result = await run_in_threadpool(db.execute, stmt)
+        async for partition in iterate_in_threadpool(result.partitions()):
+            yield partition
+    else:
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
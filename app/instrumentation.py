@@ -0,0 +1,145 @@
+import contextvars
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from sqlalchemy import event
+
+# Per-request timing. RequestTimingMiddleware opens a RequestStats for each
+# HTTP request; cursor hooks on the engine add every query's duration to it,
+# and handlers can time named phases with `timed_phase`. The totals go out
+# as a Server-Timing header and one JSON log line on the "app.requests"
+# logger. Queries slower than SLOW_QUERY_MS are logged with their SQL on
+# "app.slow_queries" (a negative value turns that off). Bound parameters are
+# never logged.
+#
+# The cost per query is two perf_counter calls and a context lookup, so this
+# stays on by default; REQUEST_TIMING=0 removes the middleware.
+
+REQUEST_TIMING = os.getenv("REQUEST_TIMING", "1") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+request_logger = logging.getLogger("app.requests")
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+
+class RequestStats:
+    __slots__ = ("method", "path", "started", "queries", "db_ms", "phases")
+
+    def __init__(self, method: str = "", path: str = ""):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.phases: Dict[str, float] = {}
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        total = self.elapsed_ms()
+        metrics = [
+            f'db;dur={self.db_ms:.2f};desc="{self.queries} queries"',
+            f"app;dur={max(total - self.db_ms, 0.0):.2f}",
+        ]
+        metrics += [f"{name};dur={ms:.2f}" for name, ms in self.phases.items()]
+        metrics.append(f"total;dur={total:.2f}")
+        return ", ".join(metrics)
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def timed_phase(name: str):
+    """
+    Add the time spent in the block to the current request's `name` metric.
+    """
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.phases[name] = stats.phases.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context._query_started) * 1000
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_ms += elapsed_ms
+    if 0 <= SLOW_QUERY_MS <= elapsed_ms:
+        slow_query_logger.warning(json.dumps({
+            "event": "slow_query",
+            "duration_ms": round(elapsed_ms, 2),
+            "path": stats.path if stats is not None else None,
+            "statement": statement,
+        }))
+
+
+def instrument_engine(engine) -> None:
+    """
+    Register the query timing hooks on `engine` (or an AsyncEngine's sync_engine).
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RequestTimingMiddleware:
+    """
+    Pure ASGI middleware, so streaming responses pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope["method"], scope["path"])
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if request_logger.isEnabledFor(logging.INFO):
+                request_logger.info(json.dumps({
+                    "event": "request",
+                    "method": stats.method,
+                    "path": stats.path,
+                    "status": status,
+                    "duration_ms": round(stats.elapsed_ms(), 2),
+                    "db_ms": round(stats.db_ms, 2),
+                    "queries": stats.queries,
+                    **{f"{name}_ms": round(ms, 2) for name, ms in stats.phases.items()},
+                }))
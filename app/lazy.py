@@ -0,0 +1,23 @@
+import importlib.util
+import sys
+from types import ModuleType
+
+# Deferred imports for heavy dependencies that only a few code paths use
+# (numpy for the streak batch engine). lazy_import returns a module object
+# right away and runs the real import on first attribute access, so
+# importing the app stays fast and the cost lands on the first caller, or on
+# the startup warm-up (app.warmup) when that is enabled.
+
+
+def lazy_import(name: str) -> ModuleType:
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
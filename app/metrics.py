@@ -0,0 +1,186 @@
+import bisect
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from app import db, passwordhash
+from app.services.principal_cache import principal_cache
+from app.services.result_cache import result_cache
+
+# In-process metrics, rendered in the Prometheus text format at /metrics.
+# MetricsMiddleware records a latency histogram (and so a request count) per
+# (method, route template, status) plus an in-flight gauge; requests that match no
+# route share the "unmatched" label so unknown paths cannot grow the label
+# set. Everything else (pool usage, cache hit ratios, the password hashing
+# queue) is read from its owner when /metrics is scraped.
+#
+# Recording happens on the event loop thread only, so it takes no locks.
+# The endpoint has no auth and reveals traffic and internals, so both the
+# middleware and the endpoint are off unless METRICS_ENABLED=1; only enable
+# it where /metrics is not reachable from the public internet.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "unmatched"
+
+# (labels, value) pairs for one metric family
+Samples = List[Tuple[Dict[str, str], float]]
+# (name, type, help, samples) as returned by a collector
+Family = Tuple[str, str, str, Samples]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.in_flight = 0
+        # (method, route, status) -> [count per bucket..., count above the last bucket, sum of seconds];
+        # request counts are the histogram counts, so recording is one dict lookup
+        self._series: Dict[Tuple[str, str, int], List[float]] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        series = self._series.get((method, route, status))
+        if series is None:
+            series = self._series[(method, route, status)] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        self._collectors.append(collector)
+
+    def reset(self) -> None:
+        self.in_flight = 0
+        self._series.clear()
+
+    def _snapshot(self) -> List[Tuple[Dict[str, str], List[float]]]:
+        return [
+            ({"method": m, "route": r, "status": str(s)}, list(series))
+            for (m, r, s), series in sorted(list(self._series.items()))
+        ]
+
+    def _render_histograms(self, snapshot) -> List[str]:
+        name = "http_request_duration_seconds"
+        lines = [f"# HELP {name} HTTP request latency by route and status.", f"# TYPE {name} histogram"]
+        for labels, series in snapshot:
+            cumulative = 0
+            for le, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': _value(le)})} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_value(series[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return lines
+
+    def render(self) -> str:
+        snapshot = self._snapshot()
+        families: List[Family] = [
+            ("http_requests_total", "counter", "HTTP requests by route and status.",
+             [(labels, sum(series[:-1])) for labels, series in snapshot]),
+            ("http_requests_in_flight", "gauge", "HTTP requests currently being served.", [({}, self.in_flight)]),
+        ]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        lines = []
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{_labels(labels)} {_value(value)}" for labels, value in samples)
+        lines.extend(self._render_histograms(snapshot))
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry = self.registry
+        registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.in_flight -= 1
+            # the router stores the matched route in the shared scope
+            route = scope.get("route")
+            registry.observe(
+                scope["method"], getattr(route, "path", UNMATCHED), status, time.perf_counter() - start
+            )
+
+
+def _pool_families() -> Iterable[Family]:
+    engines = [("sync", db.engine)]
+    if db.async_engine is not None:
+        engines.append(("async", db.async_engine.sync_engine))
+    checked_out, overflow, size = [], [], []
+    for label, engine in engines:
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        checked_out.append(({"engine": label}, pool.checkedout()))
+        overflow.append(({"engine": label}, pool.overflow()))
+        size.append(({"engine": label}, pool.size()))
+    yield ("db_pool_checked_out", "gauge", "Connections currently checked out of the pool.", checked_out)
+    yield ("db_pool_overflow", "gauge", "Connections open beyond the pool size (negative while below it).", overflow)
+    yield ("db_pool_size", "gauge", "Configured pool size.", size)
+
+
+def _cache_families() -> Iterable[Family]:
+    principal = principal_cache.stats()
+    result = result_cache.stats()
+    caches = {"principal": principal, "result": result}
+    yield ("cache_hits_total", "counter", "Cache lookups that found an entry.",
+           [({"cache": name}, s["hits"]) for name, s in caches.items()])
+    yield ("cache_misses_total", "counter", "Cache lookups that found no entry.",
+           [({"cache": name}, s["misses"]) for name, s in caches.items()])
+    yield ("cache_hit_ratio", "gauge", "Hits over lookups since start.", [
+        ({"cache": name}, s["hits"] / (s["hits"] + s["misses"]) if s["hits"] + s["misses"] else 0.0)
+        for name, s in caches.items()
+    ])
+    yield ("cache_entries", "gauge", "Entries currently cached.",
+           [({"cache": "principal"}, principal["size"]), ({"cache": "result"}, result["entries"])])
+    yield ("cache_bytes", "gauge", "Bytes held by the result cache.", [({"cache": "result"}, result["bytes"])])
+    yield ("cache_evictions_total", "counter", "Entries evicted to stay within the size limit.",
+           [({"cache": "principal"}, principal["evictions"])])
+
+
+def _password_hash_families() -> Iterable[Family]:
+    yield ("password_hash_pending", "gauge", "Password hashes queued or running.", [({}, passwordhash.pending())])
+
+
+metrics.register_collector(_pool_families)
+metrics.register_collector(_cache_families)
+metrics.register_collector(_password_hash_families)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, func, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, LargeBinary, func, text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship, as_declarative
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -6,6 +6,10 @@ Base = declarative_base()
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # login and registration look users up by username
+        Index("ix_users_username", "username"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -13,6 +17,8 @@ class User(Base):
     username = Column(String, nullable=False)
     timezone = Column(String, default="UTC")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # bumped by every write to the user's data; read endpoints derive ETags from it
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     habits = relationship("Habit", back_populates="user", cascade="all, delete-orphan")
     logs = relationship("HabitLog", back_populates="user", cascade="all, delete-orphan")
@@ -20,7 +26,16 @@ class User(Base):
 class Habit(Base):
     __tablename__ = "habits"
     __table_args__ = (
-        Index("ix_habits_user_archived", "user_id", "is_archived"),
+        # habit listings (and the export) in their created_at, id order
+        Index("ix_habits_user_created", "user_id", "created_at", "id"),
+        # active habits in the same order, carrying every column the dashboard,
+        # stats and streak paths read (app.queries.HABIT_SUMMARY)
+        Index(
+            "ix_habits_active_user_created",
+            "user_id", "created_at", "id", "start_date", "goal_type", "target_per_period", "name",
+            sqlite_where=text("is_archived = 0"),
+            postgresql_where=text("is_archived = false"),
+        ),
     )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id",ondelete="CASCADE"), nullable=False)
@@ -50,4 +65,55 @@ class HabitLog(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     habit = relationship("Habit", back_populates="logs")
-    user = relationship("User", back_populates="logs")
\ No newline at end of file
+    user = relationship("User", back_populates="logs")
+
+class HabitStreak(Base):
+    __tablename__ = "habit_streaks"
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    goal_type = Column(String, nullable=False)
+    target_per_period = Column(Integer, nullable=False, default=1)
+    current_run = Column(Integer, nullable=False, default=0)
+    best_run = Column(Integer, nullable=False, default=0)
+    last_period_end = Column(Date, nullable=True)
+    last_log_date = Column(Date, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class UserDailyCount(Base):
+    __tablename__ = "user_daily_counts"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class HabitBitmap(Base):
+    __tablename__ = "habit_bitmaps"
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    origin = Column(Date, nullable=False)
+    bits = Column(LargeBinary, nullable=False, default=b"")
+
+
+class DashboardSnapshot(Base):
+    __tablename__ = "dashboard_snapshots"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # the user's local date the snapshot serves, and the users.data_version it is valid for
+    date = Column(Date, nullable=False)
+    data_version = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# a month of a habit's logs, folded together by app.services.compaction
+class HabitLogMonth(Base):
+    __tablename__ = "habit_log_months"
+    __table_args__ = (
+        Index("ix_habit_log_months_user_month", "user_id", "month"),
+    )
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+    # first day of the month; bit d-1 of `days` is set when day d was logged
+    month = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    days = Column(Integer, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,42 @@
+import base64
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+
+# Keyset pagination for list endpoints. Pages are requested with `limit` and
+# the opaque `cursor` from the previous page's X-Next-Cursor header; the body
+# stays a plain JSON list so unpaginated clients are unaffected.
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*parts) -> str:
+    raw = "|".join(str(p) for p in parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[str], Any]) -> List[Any]:
+    """
+    Split a cursor back into its parts, applying one parser per part.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        parts = raw.split("|")
+        if len(parts) != len(parsers):
+            raise ValueError(cursor)
+        return [parse(part) for parse, part in zip(parsers, parts)]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def paginate(rows: Sequence, limit: Optional[int], response: Response, cursor_for) -> Sequence:
+    """
+    Trim a query result fetched with `limit + 1` rows to `limit` and, when
+    there is a further page, set the cursor for it from the last row kept.
+    """
+    if limit is None or len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    response.headers[NEXT_CURSOR_HEADER] = cursor_for(rows[-1])
+    return rows
@@ -1,8 +1,36 @@
+import asyncio
 import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Optional
+
 import bcrypt
 
 MAX_BCRYPT_BYTES = 72
 
+# bcrypt is deliberately slow, so hashing runs on a dedicated, size-limited
+# executor instead of the threadpool that serves every other sync endpoint.
+# PASSWORD_HASH_EXECUTOR picks "process" (default) or "thread".
+# PASSWORD_HASH_MAX_PENDING caps how many hashes may be queued or running;
+# past that, callers get HashingPoolBusy right away instead of waiting.
+EXECUTOR_KIND = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(WORKERS * 8)))
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_pending = 0
+_admitted = 0
+_pending_lock = threading.Lock()
+
+
+class HashingPoolBusy(Exception):
+    pass
+
+
 def _normalize(password: str) -> bytes:
     """
     Ensure the password fits bcrypt limits by pre-hashing if needed.
@@ -13,13 +41,81 @@ def _normalize(password: str) -> bytes:
     return raw
 
 
+def _hash(password: str) -> str:
+    return bcrypt.hashpw(_normalize(password), bcrypt.gensalt()).decode()
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(_normalize(plain_password), hashed_password.encode())
+
+
+def get_executor() -> Executor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if EXECUTOR_KIND == "thread":
+                _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="password-hash")
+            else:
+                _executor = ProcessPoolExecutor(max_workers=WORKERS, mp_context=get_context("spawn"))
+        return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def pending() -> int:
+    return _pending
+
+
+@contextmanager
+def admit():
+    """
+    Hold a place in the hashing queue for a whole login/register request, so
+    requests beyond MAX_PENDING are rejected before they do any other work.
+    """
+    global _admitted
+    with _pending_lock:
+        if _admitted >= MAX_PENDING:
+            raise HashingPoolBusy()
+        _admitted += 1
+    try:
+        yield
+    finally:
+        with _pending_lock:
+            _admitted -= 1
+
+
+async def _run(fn, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= MAX_PENDING:
+            raise HashingPoolBusy()
+        _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), fn, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
 class Hash:
     @staticmethod
     def bcrypt(password: str) -> str:
-        normalized = _normalize(password)
-        return bcrypt.hashpw(normalized, bcrypt.gensalt()).decode()
+        return _hash(password)
 
     @staticmethod
     def verify(plain_password: str, hashed_password: str) -> bool:
-        normalized = _normalize(plain_password)
-        return bcrypt.checkpw(normalized, hashed_password.encode())
\ No newline at end of file
+        return _verify(plain_password, hashed_password)
+
+    @staticmethod
+    async def bcrypt_async(password: str) -> str:
+        return await _run(_hash, password)
+
+    @staticmethod
+    async def verify_async(plain_password: str, hashed_password: str) -> bool:
+        return await _run(_verify, plain_password, hashed_password)
@@ -0,0 +1,439 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import Date, DateTime, Integer, case, func, literal_column, null, select, tuple_, type_coerce, union_all
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import FunctionElement
+
+from app import models
+
+# Read-only queries for the analytics paths. They select only the columns a
+# caller reads and return plain Rows, so nothing is added to the identity map
+# and nothing is expired (and lazily reloaded) by a later commit. Rows carry
+# the model's attribute names, so they can stand in for ORM objects in code
+# that only reads them (streak state, bitmaps, HabitRead.model_validate).
+#
+# Logs older than the compaction horizon live in habit_log_months as one day
+# bitmap per habit and month (see app.services.compaction). Everything that
+# reads logged days goes through log_days(), which adds those days back to
+# the raw habit_logs rows.
+
+_IN_CHUNK = 500
+
+# what stats and streak/bitmap maintenance read from a habit
+HABIT_SUMMARY = (
+    models.Habit.id,
+    models.Habit.user_id,
+    models.Habit.name,
+    models.Habit.goal_type,
+    models.Habit.target_per_period,
+    models.Habit.start_date,
+)
+# everything schemas.HabitRead serializes
+HABIT_READ = HABIT_SUMMARY + (
+    models.Habit.description,
+    models.Habit.is_archived,
+    models.Habit.created_at,
+)
+HABIT_LOG_READ = (
+    models.HabitLog.id,
+    models.HabitLog.habit_id,
+    models.HabitLog.user_id,
+    models.HabitLog.date,
+    models.HabitLog.value,
+    models.HabitLog.created_at,
+)
+STREAK_STATE = (
+    models.HabitStreak.habit_id,
+    models.HabitStreak.goal_type,
+    models.HabitStreak.target_per_period,
+    models.HabitStreak.current_run,
+    models.HabitStreak.best_run,
+    models.HabitStreak.last_period_end,
+    models.HabitStreak.last_log_date,
+)
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for i in range(0, len(ids), _IN_CHUNK):
+        yield ids[i:i + _IN_CHUNK]
+
+
+def active_habits(db: Session, user_id: int, until: date, columns=HABIT_SUMMARY) -> List[Row]:
+    """
+    Unarchived habits of the user that have started by `until`, oldest first.
+    """
+    return db.execute(
+        select(*columns)
+        .where(
+            models.Habit.user_id == user_id,
+            models.Habit.is_archived == False,
+            models.Habit.start_date <= until,
+        )
+        .order_by(models.Habit.created_at, models.Habit.id)
+    ).all()
+
+
+def active_habits_for_users(db: Session, user_ids: List[int], until: date, columns=HABIT_SUMMARY) -> List[Row]:
+    """
+    active_habits for several users at once, ordered by user, then as active_habits.
+    """
+    rows = []
+    for chunk in _chunks(user_ids):
+        rows.extend(db.execute(
+            select(*columns)
+            .where(
+                models.Habit.user_id.in_(chunk),
+                models.Habit.is_archived == False,
+                models.Habit.start_date <= until,
+            )
+            .order_by(models.Habit.user_id, models.Habit.created_at, models.Habit.id)
+        ))
+    return rows
+
+
+def logged_habit_ids(db: Session, user_id: int, habit_ids: List[int], day: date) -> Set[int]:
+    """
+    The subset of `habit_ids` with a log on `day`. Only for the user's today,
+    which is never compacted, so only habit_logs is read.
+    """
+    return set(db.execute(
+        select(models.HabitLog.habit_id).where(
+            models.HabitLog.user_id == user_id,
+            models.HabitLog.habit_id.in_(habit_ids),
+            models.HabitLog.date == day,
+        )
+    ).scalars())
+
+
+class add_days(FunctionElement):
+    """
+    A date column plus a whole number of days, as a DATE.
+    """
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(add_days)
+def _add_days(element, compiler, **kw):
+    day, days = element.clauses
+    return "(%s + %s)" % (compiler.process(day, **kw), compiler.process(days, **kw))
+
+
+@compiles(add_days, "sqlite")
+def _add_days_sqlite(element, compiler, **kw):
+    day, days = element.clauses
+    return "date(julianday(%s) + %s)" % (compiler.process(day, **kw), compiler.process(days, **kw))
+
+
+# 0..30: the offset of each day of a month from its first day
+_DAY_OFFSETS = union_all(
+    *(select(literal_column(str(n), Integer).label("n")) for n in range(31))
+).subquery("day_offsets")
+
+
+def _compacted_months(stmt, habit_ids, user_id, start, end):
+    months = models.HabitLogMonth
+    if habit_ids is not None:
+        stmt = stmt.where(months.habit_id.in_(habit_ids))
+    if user_id is not None:
+        stmt = stmt.where(months.user_id == user_id)
+    if start is not None:
+        stmt = stmt.where(months.month >= start.replace(day=1))
+    if end is not None:
+        stmt = stmt.where(months.month <= end)
+    return stmt
+
+
+def compacted_days(habit_ids: Optional[List[int]] = None, user_id: Optional[int] = None,
+                   start: Optional[date] = None, end: Optional[date] = None):
+    """
+    SELECT (habit_id, user_id, date) for the days set in habit_log_months.
+    A day is never in both tables: writing to a compacted day moves it back
+    to habit_logs (app.services.compaction.uncompact_days).
+    """
+    months = models.HabitLogMonth
+    day = add_days(months.month, _DAY_OFFSETS.c.n)
+    stmt = (
+        select(months.habit_id, months.user_id, day.label("date"))
+        .select_from(months)
+        .join(_DAY_OFFSETS, months.days.bitwise_rshift(_DAY_OFFSETS.c.n).bitwise_and(1) == 1)
+    )
+    stmt = _compacted_months(stmt, habit_ids, user_id, start, end)
+    if start is not None:
+        stmt = stmt.where(day >= start)
+    if end is not None:
+        stmt = stmt.where(day <= end)
+    return stmt
+
+
+def has_compacted_days(db: Session, habit_ids: Optional[List[int]] = None, user_id: Optional[int] = None,
+                       start: Optional[date] = None, end: Optional[date] = None) -> bool:
+    """
+    Whether any habit_log_months row matches the filters. Readers skip the
+    compacted half when it does not, which is always the case within the
+    horizon.
+    """
+    probe = _compacted_months(select(models.HabitLogMonth.habit_id), habit_ids, user_id, start, end)
+    return db.execute(probe.limit(1)).first() is not None
+
+
+def log_days(db: Session, habit_ids: Optional[List[int]] = None, user_id: Optional[int] = None,
+             start: Optional[date] = None, end: Optional[date] = None):
+    """
+    Subquery of (habit_id, user_id, date) for every logged day: habit_logs
+    UNION ALL compacted_days, with the filters applied to both halves. When
+    no compacted month matches (no compaction yet, or a range within the
+    horizon) it is habit_logs alone, so the planner can still read the
+    rows in index order.
+    """
+    logs = models.HabitLog
+    raw = select(logs.habit_id, logs.user_id, logs.date)
+    if habit_ids is not None:
+        raw = raw.where(logs.habit_id.in_(habit_ids))
+    if user_id is not None:
+        raw = raw.where(logs.user_id == user_id)
+    if start is not None:
+        raw = raw.where(logs.date >= start)
+    if end is not None:
+        raw = raw.where(logs.date <= end)
+    if not has_compacted_days(db, habit_ids, user_id, start, end):
+        return raw.subquery("log_days")
+    return union_all(raw, compacted_days(habit_ids, user_id, start, end)).subquery("log_days")
+
+
+def compacted_logs(**filters):
+    """
+    compacted_days as HABIT_LOG_READ rows: the default value, and no id or
+    created_at, which compaction does not keep.
+    """
+    days = compacted_days(**filters).subquery()
+    return select(
+        type_coerce(null(), Integer).label("id"),
+        days.c.habit_id,
+        days.c.user_id,
+        days.c.date,
+        literal_column("1", Integer).label("value"),
+        type_coerce(null(), DateTime(timezone=True)).label("created_at"),
+    )
+
+
+def compacted_log_keys(db: Session, user_id: int, keys: List[Tuple[int, date]]) -> Set[Tuple[int, date]]:
+    """
+    The (habit_id, date) keys that are stored in habit_log_months.
+    """
+    months = {(habit_id, day.replace(day=1)) for habit_id, day in keys}
+    bits = {
+        (row.habit_id, row.month): row.days
+        for row in db.execute(
+            select(models.HabitLogMonth.habit_id, models.HabitLogMonth.month, models.HabitLogMonth.days).where(
+                models.HabitLogMonth.user_id == user_id,
+                tuple_(models.HabitLogMonth.habit_id, models.HabitLogMonth.month).in_(months),
+            )
+        )
+    }
+    return {
+        (habit_id, day) for habit_id, day in keys
+        if bits.get((habit_id, day.replace(day=1)), 0) >> (day.day - 1) & 1
+    }
+
+
+def month_days(month: date, days: int) -> Iterator[date]:
+    """
+    The dates set in a habit_log_months.days bitmap.
+    """
+    first = month.toordinal()
+    while days:
+        lowest = days & -days
+        yield date.fromordinal(first + lowest.bit_length() - 1)
+        days ^= lowest
+
+
+class LogDay(NamedTuple):
+    habit_id: int
+    date: date
+
+
+def log_dates(db: Session, habit_ids: List[int], until: Optional[date] = None) -> List[Row]:
+    """
+    (habit_id, date) rows for every logged day of the given habits, optionally
+    up to `until`, in no particular order. Compacted months are expanded
+    here rather than in SQL, which would build a row per day.
+    """
+    logs = models.HabitLog
+    months = models.HabitLogMonth
+    rows = []
+    for chunk in _chunks(habit_ids):
+        raw = select(logs.habit_id, logs.date).where(logs.habit_id.in_(chunk))
+        compacted = select(months.habit_id, months.month, months.days).where(months.habit_id.in_(chunk))
+        if until is not None:
+            raw = raw.where(logs.date <= until)
+            compacted = compacted.where(months.month <= until)
+        rows.extend(db.execute(raw))
+        for m in db.execute(compacted):
+            rows.extend(
+                LogDay(m.habit_id, d) for d in month_days(m.month, m.days) if until is None or d <= until
+            )
+    return rows
+
+
+def count_log_days(db: Session, habit_id: int, start_date: date, end_date: date) -> int:
+    days = log_days(db, habit_ids=[habit_id], start=start_date, end=end_date)
+    return db.execute(select(func.count()).select_from(days)).scalar_one()
+
+
+def streak_states(db: Session, habit_ids: List[int]) -> Dict[int, Row]:
+    states = {}
+    for chunk in _chunks(habit_ids):
+        states.update(
+            (row.habit_id, row)
+            for row in db.execute(select(*STREAK_STATE).where(models.HabitStreak.habit_id.in_(chunk)))
+        )
+    return states
+
+
+def bitmap_rows(db: Session, habit_ids: List[int]) -> List[Row]:
+    rows = []
+    for chunk in _chunks(habit_ids):
+        rows.extend(db.execute(
+            select(models.HabitBitmap.habit_id, models.HabitBitmap.origin, models.HabitBitmap.bits)
+            .where(models.HabitBitmap.habit_id.in_(chunk))
+        ))
+    return rows
+
+
+class week_start(FunctionElement):
+    """
+    The Monday on or before a date column, as a DATE: date_trunc('week', ...)
+    on Postgres, date(..., 'weekday 0', '-6 days') on SQLite (forward to
+    Sunday, then back to its Monday).
+    """
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(week_start)
+def _week_start(element, compiler, **kw):
+    return "CAST(date_trunc('week', %s) AS DATE)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(week_start, "sqlite")
+def _week_start_sqlite(element, compiler, **kw):
+    return "date(%s, 'weekday 0', '-6 days')" % compiler.process(element.clauses, **kw)
+
+
+class day_number(FunctionElement):
+    """
+    A date column as a whole number of days, so consecutive dates differ by
+    one: julianday() on SQLite, days since 1970-01-01 on Postgres.
+    """
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(day_number)
+def _day_number(element, compiler, **kw):
+    return "(%s - DATE '1970-01-01')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(day_number, "sqlite")
+def _day_number_sqlite(element, compiler, **kw):
+    return "CAST(julianday(%s) AS INTEGER)" % compiler.process(element.clauses, **kw)
+
+
+def daily_log_counts(db: Session, user_id: int, start_date: date, end_date: date) -> Dict[date, int]:
+    """
+    {day: logs across all of the user's habits} for days in [start_date, end_date] with any.
+    """
+    days = log_days(db, user_id=user_id, start=start_date, end=end_date)
+    rows = db.execute(select(days.c.date, func.count()).group_by(days.c.date))
+    return {d: n for d, n in rows}
+
+
+def weekly_log_counts(db: Session, habit_ids: List[int], start_date: date, end_date: date) -> List[Row]:
+    """
+    (habit_id, week, days, days_since_start) per habit and Monday-start week
+    with a log in [start_date, end_date]. `days_since_start` leaves out logs
+    dated before the habit's start_date.
+    """
+    rows = []
+    for chunk in _chunks(habit_ids):
+        days = log_days(db, habit_ids=chunk, start=start_date, end=end_date)
+        week = week_start(days.c.date)
+        rows.extend(db.execute(
+            select(
+                days.c.habit_id,
+                week.label("week"),
+                func.count().label("days"),
+                func.sum(case((days.c.date >= models.Habit.start_date, 1), else_=0)).label("days_since_start"),
+            )
+            .join(models.Habit, models.Habit.id == days.c.habit_id)
+            .group_by(days.c.habit_id, week)
+        ))
+    return rows
+
+
+def _streaks_from_periods(periods, step: int, current_ends):
+    """
+    Gaps and islands over `periods` (habit_id, period) with one row per
+    successful period: subtracting `step` * ROW_NUMBER() from the period's day
+    number is constant within a run of consecutive periods. Returns
+    (habit_id, current_streak, best_streak) per habit, where the current
+    streak is the run ending on one of `current_ends`.
+    """
+    numbered = select(
+        periods.c.habit_id,
+        periods.c.period,
+        (
+            day_number(periods.c.period)
+            - step * func.row_number().over(partition_by=periods.c.habit_id, order_by=periods.c.period)
+        ).label("island"),
+    ).subquery()
+    runs = (
+        select(numbered.c.habit_id, func.count().label("length"), func.max(numbered.c.period).label("last"))
+        .group_by(numbered.c.habit_id, numbered.c.island)
+        .subquery()
+    )
+    return select(
+        runs.c.habit_id,
+        func.max(case((runs.c.last.in_(current_ends), runs.c.length), else_=0)).label("current_streak"),
+        func.max(runs.c.length).label("best_streak"),
+    ).group_by(runs.c.habit_id)
+
+
+def daily_streaks(db: Session, habit_ids: List[int], today: date) -> List[Row]:
+    """
+    (habit_id, current_streak, best_streak) for daily habits with a log on or
+    before `today`, computed in the database.
+    """
+    rows = []
+    for chunk in _chunks(habit_ids):
+        days = log_days(db, habit_ids=chunk, end=today)
+        periods = select(days.c.habit_id, days.c.date.label("period")).subquery()
+        rows.extend(db.execute(_streaks_from_periods(periods, 1, [today])))
+    return rows
+
+
+def weekly_streaks(db: Session, habit_ids: List[int], today: date) -> List[Row]:
+    """
+    (habit_id, current_streak, best_streak) for X_PER_WEEK habits with a
+    successful week on or before `today`. A week succeeds when it has at least
+    target_per_period logs; the current streak may end this week or last week.
+    """
+    this_week = today - timedelta(days=today.weekday())
+    rows = []
+    for chunk in _chunks(habit_ids):
+        days = log_days(db, habit_ids=chunk, end=today)
+        week = week_start(days.c.date)
+        weeks = (
+            select(days.c.habit_id, week.label("period"))
+            .join(models.Habit, models.Habit.id == days.c.habit_id)
+            .where(models.Habit.target_per_period > 0)
+            .group_by(days.c.habit_id, week, models.Habit.target_per_period)
+            .having(func.count() >= models.Habit.target_per_period)
+            .subquery()
+        )
+        rows.extend(db.execute(_streaks_from_periods(weeks, 7, [this_week, this_week - timedelta(days=7)])))
+    return rows
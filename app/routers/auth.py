@@ -1,70 +1,104 @@
+from typing import Optional, Tuple
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app import models, schemas
-from app.dependencies import get_db, get_current_user
-from app.security import get_password_hash, verify_password, create_access_token
+from app.dependencies import get_db, get_current_user, run_db
+from app.security import (
+    create_access_token,
+    hashing_admission,
+    get_password_hash_async,
+    verify_password_async,
+)
+from app.services.data_version import bump_data_version
+from app.services.principal_cache import principal_cache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-@router.post("/register", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED)
-def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
-    if len(user_in.email) == 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="An email is required",
-        )
-    elif "@" not in user_in.email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="An email address must have an @ sign",
-        )
-    # Check email
-    existing_email = db.query(models.User).filter(models.User.email == user_in.email).first()
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered",
-        )
-    if len(user_in.username) == 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Include a username",
-        )
-    # Check username
-    existing_username = db.query(models.User).filter(models.User.username == user_in.username).first()
-    if existing_username:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken",
-        )
-    if len(user_in.password) < 8:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Password must be at least 8 characters long",
-        )
+# register and login are async so bcrypt work can be awaited on the password
+# hashing pool without holding a threadpool thread. Their queries run in the
+# threadpool (or on the AsyncSession in async mode) and end the transaction
+# before the await, so no pooled connection is held while waiting on the hash.
+
+def _validate_new_user(db: Session, user_in: schemas.UserCreate) -> None:
+    try:
+        if len(user_in.email) == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="An email is required",
+            )
+        elif "@" not in user_in.email:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="An email address must have an @ sign",
+            )
+        # Check email
+        existing_email = db.query(models.User).filter(models.User.email == user_in.email).first()
+        if existing_email:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered",
+            )
+        if len(user_in.username) == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Include a username",
+            )
+        # Check username
+        existing_username = db.query(models.User).filter(models.User.username == user_in.username).first()
+        if existing_username:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already taken",
+            )
+        if len(user_in.password) < 8:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Password must be at least 8 characters long",
+            )
+    finally:
+        db.rollback()
+
+def _create_user(db: Session, user_in: schemas.UserCreate, password_hash: str) -> models.User:
     user = models.User(
         email=user_in.email,
         username=user_in.username,
         timezone=user_in.timezone,
-        password_hash=get_password_hash(user_in.password),
+        password_hash=password_hash,
     )
     db.add(user)
     db.commit()
     db.refresh(user)
     return user
 
+def _find_credentials(db: Session, username: str) -> Optional[Tuple[int, str]]:
+    try:
+        user = db.query(models.User).filter(models.User.username==username).first()
+        return (user.id, user.password_hash) if user else None
+    finally:
+        db.rollback()
+
+@router.post("/register", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED)
+async def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
+    with hashing_admission():
+        await run_db(db, _validate_new_user, user_in)
+        password_hash = await get_password_hash_async(user_in.password)
+    return await run_db(db, _create_user, user_in, password_hash)
+
 @router.post("/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.username==form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    with hashing_admission():
+        credentials = await run_db(db, _find_credentials, form_data.username)
+        verified = credentials is not None and await verify_password_async(form_data.password, credentials[1])
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password."
         )
     
-    access_token = create_access_token(user_id=user.id)
+    access_token = create_access_token(user_id=credentials[0])
     return schemas.Token(access_token=access_token, token_type="bearer")
 
 @router.get("/me", response_model=schemas.UserRead)
@@ -77,10 +111,13 @@ def update_me(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
     ):
+    # current_user may be a cached snapshot, so edit the row loaded here.
+    user = db.get(models.User, current_user.id)
     data = user_in.model_dump(exclude_unset=True)
     for k, v in data.items():
-        setattr(current_user, k, v)
-    
+        setattr(user, k, v)
+    bump_data_version(db, user.id)
     db.commit()
-    db.refresh(current_user)
-    return current_user
+    db.refresh(user)
+    principal_cache.invalidate_user(user.id)
+    return user
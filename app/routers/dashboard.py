@@ -1,18 +1,24 @@
 from datetime import datetime
-from typing import List, Dict
-
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from zoneinfo import ZoneInfo
 
 from app import models, schemas
 from app.dependencies import get_db, get_current_user
-from app.services.streaks import compute_streaks_for_daily, compute_streaks_for_x_per_week
+from app.etag import etag_guard
+from app.fastjson import as_dicts, fast_json
+from app.instrumentation import timed_phase
+from app.queries import HABIT_READ, active_habits, logged_habit_ids
+from app.services.dashboard_snapshot import dashboard_items, load_snapshot
+from app.services.result_cache import cached_result
+from app.services.streak_state import get_streaks_for_habits
 from app.services.time import get_today_for_user
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
-@router.get("/today", response_model=schemas.DashboardTodayResponse)
+@router.get("/today", response_model=schemas.DashboardTodayResponse, dependencies=[Depends(etag_guard)])
+@fast_json
+@cached_result("dashboard.today")
 def get_today_dashboard(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
@@ -20,59 +26,33 @@ def get_today_dashboard(
 
     today = get_today_for_user(current_user.timezone)
 
-    habits: List[models.Habit] = (
-        db.query(models.Habit)
-        .filter(
-            models.Habit.user_id == current_user.id,
-            models.Habit.is_archived == False,
-            models.Habit.start_date <= today,
-        )
-        .order_by(models.Habit.created_at)
-        .all()
-    )
+    # precomputed at local midnight: only today's logs are left to look up
+    snapshot = load_snapshot(db, current_user.id, today)
+    if snapshot is not None:
+        habit_ids = [entry["habit"]["id"] for entry in snapshot]
+        completed_ids = logged_habit_ids(db, current_user.id, habit_ids, today) if habit_ids else set()
+        return {"date": today, "habits": dashboard_items(snapshot, completed_ids)}
+
+    habits = active_habits(db, current_user.id, today, HABIT_READ)
 
     if not habits:
-        return schemas.DashboardTodayResponse(date=today, habits=[])
-    
-    habit_ids = [h.id for h in habits]
+        return {"date": today, "habits": []}
 
-    logs: List[models.HabitLog] = (
-        db.query(models.HabitLog)
-        .filter(
-            models.HabitLog.user_id == current_user.id,
-            models.HabitLog.habit_id.in_(habit_ids),
-            models.HabitLog.date <= today,
-        )
-        .all()
-    )
+    completed_ids = logged_habit_ids(db, current_user.id, [h.id for h in habits], today)
 
-    logs_by_habit: Dict[int, List[models.HabitLog]] = {hid: [] for hid in habit_ids}
-    for log in logs:
-        logs_by_habit[log.habit_id].append(log)
-    
-    items: List[schemas.TodayHabitItem] = []
+    with timed_phase("streaks"):
+        streaks = get_streaks_for_habits(db, habits, today)
 
-    for habit in habits:
-        habit_logs = logs_by_habit.get(habit.id,[])
+    items = []
 
-        completed_today = any(log.date == today for log in habit_logs)
+    for habit, habit_read in zip(habits, as_dicts(habits, schemas.HabitRead)):
+        current_streak, best_streak = streaks[habit.id]
 
-        log_dates = [log.date for log in habit_logs]
-        if habit.goal_type == "DAILY":
-            current_streak, best_streak = compute_streaks_for_daily(log_dates, today)
-        elif habit.goal_type == "X_PER_WEEK":
-            current_streak, best_streak = compute_streaks_for_x_per_week(log_dates, today, habit.target_per_period)
-        else:
-            current_streak, best_streak = 0, 0
-        
-        items.append(
-            schemas.TodayHabitItem(
-                habit=schemas.HabitRead.model_validate(habit),
-                is_completed=completed_today,
-                current_streak=current_streak,
-                best_streak=best_streak
-            )
-        )
+        items.append({
+            "habit": habit_read,
+            "is_completed": habit.id in completed_ids,
+            "current_streak": current_streak,
+            "best_streak": best_streak,
+        })
 
-    return schemas.DashboardTodayResponse(date=today, habits=items)
-    
\ No newline at end of file
+    return {"date": today, "habits": items}
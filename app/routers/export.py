@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date
+from typing import AsyncIterator, Iterable, List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.dependencies import get_current_user, get_db, run_db, stream_partitions
+from app.queries import compacted_logs, has_compacted_days
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+# The export is streamed straight from server-side cursors: rows are read
+# BATCH_SIZE at a time, encoded and sent, so memory use does not grow with the
+# size of the user's history.
+
+BATCH_SIZE = 1000
+
+HABIT_FIELDS = ("id", "name", "description", "goal_type", "target_per_period", "start_date", "is_archived", "created_at")
+LOG_FIELDS = ("habit_id", "date", "value", "created_at")
+CSV_FIELDS = ("record", "habit_id", "name", "description", "goal_type", "target_per_period",
+              "start_date", "is_archived", "date", "value", "created_at")
+
+MEDIA_TYPES = {
+    schemas.ExportFormat.NDJSON: "application/x-ndjson",
+    schemas.ExportFormat.CSV: "text/csv",
+}
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _ndjson(record: str, fields: Iterable[str], rows: List) -> str:
+    return "".join(
+        json.dumps({"record": record, **{f: _plain(v) for f, v in zip(fields, row)}}) + "\n"
+        for row in rows
+    )
+
+
+def _csv(record: str, fields: Iterable[str], rows: List) -> str:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, lineterminator="\n")
+    for row in rows:
+        values = dict(zip(fields, row))
+        if record == "habit":
+            values["habit_id"] = values.pop("id")
+        writer.writerow({"record": record, **values})
+    return out.getvalue()
+
+
+async def _export_chunks(db, user_id: int, fmt: schemas.ExportFormat,
+                         from_date: Optional[date], to_date: Optional[date]) -> AsyncIterator[str]:
+    encode = _ndjson if fmt == schemas.ExportFormat.NDJSON else _csv
+    if fmt == schemas.ExportFormat.CSV:
+        yield ",".join(CSV_FIELDS) + "\n"
+
+    habits = (
+        select(*(getattr(models.Habit, f) for f in HABIT_FIELDS))
+        .where(models.Habit.user_id == user_id)
+        .order_by(models.Habit.created_at, models.Habit.id)
+    )
+    async for rows in stream_partitions(db, habits, BATCH_SIZE):
+        yield encode("habit", HABIT_FIELDS, rows)
+
+    raw = select(*(getattr(models.HabitLog, f) for f in LOG_FIELDS)).where(models.HabitLog.user_id == user_id)
+    if from_date:
+        raw = raw.where(models.HabitLog.date >= from_date)
+    if to_date:
+        raw = raw.where(models.HabitLog.date <= to_date)
+    if await run_db(db, has_compacted_days, None, user_id, from_date, to_date):
+        compacted = compacted_logs(user_id=user_id, start=from_date, end=to_date).subquery()
+        logs = union_all(raw, select(*(compacted.c[f] for f in LOG_FIELDS)))
+        logs = logs.order_by(logs.selected_columns.habit_id, logs.selected_columns.date)
+    else:
+        # read straight off uq_user_habit_date, already in this order
+        logs = raw.order_by(models.HabitLog.habit_id, models.HabitLog.date)
+    async for rows in stream_partitions(db, logs, BATCH_SIZE):
+        yield encode("log", LOG_FIELDS, rows)
+
+
+async def _encoded(chunks: AsyncIterator[str], compress: bool) -> AsyncIterator[bytes]:
+    gzip = zlib.compressobj(wbits=31) if compress else None
+    async for chunk in chunks:
+        data = chunk.encode()
+        if gzip:
+            data = gzip.compress(data)
+        if data:
+            yield data
+    if gzip:
+        yield gzip.flush()
+
+
+@router.get("")
+async def export_history(
+    format: schemas.ExportFormat = Query(schemas.ExportFormat.NDJSON),
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    gzip: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    filename = f"habit-tracker-export.{format.value}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        _encoded(_export_chunks(db, current_user.id, format, from_date, to_date), gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,30 +1,63 @@
-from datetime import date
+import heapq
+from datetime import date, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import and_, or_, select, tuple_
 from sqlalchemy.orm import Session
 
 from app import models, schemas
 from app.dependencies import get_current_user, get_db
+from app.etag import etag_guard
+from app.fastjson import as_dicts, fast_json
+from app.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, paginate
+from app.queries import HABIT_LOG_READ, HABIT_READ, compacted_log_keys, compacted_logs, has_compacted_days
+from app.services.bitmaps import set_day
+from app.services.daily_counts import increment_daily_count
+from app.services.dashboard_snapshot import advance_snapshot
+from app.services.data_version import bump_data_version
+from app.services.log_batch import upsert_logs
+from app.services.streak_state import apply_log_to_streak_state, rebuild_streak_state
+from app.services.time import get_today_for_user
 
 router = APIRouter(prefix="/habits", tags=["habits"])
 
 # ----------------- HABIT CRUD ----------------------
 
-@router.get("/", response_model=List[schemas.HabitRead])
+@router.get("/", response_model=List[schemas.HabitRead], dependencies=[Depends(etag_guard)])
+@fast_json
 def list_habits(
+    response: Response,
     include_archived: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    q = db.query(models.Habit).filter(models.Habit.user_id == current_user.id)
+    q = db.query(*HABIT_READ).filter(models.Habit.user_id == current_user.id)
     
     if not include_archived:
         q = q.filter(models.Habit.is_archived == False)
 
-    habits = q.order_by(models.Habit.created_at).all()
+    if cursor:
+        # compare against the stored created_at of the cursor's habit so the
+        # timestamp never has to round-trip through the cursor
+        (after_id,) = decode_cursor(cursor, int)
+        after_created = (
+            select(models.Habit.created_at)
+            .where(models.Habit.id == after_id)
+            .scalar_subquery()
+        )
+        q = q.filter(or_(
+            models.Habit.created_at > after_created,
+            and_(models.Habit.created_at == after_created, models.Habit.id > after_id),
+        ))
+
+    q = q.order_by(models.Habit.created_at, models.Habit.id)
+    if limit is not None:
+        q = q.limit(limit + 1)
 
-    return habits
+    return as_dicts(paginate(q.all(), limit, response, lambda h: encode_cursor(h.id)), schemas.HabitRead)
 
 @router.post("/", response_model=schemas.HabitRead, status_code=status.HTTP_201_CREATED)
 def create_habit(
@@ -37,6 +70,7 @@ def create_habit(
         **habit_in.model_dump()
     )
     db.add(habit)
+    bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(habit)
     return habit
@@ -74,7 +108,11 @@ def update_habit(
     update_data = habit_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(habit, field, value)
+
+    if "goal_type" in update_data or "target_per_period" in update_data:
+        rebuild_streak_state(db, habit)
     
+    bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(habit)
     return habit
@@ -94,6 +132,7 @@ def restore_habit(
         raise HTTPException(status_cod=404, detail="Habit not found")
     
     habit.is_archived = False
+    bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(habit)
     return habit
@@ -113,15 +152,36 @@ def delete_habit(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habit not found")
     
     habit.is_archived = True
+    bump_data_version(db, current_user.id)
     db.commit()
     return
 
 # ------------------- HABIT LOGS ---------------------------
+@router.post("/logs:batch", response_model=schemas.HabitLogBatchResponse)
+def create_habit_logs_batch(
+    batch_in: schemas.HabitLogBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    statuses = upsert_logs(db, current_user.id, batch_in.logs, today=get_today_for_user(current_user.timezone))
+    return schemas.HabitLogBatchResponse(
+        created=statuses.count(schemas.LogBatchStatus.CREATED),
+        updated=statuses.count(schemas.LogBatchStatus.UPDATED),
+        results=[
+            schemas.HabitLogBatchResult(habit_id=item.habit_id, date=item.date, status=s)
+            for item, s in zip(batch_in.logs, statuses)
+        ],
+    )
+
 @ router.get("/{habit_id}/logs", response_model=List[schemas.HabitLogRead])
+@fast_json
 def get_habit_logs(
     habit_id: int,
+    response: Response,
     from_date: Optional[date] = Query(None, alias="from"),
     to_date: Optional[date] = Query(None, alias="to"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -132,18 +192,38 @@ def get_habit_logs(
     if not habit:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habit not found")
     
-    q = db.query(models.HabitLog).filter(
+    q = db.query(*HABIT_LOG_READ).filter(
         models.HabitLog.habit_id == habit_id,
         models.HabitLog.user_id == current_user.id,
     )
 
+    compacted_from = from_date
     if from_date:
         q = q.filter(models.HabitLog.date>= from_date)
     if to_date:
         q = q.filter(models.HabitLog.date<= to_date)
+    if cursor:
+        after = decode_cursor(cursor, date.fromisoformat, int)
+        q = q.filter(tuple_(models.HabitLog.date, models.HabitLog.id) > tuple_(*after))
+        # a day is either compacted or in habit_logs, so compacted days resume after the cursor's day
+        compacted_from = max(from_date or date.min, after[0] + timedelta(days=1))
+
+    q = q.order_by(models.HabitLog.date, models.HabitLog.id)
+    if limit is not None:
+        q = q.limit(limit + 1)
 
-    logs = q.order_by(models.HabitLog.date).all()
-    return logs 
+    if has_compacted_days(db, [habit_id], current_user.id, compacted_from, to_date):
+        compacted = compacted_logs(habit_ids=[habit_id], user_id=current_user.id, start=compacted_from, end=to_date)
+        compacted = compacted.order_by(compacted.selected_columns.date)
+        if limit is not None:
+            compacted = compacted.limit(limit + 1)
+        rows = list(heapq.merge(db.execute(compacted).all(), q.all(), key=lambda log: log.date))
+    else:
+        rows = q.all()
+    if limit is not None:
+        rows = rows[:limit + 1]
+    rows = paginate(rows, limit, response, lambda log: encode_cursor(log.date.isoformat(), log.id or 0))
+    return as_dicts(rows, schemas.HabitLogRead)
 
 @router.post("/{habit_id}/logs", response_model=schemas.HabitLogRead, status_code=status.HTTP_201_CREATED)
 def create_habit_log(
@@ -169,7 +249,7 @@ def create_habit_log(
         )
         .first()
     )
-    if existing:
+    if existing or compacted_log_keys(db, current_user.id, [(habit_id, log_in.date)]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Log already exists for this date."
@@ -181,6 +261,13 @@ def create_habit_log(
         **log_in.model_dump(),
     )
     db.add(log)
+    db.flush()
+    apply_log_to_streak_state(db, habit, log.date)
+    increment_daily_count(db, current_user.id, log.date)
+    set_day(db, habit, log.date)
+    if log.date == get_today_for_user(current_user.timezone):
+        advance_snapshot(db, current_user.id, log.date)
+    bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(log)
     return log
\ No newline at end of file
@@ -1,12 +1,18 @@
 from datetime import date, timedelta, datetime
-from typing import Dict, List, Set
+from typing import Dict, Set
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from zoneinfo import ZoneInfo
 
 from app import models, schemas
 from app.dependencies import get_current_user, get_db
-from app.services.streaks import compute_streaks_for_daily, compute_streaks_for_x_per_week
+from app.etag import etag_guard
+from app.fastjson import fast_json
+from app.instrumentation import timed_phase
+from app.queries import active_habits
+from app.services.result_cache import cached_result
+from app.services.aggregates import PeriodCounts, day_counts, period_counts
+from app.services.streak_state import get_streaks_for_habits
 from app.services.time import get_today_for_user
 
 router = APIRouter(prefix="/stats", tags=["stats"])
@@ -29,90 +35,25 @@ def user_today(user_tz_name: str | None) -> date:
         tz = ZoneInfo("America/New_York")
     return datetime.now(tz).date()
 
-@router.get("/heatmap", response_model=schemas.HeatmapResponse)
-def heatmap(
-    range: str = Query("365d", pattern="^(7d|30d|90d|180d|365d)$"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
-    today = user_today(current_user.timezone)
-    start_date, end_date = range_to_dates(range, today)
+# The helpers return payloads shaped like the response schemas, encoded by app.fastjson.
 
-    logs: List[models.HabitLog] = (
-        db.query(models.HabitLog)
-        .filter(
-            models.HabitLog.user_id == current_user.id,
-            models.HabitLog.date >= start_date,
-            models.HabitLog.date <= end_date,
-        )
-        .all()
-    )
+def _heatmap(db: Session, user_id: int, start_date: date, end_date: date) -> Dict:
+    count_by_day = day_counts(db, user_id, start_date, end_date)
 
-    count_by_day: Dict[date, int] = {}
-    for log in logs:
-        count_by_day[log.date] = count_by_day.get(log.date, 0) + 1
-    
-    days: List[schemas.HeatmapDay] = []
+    days = []
     d = start_date
     while d <= end_date:
-        count = count_by_day.get(d, 0)
-        days.append(schemas.HeatmapDay(date=d, count=count))
+        days.append({"date": d, "count": count_by_day.get(d, 0)})
         d += timedelta(days=1)
     
-    return schemas.HeatmapResponse(start_date=start_date, end_date=end_date, days=days)
-
-@router.get("/consistency", response_model=schemas.ConsistencyScoreResponse)
-def consistency_score(
-    range: str = Query("30d", pattern="^(7d|30d|90d|180d|365d)$"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-): 
-    today = user_today(current_user.timezone)
-    start_date, end_date = range_to_dates(range, today)
-
-    habits = (
-        db.query(models.Habit)
-        .filter(
-            models.Habit.user_id == current_user.id,
-            models.Habit.is_archived == False,
-            models.Habit.start_date <= end_date,
-        )
-        .all()
-    )
-    
-    if not habits:
-        return schemas.ConsistencyScoreResponse(
-            start_date=start_date,
-            end_date=end_date,
-            score=0.0,
-            successful_periods=0,
-            total_periods=0,
-        )
-    
-    habit_ids = [h.id for h in habits]
-    
-    logs = (
-        db.query(models.HabitLog)
-        .filter(
-            models.HabitLog.user_id == current_user.id,
-            models.HabitLog.habit_id.in_(habit_ids),
-            models.HabitLog.date >= start_date,
-            models.HabitLog.date <= end_date,
-        )
-        .all()
-    )
+    return {"start_date": start_date, "end_date": end_date, "days": days}
 
-    log_dates_by_habit: Dict[int, list[date]] = {hid: [] for hid in habit_ids}
-    for log in logs:
-        log_dates_by_habit[log.habit_id].append(log.date)
-    
+def _consistency(habits, counts: Dict[int, PeriodCounts], start_date: date, end_date: date) -> Dict:
     successful = 0
     total = 0
 
-    days_in_range = (end_date - start_date).days + 1
-
     for h in habits:
-        log_dates = log_dates_by_habit.get(h.id, [])
+        c = counts[h.id]
 
         if h.goal_type == "DAILY":
             effective_start = max(start_date, h.start_date)
@@ -120,8 +61,7 @@ def consistency_score(
             if possible_days <= 0:
                 continue
         
-            completed_days = len({d for d in log_dates if effective_start <= d <= end_date})
-            successful += completed_days
+            successful += c.days_since_start
             total += possible_days
         
         elif h.goal_type == "X_PER_WEEK":
@@ -132,55 +72,25 @@ def consistency_score(
             if weeks_in_range <= 0:
                 continue
             
-            counts: Dict[date, int] = {}
-            for d in log_dates:
-                ws = week_start(d)
-                if ws_start <= ws <= ws_end:
-                    counts[ws] = counts.get(ws, 0) + 1
-                
-                successful_weeks = sum(1 for ws, c in counts.items() if c >= h.target_per_period)
-                successful += successful_weeks
-                total += weeks_in_range
+            successful_weeks = sum(
+                1 for ws, n in c.weeks.items()
+                if ws_start <= ws <= ws_end and n >= h.target_per_period
+            )
+            successful += successful_weeks
+            total += weeks_in_range
 
     score = (successful / total * 100.0) if total else 0.0 
 
-    return schemas.ConsistencyScoreResponse(
-        start_date=start_date,
-        end_date=end_date,
-        score=score,
-        successful_periods=successful,
-        total_periods=total,
-    )
-
-@router.get("/overview", response_model=schemas.StatsOverviewResponse)
-def stats_overview(
-    range: str = "30d",
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-    ):
-
-    today = get_today_for_user(current_user.timezone)
-    start_date, end_date = range_to_dates(range, today)
-
-    habits = db.query(models.Habit).filter(
-        models.Habit.user_id == current_user.id,
-        models.Habit.is_archived == False,
-        models.Habit.start_date <= end_date,
-    ).all()
-
-    habit_ids = [h.id for h in habits]
-    logs = db.query(models.HabitLog).filter(
-        models.HabitLog.user_id == current_user.id,
-        models.HabitLog.habit_id.in_(habit_ids),
-        models.HabitLog.date >= start_date,
-        models.HabitLog.date <= end_date,
-    ).all()
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "score": score,
+        "successful_periods": successful,
+        "total_periods": total,
+    }
 
-    logs_by_habit = {hid: [] for hid in habit_ids}
-    for log in logs:
-        logs_by_habit[log.habit_id].append(log)
-
-    total_checkins = len(logs)
+def _overview(habits, counts: Dict[int, PeriodCounts], streaks, start_date: date, end_date: date) -> Dict:
+    total_checkins = sum(counts[h.id].days for h in habits)
 
     habit_stats = []
     total_possible = 0
@@ -189,38 +99,28 @@ def stats_overview(
     days_in_range = (end_date - start_date).days + 1
 
     for h in habits:
-        h_logs = logs_by_habit.get(h.id, [])
-        log_dates = [l.date for l in h_logs]
+        c = counts[h.id]
+        current_streak, best_streak = streaks[h.id]
 
         if h.goal_type == "DAILY":
-            current_streak, best_streak = compute_streaks_for_daily(log_dates, today)
-            unique_days = len(set(log_dates))
+            unique_days = c.days
             possible = days_in_range
             completion_rate = unique_days / possible if possible else 0.0
 
             total_possible += possible
             total_completed += unique_days
 
-            habit_stats.append(schemas.HabitStats(
-                habit_id=h.id,
-                name=h.name,
-                goal_type=h.goal_type,
-                target_per_period=h.target_per_period,
-                completion_count=unique_days,
-                completion_rate=completion_rate,
-                current_streak=current_streak,
-                best_streak=best_streak,
-            ))
+            habit_stats.append({
+                "habit_id": h.id,
+                "name": h.name,
+                "goal_type": h.goal_type,
+                "target_per_period": h.target_per_period,
+                "completion_count": unique_days,
+                "completion_rate": completion_rate,
+                "current_streak": current_streak,
+                "best_streak": best_streak,
+            })
         elif h.goal_type == "X_PER_WEEK":
-            current_streak, best_streak = compute_streaks_for_x_per_week(
-                log_dates, today, h.target_per_period
-            )
-
-            counts: dict[date, int] = {}
-            for d in log_dates:
-                ws = week_start(d)
-                counts[ws] = counts.get(ws, 0) + 1
-            
             range_ws_end = week_start(end_date)
 
             effective_start = max(start_date, h.start_date)
@@ -229,8 +129,8 @@ def stats_overview(
             weeks_in_range = ((range_ws_end - eff_ws_start).days // 7) + 1 if eff_ws_start <= range_ws_end else 0
 
             successful_weeks = sum(
-                1 for ws, c in counts.items()
-                if ws >= eff_ws_start and ws <= range_ws_end and c >= h.target_per_period
+                1 for ws, n in c.weeks.items()
+                if ws >= eff_ws_start and ws <= range_ws_end and n >= h.target_per_period
             )
 
             completion_count = successful_weeks
@@ -239,25 +139,113 @@ def stats_overview(
             total_possible += weeks_in_range
             total_completed += successful_weeks
 
-            habit_stats.append(schemas.HabitStats(
-                habit_id=h.id,
-                name=h.name,
-                goal_type=h.goal_type,
-                target_per_period=h.target_per_period,
-                completion_count=completion_count,
-                completion_rate=0.0,
-                current_streak=current_streak,
-                best_streak=best_streak,
-            ))
+            habit_stats.append({
+                "habit_id": h.id,
+                "name": h.name,
+                "goal_type": h.goal_type,
+                "target_per_period": h.target_per_period,
+                "completion_count": completion_count,
+                "completion_rate": 0.0,
+                "current_streak": current_streak,
+                "best_streak": best_streak,
+            })
     
     overall_rate = (total_completed / total_possible) if total_possible else 0.0
 
-    return schemas.StatsOverviewResponse(
-        start_date=start_date,
-        end_date=end_date,
-        total_habits=len(habits),
-        active_habits=len(habits),
-        total_checkins=total_checkins,
-        overall_completion_rate=overall_rate,
-        habits=habit_stats
-    )
\ No newline at end of file
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "total_habits": len(habits),
+        "active_habits": len(habits),
+        "total_checkins": total_checkins,
+        "overall_completion_rate": overall_rate,
+        "habits": habit_stats,
+    }
+
+def _parse_parts(parts: str) -> Set[schemas.StatsPart]:
+    try:
+        return {schemas.StatsPart(p.strip()) for p in parts.split(",") if p.strip()}
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"parts must be a comma-separated subset of {', '.join(p.value for p in schemas.StatsPart)}",
+        )
+
+@router.get("/heatmap", response_model=schemas.HeatmapResponse, dependencies=[Depends(etag_guard)])
+@fast_json
+@cached_result("stats.heatmap")
+def heatmap(
+    range: str = Query("365d", pattern="^(7d|30d|90d|180d|365d)$"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    today = user_today(current_user.timezone)
+    start_date, end_date = range_to_dates(range, today)
+    return _heatmap(db, current_user.id, start_date, end_date)
+
+@router.get("/consistency", response_model=schemas.ConsistencyScoreResponse, dependencies=[Depends(etag_guard)])
+@fast_json
+@cached_result("stats.consistency")
+def consistency_score(
+    range: str = Query("30d", pattern="^(7d|30d|90d|180d|365d)$"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+): 
+    today = user_today(current_user.timezone)
+    start_date, end_date = range_to_dates(range, today)
+
+    habits = active_habits(db, current_user.id, end_date)
+    return _consistency(habits, period_counts(db, habits, start_date, end_date), start_date, end_date)
+
+@router.get("/overview", response_model=schemas.StatsOverviewResponse, dependencies=[Depends(etag_guard)])
+@fast_json
+@cached_result("stats.overview")
+def stats_overview(
+    range: str = "30d",
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+    ):
+
+    today = get_today_for_user(current_user.timezone)
+    start_date, end_date = range_to_dates(range, today)
+
+    habits = active_habits(db, current_user.id, end_date)
+    counts = period_counts(db, habits, start_date, end_date)
+    with timed_phase("streaks"):
+        streaks = get_streaks_for_habits(db, habits, today)
+    return _overview(habits, counts, streaks, start_date, end_date)
+
+@router.get("/bundle", response_model=schemas.StatsBundleResponse, response_model_exclude_none=True,
+            dependencies=[Depends(etag_guard)])
+@fast_json
+@cached_result("stats.bundle")
+def stats_bundle(
+    range: str = Query("30d", pattern="^(7d|30d|90d|180d|365d)$"),
+    parts: str = Query("overview,consistency,heatmap"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Any of overview, consistency and heatmap for one range in one request.
+    The habits and their per-period counts are loaded once and shared by the
+    overview and consistency parts; the heatmap reads the daily counts.
+    """
+    requested = _parse_parts(parts)
+    today = get_today_for_user(current_user.timezone)
+    start_date, end_date = range_to_dates(range, today)
+    bundle = {"start_date": start_date, "end_date": end_date}
+
+    if requested & {schemas.StatsPart.OVERVIEW, schemas.StatsPart.CONSISTENCY}:
+        habits = active_habits(db, current_user.id, end_date)
+        counts = period_counts(db, habits, start_date, end_date)
+        if schemas.StatsPart.OVERVIEW in requested:
+            with timed_phase("streaks"):
+                streaks = get_streaks_for_habits(db, habits, today)
+            bundle["overview"] = _overview(habits, counts, streaks, start_date, end_date)
+        if schemas.StatsPart.CONSISTENCY in requested:
+            bundle["consistency"] = _consistency(habits, counts, start_date, end_date)
+
+    if schemas.StatsPart.HEATMAP in requested:
+        bundle["heatmap"] = _heatmap(db, current_user.id, start_date, end_date)
+
+    return bundle
@@ -78,12 +78,35 @@ class HabitLogCreate(HabitLogBase):
 class HabitLogRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
-    id: int
+    # None for logs read back from a compacted month
+    id: Optional[int]
     habit_id: int
     user_id: int
     date: date
     value: int
-    created_at: datetime
+    created_at: Optional[datetime]
+
+class HabitLogBatchItem(HabitLogBase):
+    habit_id: int
+
+class HabitLogBatchCreate(BaseModel):
+    logs: List[HabitLogBatchItem] = Field(..., min_length=1, max_length=10000)
+
+class LogBatchStatus(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DUPLICATE = "duplicate"
+    HABIT_NOT_FOUND = "habit_not_found"
+
+class HabitLogBatchResult(BaseModel):
+    habit_id: int
+    date: date
+    status: LogBatchStatus
+
+class HabitLogBatchResponse(BaseModel):
+    created: int
+    updated: int
+    results: List[HabitLogBatchResult]
 
 class Token(BaseModel):
     access_token: str
@@ -140,4 +163,22 @@ class ConsistencyScoreResponse(BaseModel):
     end_date: date
     score: float
     successful_periods: int
-    total_periods: int
\ No newline at end of file
+    total_periods: int
+
+class StatsPart(str, Enum):
+    OVERVIEW = "overview"
+    CONSISTENCY = "consistency"
+    HEATMAP = "heatmap"
+
+class StatsBundleResponse(BaseModel):
+    start_date: date
+    end_date: date
+    overview: Optional[StatsOverviewResponse] = None
+    consistency: Optional[ConsistencyScoreResponse] = None
+    heatmap: Optional[HeatmapResponse] = None
+
+# -------------- EXPORT SCHEMAS --------------------
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
@@ -1,23 +1,14 @@
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
-from jose import JWTError, jwt
-from jose.exceptions import ExpiredSignatureError
-from passlib.context import CryptContext
 from pydantic import BaseModel, ConfigDict
-from app.passwordhash import Hash
+from app.passwordhash import Hash, HashingPoolBusy, admit
 
-# used to load the secret key from .env
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-if not SECRET_KEY:
-    raise RuntimeError("SECRET_KEY is not set. Define it in .env or env vars.")
-
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60*24
 
@@ -27,12 +18,58 @@ from fastapi.security import OAuth2PasswordBearer
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Configuration is read on first use rather than at import, so importing the
+# app stays cheap. create_app() calls secret_key() so a missing key still
+# fails at startup. python-jose is imported by the token functions below.
+
+@lru_cache(maxsize=None)
+def secret_key() -> str:
+    # used to load the secret key from .env
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    key = os.getenv("SECRET_KEY")
+    if not key:
+        raise RuntimeError("SECRET_KEY is not set. Define it in .env or env vars.")
+    return key
+
 def get_password_hash(password: str) -> str:
     return Hash.bcrypt(password)
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
     return Hash.verify(plain_password, password_hash)
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests, try again shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+@contextmanager
+def hashing_admission():
+    """
+    Admit a request that will hash or verify a password, or fail fast with
+    503 before any DB work when the hashing queue is already full.
+    """
+    try:
+        with admit():
+            yield
+    except HashingPoolBusy:
+        raise _hashing_busy()
+
+async def get_password_hash_async(password: str) -> str:
+    try:
+        return await Hash.bcrypt_async(password)
+    except HashingPoolBusy:
+        raise _hashing_busy()
+
+async def verify_password_async(plain_password: str, password_hash: str) -> bool:
+    try:
+        return await Hash.verify_async(plain_password, password_hash)
+    except HashingPoolBusy:
+        raise _hashing_busy()
+
 class TokenPayload(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -43,14 +80,19 @@ def create_access_token(user_id: int, expires_delta: Optional[timedelta] = None)
     if expires_delta is None:
         expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
+    from jose import jwt
+
     expire = datetime.now(timezone.utc) + expires_delta
     payload = {"sub": str(user_id), "exp": int(expire.timestamp())}
-    token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    token = jwt.encode(payload, secret_key(), algorithm=ALGORITHM)
     return token
     
 def decode_access_token(token: str = Depends(oauth2_scheme)) -> TokenPayload:
+    from jose import JWTError, jwt
+    from jose.exceptions import ExpiredSignatureError
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, secret_key(), algorithms=[ALGORITHM])
         token_data = TokenPayload(**payload)
         return token_data
     except ExpiredSignatureError:
@@ -0,0 +1,79 @@
+import os
+from datetime import date
+from typing import Dict, Iterable
+
+from sqlalchemy.orm import Session
+
+from app.queries import daily_log_counts, weekly_log_counts
+from app.services.bitmaps import count_days, load_bitmaps, week_counts
+from app.services.daily_counts import get_daily_counts
+
+# The per-day and per-week counts behind the stats endpoints, from one of
+# two sources:
+#
+#   bitmap  the stored rollups: user_daily_counts for the heatmap and each
+#           habit's day bitmap for the per-habit counts
+#   sql     GROUP BY date / GROUP BY habit_id, week_start(date) over
+#           habit_logs, so only one row per day or habit-week is transferred
+#           and nothing depends on the rollups being current
+#
+# Both return the same values; tests cross-check them.
+
+STATS_AGGREGATION = os.getenv("STATS_AGGREGATION", "bitmap")
+
+
+class PeriodCounts:
+    """
+    A habit's logged days in a range: in total, on or after its start_date,
+    and per Monday-start week (weeks without logs are left out).
+    """
+    __slots__ = ("days", "days_since_start", "weeks")
+
+    def __init__(self, days: int = 0, days_since_start: int = 0, weeks: Dict[date, int] = None):
+        self.days = days
+        self.days_since_start = days_since_start
+        self.weeks = weeks if weeks is not None else {}
+
+    def __eq__(self, other):
+        return (self.days, self.days_since_start, self.weeks) == (other.days, other.days_since_start, other.weeks)
+
+    def __repr__(self):
+        return f"PeriodCounts(days={self.days}, days_since_start={self.days_since_start}, weeks={self.weeks})"
+
+
+def bitmap_period_counts(habits: Iterable, bitmaps, start_date: date, end_date: date) -> Dict[int, PeriodCounts]:
+    return {
+        h.id: PeriodCounts(
+            count_days(bitmaps[h.id], start_date, end_date),
+            count_days(bitmaps[h.id], max(start_date, h.start_date), end_date),
+            week_counts(bitmaps[h.id], start_date, end_date),
+        )
+        for h in habits
+    }
+
+
+def sql_period_counts(db: Session, habits: Iterable, start_date: date, end_date: date) -> Dict[int, PeriodCounts]:
+    counts = {h.id: PeriodCounts() for h in habits}
+    for row in weekly_log_counts(db, list(counts), start_date, end_date):
+        c = counts[row.habit_id]
+        c.days += row.days
+        c.days_since_start += row.days_since_start
+        # a week is keyed by its Monday even when the range starts mid-week
+        c.weeks[row.week] = row.days
+    return counts
+
+
+def period_counts(db: Session, habits: Iterable, start_date: date, end_date: date) -> Dict[int, PeriodCounts]:
+    habits = list(habits)
+    if STATS_AGGREGATION == "sql":
+        return sql_period_counts(db, habits, start_date, end_date)
+    return bitmap_period_counts(habits, load_bitmaps(db, habits), start_date, end_date)
+
+
+def day_counts(db: Session, user_id: int, start_date: date, end_date: date) -> Dict[date, int]:
+    """
+    {day: logs across the user's habits} for days in [start_date, end_date] with any.
+    """
+    if STATS_AGGREGATION == "sql":
+        return daily_log_counts(db, user_id, start_date, end_date)
+    return get_daily_counts(db, user_id, start_date, end_date)
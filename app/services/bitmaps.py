@@ -0,0 +1,140 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.queries import bitmap_rows, log_dates
+
+# Each habit's completion history is kept as one bit per day: bit i is set
+# when there is a log for `origin + i days`. Bits are stored little-endian in
+# habit_bitmaps.bits, so a ten year daily habit is about 460 bytes and reads
+# back as a single row. In Python the bitmap is handled as an int, which
+# gives popcount (int.bit_count) and shifts over the whole history.
+
+Bitmap = Tuple[date, int]
+
+_IN_CHUNK = 500
+
+def _to_bytes(bits: int) -> bytes:
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+def _from_bytes(raw: bytes) -> int:
+    return int.from_bytes(raw or b"", "little")
+
+def count_days(bitmap: Bitmap, start_date: date, end_date: date) -> int:
+    """
+    Number of logged days in [start_date, end_date].
+    """
+    origin, bits = bitmap
+    lo = max((start_date - origin).days, 0)
+    hi = (end_date - origin).days
+    if hi < lo:
+        return 0
+    return ((bits >> lo) & ((1 << (hi - lo + 1)) - 1)).bit_count()
+
+def week_counts(bitmap: Bitmap, start_date: date, end_date: date) -> Dict[date, int]:
+    """
+    Logged days per Monday-start week, counting only days in [start_date, end_date].
+    """
+    counts: Dict[date, int] = {}
+    ws = start_date - timedelta(days=start_date.weekday())
+    while ws <= end_date:
+        c = count_days(bitmap, max(ws, start_date), min(ws + timedelta(days=6), end_date))
+        if c:
+            counts[ws] = c
+        ws += timedelta(days=7)
+    return counts
+
+def _build(habit: models.Habit, log_dates: Iterable[date]) -> Bitmap:
+    log_dates = list(log_dates)
+    origin = min([habit.start_date, *log_dates])
+    bits = 0
+    for d in log_dates:
+        bits |= 1 << (d - origin).days
+    return origin, bits
+
+def rebuild_bitmaps(db: Session, habits: Iterable[models.Habit]) -> Dict[int, Bitmap]:
+    habits = list(habits)
+    habit_ids = [h.id for h in habits]
+
+    dates_by_habit: Dict[int, List[date]] = {hid: [] for hid in habit_ids}
+    for row in log_dates(db, habit_ids):
+        dates_by_habit[row.habit_id].append(row.date)
+
+    existing: Dict[int, models.HabitBitmap] = {}
+    for i in range(0, len(habit_ids), _IN_CHUNK):
+        chunk = habit_ids[i:i + _IN_CHUNK]
+        existing.update(
+            (b.habit_id, b)
+            for b in db.query(models.HabitBitmap).filter(models.HabitBitmap.habit_id.in_(chunk))
+        )
+
+    result: Dict[int, Bitmap] = {}
+    for habit in habits:
+        origin, bits = _build(habit, dates_by_habit[habit.id])
+        row = existing.get(habit.id)
+        if row is None:
+            row = models.HabitBitmap(habit_id=habit.id, user_id=habit.user_id)
+            db.add(row)
+        row.origin = origin
+        row.bits = _to_bytes(bits)
+        result[habit.id] = (origin, bits)
+
+    db.flush()
+    return result
+
+def set_day(db: Session, habit: models.Habit, day: date) -> None:
+    """
+    Mark `day` as logged in the habit's bitmap. The log must already be flushed.
+    """
+    row = db.get(models.HabitBitmap, habit.id)
+    if row is None:
+        rebuild_bitmaps(db, [habit])
+        return
+
+    bits = _from_bytes(row.bits)
+    if day < row.origin:
+        bits <<= (row.origin - day).days
+        row.origin = day
+    row.bits = _to_bytes(bits | (1 << (day - row.origin).days))
+    db.flush()
+
+def load_bitmaps(db: Session, habits: Iterable[models.Habit]) -> Dict[int, Bitmap]:
+    """
+    Return {habit_id: (origin, bits)}. Habits without a stored bitmap are
+    built from their logs and committed.
+    """
+    habits = list(habits)
+    result: Dict[int, Bitmap] = {
+        row.habit_id: (row.origin, _from_bytes(row.bits))
+        for row in bitmap_rows(db, [h.id for h in habits])
+    }
+
+    missing = [h for h in habits if h.id not in result]
+    if missing:
+        try:
+            result.update(rebuild_bitmaps(db, missing))
+            db.commit()
+        except IntegrityError:
+            # a concurrent request built the same bitmaps first
+            db.rollback()
+            return load_bitmaps(db, habits)
+    return result
+
+def rebuild_all_bitmaps(db: Session, user_id: int | None = None, batch_size: int = 500) -> int:
+    count = 0
+    last_id = 0
+    while True:
+        q = db.query(models.Habit).filter(models.Habit.id > last_id)
+        if user_id is not None:
+            q = q.filter(models.Habit.user_id == user_id)
+        habits = q.order_by(models.Habit.id).limit(batch_size).all()
+        if not habits:
+            return count
+
+        rebuild_bitmaps(db, habits)
+        last_id = habits[-1].id
+        count += len(habits)
+        db.commit()
@@ -0,0 +1,193 @@
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import dialect_insert
+from app.queries import HABIT_SUMMARY, compacted_logs, daily_log_counts, log_dates
+from app.services.aggregates import sql_period_counts
+from app.services.data_version import bump_data_version
+from app.services.streaks import compute_streaks_sql
+
+# Cold-log compaction. Logs in months that ended before the horizon are
+# folded into habit_log_months, one row per habit and month holding a day
+# bitmap and the number of days logged, and deleted from habit_logs. The
+# raw table then holds at most a horizon's worth of rows per habit, and the
+# read paths merge the folded days back in (app.queries.log_days).
+#
+# What is kept: that the day was logged. Logs that carry a value other than
+# the default stay in habit_logs so the log listing and the export return it
+# unchanged; folded logs come back with the default value and without their
+# id and created_at.
+#
+# `python -m app.cli compact-logs --verify` computes each user's analytics
+# before and after folding their logs and rolls the user back (and stops)
+# on any difference.
+
+COMPACTION_HORIZON_DAYS = int(os.getenv("COMPACTION_HORIZON_DAYS", "365"))
+COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", "1000"))
+
+
+class CompactionMismatch(Exception):
+    def __init__(self, user_id: int, differences: List[str]):
+        super().__init__(f"compaction changed analytics for user {user_id}: {', '.join(differences)}")
+        self.user_id = user_id
+        self.differences = differences
+
+
+def compaction_cutoff(today: date, horizon_days: int = COMPACTION_HORIZON_DAYS) -> date:
+    """
+    The first day of the month that contains today - horizon_days; logs
+    dated before it are compacted. At least a day back, so a user's today
+    (in any time zone) is never compacted.
+    """
+    return (today - timedelta(days=max(horizon_days, 1))).replace(day=1)
+
+
+def compact_user(db: Session, user_id: int, cutoff: date, batch_size: int = COMPACTION_BATCH_SIZE) -> int:
+    """
+    Fold the user's default-value logs dated before `cutoff` into
+    habit_log_months. Does not commit. Returns the number of logs folded.
+    """
+    logs = models.HabitLog
+    months = models.HabitLogMonth
+    rows = db.execute(
+        select(logs.id, logs.habit_id, logs.date).where(
+            logs.user_id == user_id,
+            logs.date < cutoff,
+            logs.value == 1,
+        )
+    ).all()
+    if not rows:
+        return 0
+
+    bits: Dict[Tuple[int, date], int] = defaultdict(int)
+    for row in rows:
+        bits[(row.habit_id, row.date.replace(day=1))] |= 1 << (row.date.day - 1)
+    # months compacted by an earlier run keep their days
+    for row in db.execute(
+        select(months.habit_id, months.month, months.days).where(months.user_id == user_id, months.month < cutoff)
+    ):
+        if (row.habit_id, row.month) in bits:
+            bits[(row.habit_id, row.month)] |= row.days
+
+    table = months.__table__
+    values = [
+        {"habit_id": habit_id, "month": month, "user_id": user_id, "days": days, "count": bin(days).count("1")}
+        for (habit_id, month), days in bits.items()
+    ]
+    for i in range(0, len(values), batch_size):
+        stmt = dialect_insert(db, table).values(values[i:i + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.habit_id, table.c.month],
+            set_={"days": stmt.excluded.days, "count": stmt.excluded.count},
+        )
+        db.execute(stmt)
+
+    ids = [row.id for row in rows]
+    for i in range(0, len(ids), batch_size):
+        db.execute(delete(logs).where(logs.id.in_(ids[i:i + batch_size])).execution_options(synchronize_session=False))
+    # log listings lose the folded ids, so cached responses and ETags must move on
+    bump_data_version(db, user_id)
+    return len(rows)
+
+
+def uncompact_days(db: Session, user_id: int, keys: List[Tuple[int, date]]) -> Set[Tuple[int, date]]:
+    """
+    Clear the (habit_id, date) keys from habit_log_months, for a write that
+    is about to store them in habit_logs, so no day is in both. Returns the
+    keys that were compacted. Flushes, so later Core reads of the months
+    no longer see the days, but does not commit.
+    """
+    wanted = {(habit_id, day.replace(day=1)) for habit_id, day in keys}
+    months = {
+        (m.habit_id, m.month): m
+        for m in db.query(models.HabitLogMonth).filter(
+            models.HabitLogMonth.user_id == user_id,
+            tuple_(models.HabitLogMonth.habit_id, models.HabitLogMonth.month).in_(wanted),
+        )
+    }
+    found = set()
+    for habit_id, day in keys:
+        m = months.get((habit_id, day.replace(day=1)))
+        bit = 1 << (day.day - 1)
+        if m is not None and m.days & bit:
+            m.days &= ~bit
+            m.count -= 1
+            found.add((habit_id, day))
+    for m in months.values():
+        if not m.days:
+            db.delete(m)
+    db.flush()
+    return found
+
+
+def analytics_fingerprint(db: Session, user_id: int, today: date) -> dict:
+    """
+    Everything the read paths derive from a user's logs, over their whole
+    history: the logged days, streaks, per-habit and per-day counts and the
+    exported log rows.
+    """
+    habits = db.execute(
+        select(*HABIT_SUMMARY).where(models.Habit.user_id == user_id).order_by(models.Habit.id)
+    ).all()
+    days = sorted((row.habit_id, row.date) for row in log_dates(db, [h.id for h in habits]))
+    start = min([today, *(d for _, d in days), *(h.start_date for h in habits)])
+    end = max([today, *(d for _, d in days)])
+    exported = compacted_logs(user_id=user_id).subquery()
+    return {
+        "days": days,
+        "streaks": compute_streaks_sql(db, habits, today),
+        "period_counts": sql_period_counts(db, habits, start, end),
+        "day_counts": daily_log_counts(db, user_id, start, end),
+        "values": sorted(
+            [tuple(row) for row in db.execute(
+                select(models.HabitLog.habit_id, models.HabitLog.date, models.HabitLog.value)
+                .where(models.HabitLog.user_id == user_id)
+            )]
+            + [tuple(row) for row in db.execute(select(exported.c.habit_id, exported.c.date, exported.c.value))]
+        ),
+    }
+
+
+def compact_logs(
+    db: Session,
+    today: date,
+    horizon_days: int = COMPACTION_HORIZON_DAYS,
+    user_id: Optional[int] = None,
+    verify: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Compact every user's cold logs (or one user's), committing per user.
+    With `verify`, raises CompactionMismatch for the first user whose
+    analytics change, after rolling that user back; with `dry_run`, every
+    user is rolled back.
+    """
+    cutoff = compaction_cutoff(today, horizon_days)
+    users = select(models.HabitLog.user_id).where(models.HabitLog.date < cutoff).distinct()
+    if user_id is not None:
+        users = users.where(models.HabitLog.user_id == user_id)
+
+    result = {"users": 0, "logs": 0}
+    for uid in db.execute(users.order_by(models.HabitLog.user_id)).scalars().all():
+        before = analytics_fingerprint(db, uid, today) if verify else None
+        folded = compact_user(db, uid, cutoff)
+        if verify:
+            db.flush()
+            after = analytics_fingerprint(db, uid, today)
+            differences = [key for key in before if before[key] != after[key]]
+            if differences:
+                db.rollback()
+                raise CompactionMismatch(uid, differences)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        result["users"] += 1
+        result["logs"] += folded
+    return result
@@ -0,0 +1,63 @@
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import dialect_insert
+from app.queries import log_days
+
+# user_daily_counts holds one row per (user, day) with the number of habit
+# logs on that day, so per-day aggregates read at most one narrow row per day
+# instead of every log.
+
+def increment_daily_count(db: Session, user_id: int, day: date, delta: int = 1) -> None:
+    table = models.UserDailyCount.__table__
+    stmt = dialect_insert(db, table).values(user_id=user_id, date=day, count=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.date],
+        set_={"count": table.c.count + delta},
+    )
+    db.execute(stmt)
+
+def increment_daily_counts(db: Session, user_id: int, deltas: Dict[date, int]) -> None:
+    if not deltas:
+        return
+    table = models.UserDailyCount.__table__
+    stmt = dialect_insert(db, table).values(
+        [{"user_id": user_id, "date": day, "count": delta} for day, delta in deltas.items()]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.date],
+        set_={"count": table.c.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+
+def get_daily_counts(db: Session, user_id: int, start_date: date, end_date: date) -> Dict[date, int]:
+    rows = db.execute(
+        select(models.UserDailyCount.date, models.UserDailyCount.count).where(
+            models.UserDailyCount.user_id == user_id,
+            models.UserDailyCount.date >= start_date,
+            models.UserDailyCount.date <= end_date,
+        )
+    )
+    return {row.date: row.count for row in rows}
+
+def rebuild_daily_counts(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recompute the rollup from the logged days with a single INSERT ... SELECT.
+    Returns the number of rollup rows written.
+    """
+    counts = models.UserDailyCount.__table__
+    logs = log_days(db, user_id=user_id)
+
+    clear = delete(counts)
+    source = select(logs.c.user_id, logs.c.date, func.count()).group_by(logs.c.user_id, logs.c.date)
+    if user_id is not None:
+        clear = clear.where(counts.c.user_id == user_id)
+
+    db.execute(clear)
+    result = db.execute(insert(counts).from_select(["user_id", "date", "count"], source))
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import os
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic_core import from_json, to_json
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.db import SessionLocal, dialect_insert
+from app.fastjson import as_dicts
+from app.lazy import lazy_import
+from app.queries import HABIT_READ, active_habits_for_users, log_dates
+from app.services.streaks import _week_start, latest_runs_batch
+from app.services.time import user_zone
+
+np = lazy_import("numpy")
+
+# dashboard_snapshots holds, per user, everything /dashboard/today needs that
+# does not depend on today's logs: the active habits and, for each, the
+# streak as it stood at the end of yesterday (and this week's logs so far for
+# X_PER_WEEK habits). The endpoint reads the snapshot, looks up which habits
+# have a log today and finishes the streaks from that, in two small queries.
+#
+# A snapshot is valid for one local date and one users.data_version. Writes
+# that only add logs dated today move the snapshot to the new version with
+# them (advance_snapshot); any other write leaves it behind, and the
+# endpoint falls back to computing the dashboard from scratch.
+#
+# Snapshots are built shortly after each time zone's local midnight by
+# DashboardPrecomputer, an asyncio task started with the app when
+# DASHBOARD_PRECOMPUTE=1, or on demand by
+# `python -m app.cli precompute-dashboards`. Every worker that enables the
+# scheduler does the full precompute, so enable it on one.
+
+DASHBOARD_PRECOMPUTE = os.getenv("DASHBOARD_PRECOMPUTE", "0") == "1"
+PRECOMPUTE_DELAY = timedelta(minutes=float(os.getenv("DASHBOARD_PRECOMPUTE_DELAY_MINUTES", "5")))
+PRECOMPUTE_BATCH_SIZE = int(os.getenv("DASHBOARD_PRECOMPUTE_BATCH_SIZE", "500"))
+PRECOMPUTE_POLL_SECONDS = float(os.getenv("DASHBOARD_PRECOMPUTE_POLL_SECONDS", "900"))
+
+logger = logging.getLogger("app.precompute")
+
+
+# ---------------- building ----------------
+
+def build_snapshots(db: Session, user_ids: List[int], today: date) -> int:
+    """
+    Write the snapshots for `today` of the given users, with one query each
+    for their versions, habits and logs. Does not commit.
+    """
+    if not user_ids:
+        return 0
+    yesterday = today - timedelta(days=1)
+    this_week = _week_start(today)
+
+    # read the versions before the data, so a write that lands in between
+    # leaves the snapshot stale instead of stamping old data as current
+    versions = dict(db.execute(
+        select(models.User.id, models.User.data_version).where(models.User.id.in_(user_ids))
+    ).all())
+    habits = active_habits_for_users(db, list(versions), today, HABIT_READ)
+
+    weekly_targets = {h.id: h.target_per_period for h in habits if h.goal_type == "X_PER_WEEK"}
+    streak_ids = [h.id for h in habits if h.goal_type in ("DAILY", "X_PER_WEEK")]
+    habit_ids, ordinals = [], []
+    week_counts: Counter = Counter()
+    for row in log_dates(db, streak_ids, until=yesterday):
+        if row.habit_id in weekly_targets and row.date >= this_week:
+            # this week is still open; its logs so far are kept as a count
+            week_counts[row.habit_id] += 1
+        else:
+            habit_ids.append(row.habit_id)
+            ordinals.append(row.date.toordinal())
+    runs = latest_runs_batch(
+        np.array(habit_ids, dtype=np.int64), np.array(ordinals, dtype=np.int64), weekly_targets
+    )
+
+    entries: Dict[int, List[dict]] = {user_id: [] for user_id in versions}
+    for habit, habit_read in zip(habits, as_dicts(habits, schemas.HabitRead)):
+        length, best, last_day = runs.get(habit.id, (0, 0, None))
+        # only a run that reaches yesterday (last week for weekly habits) can continue today
+        run_end = this_week - timedelta(days=1) if habit.id in weekly_targets else yesterday
+        entries[habit.user_id].append({
+            "habit": habit_read,
+            "goal_type": habit.goal_type,
+            "target_per_period": habit.target_per_period,
+            "run": length if last_day == run_end else 0,
+            "best": best,
+            "week_count": week_counts[habit.id],
+        })
+
+    table = models.DashboardSnapshot.__table__
+    stmt = dialect_insert(db, table).values([
+        {"user_id": user_id, "date": today, "data_version": versions[user_id], "payload": to_json(items)}
+        for user_id, items in entries.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={
+            "date": stmt.excluded.date,
+            "data_version": stmt.excluded.data_version,
+            "payload": stmt.excluded.payload,
+        },
+    )
+    db.execute(stmt)
+    return len(entries)
+
+
+def zone_groups(timezones: Iterable[Optional[str]]) -> Dict[str, List[Optional[str]]]:
+    """
+    Group users.timezone values by the zone they resolve to.
+    """
+    groups: Dict[str, List[Optional[str]]] = {}
+    for tz in timezones:
+        groups.setdefault(user_zone(tz).key, []).append(tz)
+    return groups
+
+
+def precompute_zone(db: Session, timezones: List[Optional[str]], today: date,
+                    batch_size: int = PRECOMPUTE_BATCH_SIZE) -> int:
+    """
+    Build today's snapshots for every user whose timezone is in `timezones`,
+    committing each batch. Returns the number of users.
+    """
+    names = [tz for tz in timezones if tz is not None]
+    condition = models.User.timezone.in_(names)
+    if None in timezones:
+        condition = condition | models.User.timezone.is_(None)
+    user_ids = db.execute(select(models.User.id).where(condition).order_by(models.User.id)).scalars().all()
+    for i in range(0, len(user_ids), batch_size):
+        build_snapshots(db, user_ids[i:i + batch_size], today)
+        db.commit()
+    return len(user_ids)
+
+
+def precompute_all(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Build every user's snapshot for their current local date.
+    """
+    now = now or datetime.now(timezone.utc)
+    zones = zone_groups(db.execute(select(models.User.timezone).distinct()).scalars())
+    return {
+        key: precompute_zone(db, timezones, now.astimezone(user_zone(key)).date())
+        for key, timezones in zones.items()
+    }
+
+
+# ---------------- serving ----------------
+
+def advance_snapshot(db: Session, user_id: int, day: date) -> None:
+    """
+    Call before bump_data_version for a write whose only effect on the
+    dashboard is new logs dated `day`, the user's today. A snapshot that is
+    current for `day` moves to the version the bump produces.
+    """
+    db.execute(
+        update(models.DashboardSnapshot)
+        .where(
+            models.DashboardSnapshot.user_id == user_id,
+            models.DashboardSnapshot.date == day,
+            models.DashboardSnapshot.data_version == (
+                select(models.User.data_version).where(models.User.id == user_id).scalar_subquery()
+            ),
+        )
+        .values(data_version=models.DashboardSnapshot.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def load_snapshot(db: Session, user_id: int, today: date) -> Optional[List[dict]]:
+    payload = db.execute(
+        select(models.DashboardSnapshot.payload)
+        .join(models.User, models.User.id == models.DashboardSnapshot.user_id)
+        .where(
+            models.DashboardSnapshot.user_id == user_id,
+            models.DashboardSnapshot.date == today,
+            models.DashboardSnapshot.data_version == models.User.data_version,
+        )
+    ).scalar_one_or_none()
+    return None if payload is None else from_json(payload)
+
+
+def _streaks(entry: dict, completed: bool):
+    if entry["goal_type"] == "DAILY":
+        current = entry["run"] + 1 if completed else 0
+    elif entry["goal_type"] == "X_PER_WEEK" and entry["target_per_period"] > 0:
+        this_week_done = entry["week_count"] + completed >= entry["target_per_period"]
+        current = entry["run"] + 1 if this_week_done else entry["run"]
+    else:
+        return 0, 0
+    return current, max(entry["best"], current)
+
+
+def dashboard_items(entries: List[dict], completed_ids: Set[int]) -> List[dict]:
+    """
+    The dashboard's habit items from a snapshot and the ids of the habits
+    logged today.
+    """
+    items = []
+    for entry in entries:
+        completed = entry["habit"]["id"] in completed_ids
+        current_streak, best_streak = _streaks(entry, completed)
+        items.append({
+            "habit": entry["habit"],
+            "is_completed": completed,
+            "current_streak": current_streak,
+            "best_streak": best_streak,
+        })
+    return items
+
+
+# ---------------- scheduling ----------------
+
+class DashboardPrecomputer:
+    """
+    Builds each zone's snapshots once per local day, `delay` after its
+    midnight, then sleeps until the next zone is due (or `poll_seconds`, so
+    zones of new users are picked up).
+    """
+
+    def __init__(self, session_factory=SessionLocal, delay: timedelta = PRECOMPUTE_DELAY,
+                 poll_seconds: float = PRECOMPUTE_POLL_SECONDS):
+        self.session_factory = session_factory
+        self.delay = delay
+        self.poll_seconds = poll_seconds
+        self.zones: Dict[str, List[Optional[str]]] = {}
+        self.done: Dict[str, date] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def due(self, now: datetime) -> Dict[str, date]:
+        """
+        {zone: local date} for zones past midnight + delay and not yet built today.
+        """
+        due = {}
+        for key in self.zones:
+            local = now.astimezone(user_zone(key))
+            midnight = datetime.combine(local.date(), time(), tzinfo=local.tzinfo)
+            if self.done.get(key) != local.date() and now - midnight >= self.delay:
+                due[key] = local.date()
+        return due
+
+    def seconds_until_next(self, now: datetime) -> float:
+        wait = self.poll_seconds
+        for key in self.zones:
+            local = now.astimezone(user_zone(key))
+            day = local.date() + timedelta(days=1) if self.done.get(key) == local.date() else local.date()
+            next_run = datetime.combine(day, time(), tzinfo=local.tzinfo) + self.delay
+            wait = min(wait, (next_run - now).total_seconds())
+        return max(wait, 1.0)
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        now = now or datetime.now(timezone.utc)
+        built = {}
+        with self.session_factory() as db:
+            self.zones = zone_groups(db.execute(select(models.User.timezone).distinct()).scalars())
+            for key, today in self.due(now).items():
+                built[key] = precompute_zone(db, self.zones[key], today)
+                self.done[key] = today
+        if built:
+            logger.info("precomputed dashboards: %s", built)
+        return built
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self.run_once)
+            except Exception:
+                logger.exception("dashboard precompute failed")
+            await asyncio.sleep(self.seconds_until_next(datetime.now(timezone.utc)))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
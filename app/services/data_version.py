@@ -0,0 +1,22 @@
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app import models
+
+# users.data_version changes whenever any of a user's habits, logs or profile
+# fields change. Call bump_data_version in the same transaction as the write.
+
+def bump_data_version(db: Session, user_id: int) -> None:
+    # the result cache keys on the version, so this only frees the old entries
+    from app.services.result_cache import result_cache
+
+    db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(data_version=models.User.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    result_cache.invalidate_user(user_id)
+
+def get_data_version(db: Session, user_id: int) -> int:
+    return db.execute(select(models.User.data_version).where(models.User.id == user_id)).scalar_one()
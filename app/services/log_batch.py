@@ -0,0 +1,110 @@
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.db import dialect_insert
+from app.services.bitmaps import rebuild_bitmaps
+from app.services.compaction import uncompact_days
+from app.services.daily_counts import increment_daily_counts
+from app.services.dashboard_snapshot import advance_snapshot
+from app.services.data_version import bump_data_version
+from app.services.streak_state import rebuild_streak_states
+
+# Bulk log writes for backfills and offline sync. Entries are upserted on
+# uq_user_habit_date a chunk at a time; each chunk commits together with the
+# rollup, streak state and bitmaps it affects, so a failure part-way leaves
+# earlier chunks fully applied and consistent.
+
+CHUNK_SIZE = 1000
+
+Status = schemas.LogBatchStatus
+
+
+def _upsert_chunk(
+    db: Session,
+    user_id: int,
+    habits: Dict[int, models.Habit],
+    entries: List[schemas.HabitLogBatchItem],
+    today: Optional[date] = None,
+) -> List[Status]:
+    keys = [(e.habit_id, e.date) for e in entries]
+    existing = {
+        tuple(row)
+        for row in db.execute(
+            select(models.HabitLog.habit_id, models.HabitLog.date).where(
+                models.HabitLog.user_id == user_id,
+                tuple_(models.HabitLog.habit_id, models.HabitLog.date).in_(keys),
+            )
+        )
+    }
+    # a day folded into habit_log_months is already logged; it moves back to
+    # habit_logs with the new value
+    existing |= uncompact_days(db, user_id, keys)
+
+    table = models.HabitLog.__table__
+    stmt = dialect_insert(db, table).values(
+        [{"habit_id": e.habit_id, "user_id": user_id, "date": e.date, "value": e.value} for e in entries]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.habit_id, table.c.date],
+        set_={"value": stmt.excluded.value},
+    )
+    db.execute(stmt)
+
+    created = [key for key in keys if key not in existing]
+    if created:
+        increment_daily_counts(db, user_id, Counter(day for _, day in created))
+        touched = [habits[habit_id] for habit_id in {habit_id for habit_id, _ in created}]
+        rebuild_streak_states(db, touched)
+        rebuild_bitmaps(db, touched)
+    # the dashboard ignores values, so only new logs before today outdate its snapshot
+    if today is not None and all(day == today for _, day in created):
+        advance_snapshot(db, user_id, today)
+    bump_data_version(db, user_id)
+    db.commit()
+    return [Status.UPDATED if key in existing else Status.CREATED for key in keys]
+
+
+def upsert_logs(
+    db: Session,
+    user_id: int,
+    entries: Sequence[schemas.HabitLogBatchItem],
+    chunk_size: int = CHUNK_SIZE,
+    today: Optional[date] = None,
+) -> List[Status]:
+    """
+    Write `entries` for `user_id` and return one status per entry, in order.
+    When the same (habit, date) appears more than once the last entry wins
+    and the earlier ones are reported as duplicates. `today` is the user's
+    local date, which lets chunks that only log today keep the dashboard
+    snapshot current.
+    """
+    habit_ids = {e.habit_id for e in entries}
+    habits = {
+        h.id: h
+        for h in db.query(models.Habit).filter(
+            models.Habit.user_id == user_id,
+            models.Habit.id.in_(habit_ids),
+        )
+    }
+
+    statuses: List[Status] = [Status.HABIT_NOT_FOUND] * len(entries)
+    latest: Dict[Tuple[int, date], int] = {}
+    for i, e in enumerate(entries):
+        if e.habit_id not in habits:
+            continue
+        key = (e.habit_id, e.date)
+        if key in latest:
+            statuses[latest[key]] = Status.DUPLICATE
+        latest[key] = i
+
+    accepted = sorted(latest.values())
+    for start in range(0, len(accepted), chunk_size):
+        chunk = accepted[start:start + chunk_size]
+        for i, status in zip(chunk, _upsert_chunk(db, user_id, habits, [entries[i] for i in chunk], today)):
+            statuses[i] = status
+    return statuses
@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app import models
+from app.security import TokenPayload
+
+# Caches the decoded JWT payload and a detached snapshot of the user row per
+# bearer token, so repeat requests skip both the signature check and the
+# users lookup. Entries live for at most PRINCIPAL_CACHE_TTL seconds (and
+# never past the token's own expiry); PATCH /auth/me drops the user's
+# entries in this process. Other workers pick up changes when their entries
+# expire. PRINCIPAL_CACHE_TTL=0 disables the cache.
+
+Principal = Tuple[TokenPayload, models.User]
+
+
+def _snapshot(user: models.User) -> models.User:
+    """
+    Copy the loaded column values into a new, session-less User so the cached
+    object never triggers lazy loads or gets mutated through a session.
+    """
+    return models.User(**{c.key: getattr(user, c.key) for c in models.User.__table__.columns})
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, TokenPayload, models.User]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload, user = entry
+            if expires_at <= time.monotonic() or payload.exp <= time.time():
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return payload, user
+
+    def put(self, token: str, payload: TokenPayload, user: models.User) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + min(self.ttl, max(payload.exp - time.time(), 0))
+        with self._lock:
+            self._entries[token] = (expires_at, payload, _snapshot(user))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in [t for t, (_, payload, _) in self._entries.items() if payload.sub == user_id]:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+principal_cache = PrincipalCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60")),
+)
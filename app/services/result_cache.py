@@ -0,0 +1,221 @@
+import functools
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, time as dt_time, timedelta
+from typing import Dict, Optional, Set, Tuple
+
+from app.fastjson import RawJSON, dumps
+from app.services.data_version import get_data_version
+from app.services.time import get_today_for_user, user_zone
+
+# Caches the JSON of computed dashboard/stats responses. Keys include the
+# user's data_version and local date, so a write or local midnight makes old
+# entries unreachable; entries also expire at the user's next local midnight
+# and bump_data_version drops the user's entries to reclaim space.
+#
+# RESULT_CACHE_BACKEND picks "memory" (per-process LRU, the default),
+# "sqlite" (a file at RESULT_CACHE_PATH shared by all workers on a host) or
+# "none".
+
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "result-cache.db")
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+class MemoryBackend:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, int, bytes]]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, key: str) -> None:
+        _, user_id, value = self._entries.pop(key)
+        self._bytes -= len(value)
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key: str, user_id: int, value: bytes, expires_at: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires_at, user_id, value)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._bytes = 0
+
+    def size(self) -> Tuple[int, int]:
+        with self._lock:
+            return len(self._entries), self._bytes
+
+
+class SQLiteBackend:
+    PURGE_EVERY = 256
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            " key TEXT PRIMARY KEY, user_id INTEGER NOT NULL, expires_at REAL NOT NULL, value BLOB NOT NULL)"
+        )
+        self._conn().execute("CREATE INDEX IF NOT EXISTS ix_result_cache_user ON result_cache (user_id)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value FROM result_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, user_id: int, value: bytes, expires_at: float) -> None:
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO result_cache (key, user_id, expires_at, value) VALUES (?, ?, ?, ?)",
+            (key, user_id, expires_at, value),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM result_cache WHERE expires_at <= ?", (time.time(),))
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._conn().execute("DELETE FROM result_cache WHERE user_id = ?", (user_id,))
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM result_cache")
+
+    def size(self) -> Tuple[int, int]:
+        entries, size = self._conn().execute(
+            "SELECT count(*), coalesce(sum(length(value)), 0) FROM result_cache"
+        ).fetchone()
+        return entries, size
+
+
+class ResultCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[bytes]:
+        if self.backend is None:
+            return None
+        value = self.backend.get(key)
+        self._count(value is not None)
+        return value
+
+    def set(self, key: str, user_id: int, value: bytes, expires_at: float) -> None:
+        if self.backend is not None:
+            self.backend.set(key, user_id, value, expires_at)
+
+    def invalidate_user(self, user_id: int) -> None:
+        if self.backend is not None:
+            self.backend.invalidate_user(user_id)
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        entries, size = self.backend.size() if self.backend is not None else (0, 0)
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _make_backend():
+    if RESULT_CACHE_BACKEND == "none":
+        return None
+    if RESULT_CACHE_BACKEND == "sqlite":
+        return SQLiteBackend(RESULT_CACHE_PATH)
+    return MemoryBackend(RESULT_CACHE_MAX_BYTES)
+
+
+result_cache = ResultCache(_make_backend())
+
+
+def _next_local_midnight(timezone: Optional[str], today) -> float:
+    return datetime.combine(today + timedelta(days=1), dt_time(), user_zone(timezone)).timestamp()
+
+
+def cached_result(namespace: str):
+    """
+    Cache a read handler's payload per (user, data_version, local date,
+    query params). The handler must take `db` and `current_user` keyword
+    arguments and return a payload for app.fastjson; the encoded JSON is
+    stored and returned as RawJSON.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(**kwargs):
+            db, user = kwargs["db"], kwargs["current_user"]
+            if result_cache.backend is None:
+                return fn(**kwargs)
+            today = get_today_for_user(user.timezone)
+            params = "&".join(f"{k}={v}" for k, v in sorted(kwargs.items()) if k not in ("db", "current_user"))
+            key = f"{namespace}|{user.id}|{get_data_version(db, user.id)}|{today.isoformat()}|{params}"
+
+            raw = result_cache.get(key)
+            if raw is not None:
+                return RawJSON(raw)
+            raw = dumps(fn(**kwargs))
+            result_cache.set(key, user.id, raw, _next_local_midnight(user.timezone, today))
+            return RawJSON(raw)
+        return wrapper
+    return decorator
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.lazy import lazy_import
+from app.queries import count_log_days, log_dates, streak_states
+from app.services import streaks as streak_backends
+from app.services.streaks import _week_start, compute_streaks_batch, compute_streaks_sql, latest_runs_batch
+
+np = lazy_import("numpy")
+
+# A HabitStreak row stores the most recent run of successful periods (days for
+# DAILY habits, weeks for X_PER_WEEK habits) together with the best run ever
+# seen. Reads only need to compare `last_period_end` with today, so they cost
+# the same no matter how much history a habit has.
+
+def _week_end(d: date) -> date:
+    return _week_start(d) + timedelta(days=6)
+
+_STREAK_GOALS = ("DAILY", "X_PER_WEEK")
+
+def _load_pairs(db: Session, habit_ids: List[int], until: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fetch (habit_id, date ordinal) pairs for the given habits as NumPy arrays.
+    """
+    rows = log_dates(db, habit_ids, until)
+    habit_arr = np.fromiter((r.habit_id for r in rows), dtype=np.int64, count=len(rows))
+    ordinal_arr = np.fromiter((r.date.toordinal() for r in rows), dtype=np.int64, count=len(rows))
+    return habit_arr, ordinal_arr
+
+def _weekly_targets(habits: Iterable[models.Habit]) -> Dict[int, int]:
+    return {h.id: h.target_per_period for h in habits if h.goal_type == "X_PER_WEEK"}
+
+def _last_log_dates(habit_arr: np.ndarray, ordinal_arr: np.ndarray) -> Dict[int, date]:
+    if not len(habit_arr):
+        return {}
+    habits, inverse = np.unique(habit_arr, return_inverse=True)
+    latest = np.zeros(len(habits), dtype=np.int64)
+    np.maximum.at(latest, inverse, ordinal_arr)
+    return {hid: date.fromordinal(o) for hid, o in zip(habits.tolist(), latest.tolist())}
+
+def _is_stale(state: Optional[models.HabitStreak], habit: models.Habit) -> bool:
+    return (
+        state is None
+        or state.goal_type != habit.goal_type
+        or state.target_per_period != habit.target_per_period
+    )
+
+def rebuild_streak_states(db: Session, habits: Iterable[models.Habit]) -> Dict[int, models.HabitStreak]:
+    """
+    Recompute the streak state of several habits from their full log history
+    with one log query and one vectorized pass.
+    """
+    habits = list(habits)
+    if not habits:
+        return {}
+
+    streak_habits = [h for h in habits if h.goal_type in _STREAK_GOALS]
+    habit_arr, ordinal_arr = _load_pairs(db, [h.id for h in streak_habits])
+    runs = latest_runs_batch(habit_arr, ordinal_arr, _weekly_targets(streak_habits))
+    last_logs = _last_log_dates(habit_arr, ordinal_arr)
+
+    states = {
+        s.habit_id: s
+        for s in db.query(models.HabitStreak)
+        .filter(models.HabitStreak.habit_id.in_([h.id for h in habits]))
+        .all()
+    }
+    for habit in habits:
+        state = states.get(habit.id)
+        if state is None:
+            state = models.HabitStreak(habit_id=habit.id, user_id=habit.user_id)
+            db.add(state)
+            states[habit.id] = state
+
+        current_run, best_run, last_period_end = runs.get(habit.id, (0, 0, None))
+        state.goal_type = habit.goal_type
+        state.target_per_period = habit.target_per_period
+        state.current_run = current_run
+        state.best_run = best_run
+        state.last_period_end = last_period_end
+        state.last_log_date = last_logs.get(habit.id)
+
+    db.flush()
+    return states
+
+def rebuild_streak_state(db: Session, habit: models.Habit) -> models.HabitStreak:
+    return rebuild_streak_states(db, [habit])[habit.id]
+
+def apply_log_to_streak_state(db: Session, habit: models.Habit, log_date: date) -> models.HabitStreak:
+    """
+    Fold a newly written log into the habit's streak state. The log must
+    already be flushed. Appends extend or restart the latest run; anything
+    that lands before the latest run can merge runs, so it triggers a rebuild.
+    """
+    state = db.get(models.HabitStreak, habit.id)
+    if _is_stale(state, habit):
+        return rebuild_streak_state(db, habit)
+
+    if state.last_log_date is None or log_date > state.last_log_date:
+        state.last_log_date = log_date
+
+    if habit.goal_type == "DAILY":
+        if state.last_period_end is None or log_date > state.last_period_end + timedelta(days=1):
+            state.current_run = 1
+        elif log_date == state.last_period_end + timedelta(days=1):
+            state.current_run += 1
+        else:
+            return rebuild_streak_state(db, habit)
+        state.last_period_end = log_date
+
+    elif habit.goal_type == "X_PER_WEEK":
+        week_end = _week_end(log_date)
+        if state.last_period_end is not None and week_end < state.last_period_end:
+            return rebuild_streak_state(db, habit)
+
+        week_count = count_log_days(db, habit.id, _week_start(log_date), week_end)
+        if week_count < habit.target_per_period or state.last_period_end == week_end:
+            return state
+
+        if state.last_period_end == week_end - timedelta(days=7):
+            state.current_run += 1
+        else:
+            state.current_run = 1
+        state.last_period_end = week_end
+
+    else:
+        return state
+
+    state.best_run = max(state.best_run, state.current_run)
+    return state
+
+def streaks_from_state(state: models.HabitStreak, today: date) -> Tuple[int, int]:
+    if state.goal_type == "DAILY":
+        current = state.current_run if state.last_period_end == today else 0
+    elif state.goal_type == "X_PER_WEEK":
+        this_week_end = _week_end(today)
+        if state.last_period_end in (this_week_end, this_week_end - timedelta(days=7)):
+            current = state.current_run
+        else:
+            current = 0
+    else:
+        return 0, 0
+    return current, state.best_run
+
+def _compute_as_of(db: Session, habits: List[models.Habit], today: date) -> Dict[int, Tuple[int, int]]:
+    habit_arr, ordinal_arr = _load_pairs(db, [h.id for h in habits], until=today)
+    streaks = compute_streaks_batch(habit_arr, ordinal_arr, today, _weekly_targets(habits))
+    return {
+        h.id: streaks.get(h.id, (0, 0)) if h.goal_type in _STREAK_GOALS else (0, 0)
+        for h in habits
+    }
+
+def get_streaks_for_habits(
+    db: Session,
+    habits: Iterable[models.Habit],
+    today: date,
+) -> Dict[int, Tuple[int, int]]:
+    """
+    Return {habit_id: (current_streak, best_streak)} as of `today`, read from
+    the persisted streak state. Missing or outdated rows are rebuilt and
+    committed first; habits with logs dated after `today` are computed from their
+    logs up to `today` so the result matches the full recompute. `habits` may be
+    ORM objects or rows from app.queries. STREAK_BACKEND=sql computes them in
+    the database instead.
+    """
+    habits = list(habits)
+    if not habits:
+        return {}
+    if streak_backends.STREAK_BACKEND == "sql":
+        return compute_streaks_sql(db, habits, today)
+
+    # the projection reads from the database, so pending state changes go out first
+    db.flush()
+    states = streak_states(db, [h.id for h in habits])
+
+    stale = [h for h in habits if _is_stale(states.get(h.id), h)]
+    if stale:
+        try:
+            states.update(rebuild_streak_states(db, stale))
+            db.commit()
+        except IntegrityError:
+            # a concurrent request healed the same habits first
+            db.rollback()
+            return get_streaks_for_habits(db, habits, today)
+
+    result: Dict[int, Tuple[int, int]] = {}
+    future = []
+    for habit in habits:
+        state = states[habit.id]
+        if state.last_log_date is not None and state.last_log_date > today:
+            future.append(habit)
+        else:
+            result[habit.id] = streaks_from_state(state, today)
+
+    if future:
+        result.update(_compute_as_of(db, future, today))
+    return result
+
+def rebuild_all_streak_states(db: Session, user_id: Optional[int] = None, batch_size: int = 500) -> int:
+    count = 0
+    last_id = 0
+    while True:
+        q = db.query(models.Habit).filter(models.Habit.id > last_id)
+        if user_id is not None:
+            q = q.filter(models.Habit.user_id == user_id)
+        habits = q.order_by(models.Habit.id).limit(batch_size).all()
+        if not habits:
+            return count
+
+        rebuild_streak_states(db, habits)
+        last_id = habits[-1].id
+        count += len(habits)
+        db.commit()
@@ -1,5 +1,20 @@
+from __future__ import annotations
+
+import os
 from datetime import date, timedelta
-from typing import Iterable, Tuple, Dict
+from typing import Iterable, Mapping, Optional, Tuple, Dict
+
+from sqlalchemy.orm import Session
+
+from app.lazy import lazy_import
+from app.queries import daily_streaks, weekly_streaks
+
+np = lazy_import("numpy")
+
+# Where get_streaks_for_habits reads streaks from: "state" uses the persisted
+# habit_streaks rows (app.services.streak_state), "sql" computes them in the
+# database with window functions (compute_streaks_sql below).
+STREAK_BACKEND = os.getenv("STREAK_BACKEND", "state")
 
 def _week_start(d: date) -> date:
     return d - timedelta(days=d.weekday())
@@ -70,4 +85,159 @@ def compute_streaks_for_daily(log_dates: Iterable[date], today: date) -> Tuple[i
         current_streak += 1
         day = day - timedelta(days=1)
     
-    return current_streak, best_streak
\ No newline at end of file
+    return current_streak, best_streak
+
+
+# ---------------- batch engine ----------------
+# The functions above are the reference implementation for a single habit.
+# The batch engine below takes (habit_id, date ordinal) pairs for many habits
+# as NumPy arrays and computes every habit's runs in one vectorized pass.
+# Week numbers are (ordinal - 1) // 7, which start on Monday because
+# date.fromordinal(1) is a Monday.
+
+def _runs(habit_ids: np.ndarray, periods: np.ndarray):
+    """
+    Group sorted, de-duplicated (habit, period) pairs into runs of consecutive
+    periods. Returns (habit, start, end) arrays, one entry per run, ordered by
+    habit then start.
+    """
+    new_run = np.ones(len(periods), dtype=bool)
+    new_run[1:] = (habit_ids[1:] != habit_ids[:-1]) | (periods[1:] != periods[:-1] + 1)
+    starts = np.flatnonzero(new_run)
+    ends = np.append(starts[1:], len(periods)) - 1
+    return habit_ids[starts], periods[starts], periods[ends]
+
+def _per_habit_max(run_habits: np.ndarray, values: np.ndarray):
+    first = np.flatnonzero(np.append(True, run_habits[1:] != run_habits[:-1]))
+    return run_habits[first], np.maximum.reduceat(values, first), first
+
+def _sorted_unique(habit_ids: np.ndarray, periods: np.ndarray):
+    order = np.lexsort((periods, habit_ids))
+    h, p = habit_ids[order], periods[order]
+    keep = np.ones(len(p), dtype=bool)
+    keep[1:] = (h[1:] != h[:-1]) | (p[1:] != p[:-1])
+    return h[keep], p[keep], keep
+
+def _successful_weeks(habit_ids: np.ndarray, ordinals: np.ndarray, weekly_targets: Mapping[int, int]):
+    weeks = (ordinals - 1) // 7
+    h, w, keep = _sorted_unique(habit_ids, weeks)
+    bounds = np.append(np.flatnonzero(keep), len(keep))
+    counts = np.diff(bounds)
+
+    target_habits = np.fromiter(weekly_targets.keys(), dtype=np.int64, count=len(weekly_targets))
+    target_values = np.fromiter(weekly_targets.values(), dtype=np.int64, count=len(weekly_targets))
+    order = np.argsort(target_habits)
+    target_habits, target_values = target_habits[order], target_values[order]
+    targets = target_values[np.searchsorted(target_habits, h)]
+
+    ok = (targets > 0) & (counts >= targets)
+    return h[ok], w[ok]
+
+def _split(habit_ids, ordinals, weekly_targets):
+    habit_ids = np.asarray(habit_ids, dtype=np.int64)
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    weekly_targets = weekly_targets or {}
+    if weekly_targets:
+        is_weekly = np.isin(habit_ids, np.fromiter(weekly_targets.keys(), dtype=np.int64))
+    else:
+        is_weekly = np.zeros(len(habit_ids), dtype=bool)
+    return habit_ids, ordinals, is_weekly, weekly_targets
+
+def _streaks_as_of(run_h, run_start, run_end, anchor: int, fallback: Optional[int]):
+    """
+    Current streak counts back from `anchor`; if no run covers it, from
+    `fallback` (the previous week for weekly habits).
+    """
+    lengths = run_end - run_start + 1
+    covers = (run_start <= anchor) & (anchor <= run_end)
+    current = np.where(covers, anchor - run_start + 1, 0)
+    if fallback is not None:
+        covers_fallback = (run_start <= fallback) & (fallback <= run_end) & ~covers
+        current = np.where(covers_fallback, fallback - run_start + 1, current)
+    habits, best, first = _per_habit_max(run_h, lengths)
+    current = np.maximum.reduceat(current, first)
+    return habits, current, best
+
+def compute_streaks_batch(
+        habit_ids: np.ndarray,
+        ordinals: np.ndarray,
+        today: date,
+        weekly_targets: Optional[Mapping[int, int]] = None,
+) -> Dict[int, Tuple[int, int]]:
+    """
+    Vectorized equivalent of calling compute_streaks_for_daily (or
+    compute_streaks_for_x_per_week for habits listed in `weekly_targets`) once
+    per habit. `habit_ids` and `ordinals` are parallel arrays of
+    (habit_id, date.toordinal()) pairs. Habits with no successful period are
+    reported as (0, 0) if they appear in the input.
+    """
+    habit_ids, ordinals, is_weekly, weekly_targets = _split(habit_ids, ordinals, weekly_targets)
+    result: Dict[int, Tuple[int, int]] = {int(hid): (0, 0) for hid in np.unique(habit_ids)}
+
+    daily = ~is_weekly
+    if daily.any():
+        h, d, _ = _sorted_unique(habit_ids[daily], ordinals[daily])
+        habits, current, best = _streaks_as_of(*_runs(h, d), today.toordinal(), None)
+        result.update(zip(habits.tolist(), zip(current.tolist(), best.tolist())))
+
+    if is_weekly.any():
+        h, w = _successful_weeks(habit_ids[is_weekly], ordinals[is_weekly], weekly_targets)
+        if len(h):
+            this_week = (today.toordinal() - 1) // 7
+            habits, current, best = _streaks_as_of(*_runs(h, w), this_week, this_week - 1)
+            result.update(zip(habits.tolist(), zip(current.tolist(), best.tolist())))
+
+    return result
+
+def latest_runs_batch(
+        habit_ids: np.ndarray,
+        ordinals: np.ndarray,
+        weekly_targets: Optional[Mapping[int, int]] = None,
+) -> Dict[int, Tuple[int, int, Optional[date]]]:
+    """
+    For every habit, return (length of the most recent run, best run, last
+    date of the most recent run's final period). Used to build persisted
+    streak state.
+    """
+    habit_ids, ordinals, is_weekly, weekly_targets = _split(habit_ids, ordinals, weekly_targets)
+    result: Dict[int, Tuple[int, int, Optional[date]]] = {
+        int(hid): (0, 0, None) for hid in np.unique(habit_ids)
+    }
+
+    def collect(run_h, run_start, run_end, to_last_day):
+        lengths = run_end - run_start + 1
+        habits, best, first = _per_habit_max(run_h, lengths)
+        last = np.append(first[1:], len(run_h)) - 1
+        for hid, b, length, end in zip(habits.tolist(), best.tolist(), lengths[last].tolist(), run_end[last].tolist()):
+            result[hid] = (length, b, to_last_day(end))
+
+    daily = ~is_weekly
+    if daily.any():
+        h, d, _ = _sorted_unique(habit_ids[daily], ordinals[daily])
+        collect(*_runs(h, d), date.fromordinal)
+
+    if is_weekly.any():
+        h, w = _successful_weeks(habit_ids[is_weekly], ordinals[is_weekly], weekly_targets)
+        if len(h):
+            collect(*_runs(h, w), lambda week: date.fromordinal(week * 7 + 7))
+
+    return result
+
+
+# ---------------- SQL backend ----------------
+# Runs are found in the database as gaps and islands over ROW_NUMBER(), so
+# only one (habit_id, current_streak, best_streak) row per habit is returned
+# instead of every log date. Window functions need SQLite 3.25+ or Postgres.
+
+def compute_streaks_sql(db: Session, habits: Iterable, today: date) -> Dict[int, Tuple[int, int]]:
+    """
+    Same result as compute_streaks_batch over each habit's logs up to `today`.
+    `habits` may be ORM objects or rows with id, goal_type and target_per_period.
+    """
+    habits = list(habits)
+    result: Dict[int, Tuple[int, int]] = {h.id: (0, 0) for h in habits}
+    daily = [h.id for h in habits if h.goal_type == "DAILY"]
+    weekly = [h.id for h in habits if h.goal_type == "X_PER_WEEK"]
+    rows = (daily_streaks(db, daily, today) if daily else []) + (weekly_streaks(db, weekly, today) if weekly else [])
+    result.update((row.habit_id, (row.current_streak, row.best_streak)) for row in rows)
+    return result
@@ -1,10 +1,16 @@
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
 
-def get_today_for_user(user_timezone: str | None) -> date:
-    tz_name = user_timezone or "America/New_York"
+DEFAULT_TIMEZONE = "America/New_York"
+
+def user_zone(user_timezone: str | None) -> ZoneInfo:
+    """
+    The user's zone, falling back to DEFAULT_TIMEZONE when unset or unknown.
+    """
     try:
-        tz = ZoneInfo(tz_name)
-    except Exception: 
-        tz = ZoneInfo("America/New_York")
-    return datetime.now(tz).date()
\ No newline at end of file
+        return ZoneInfo(user_timezone or DEFAULT_TIMEZONE)
+    except Exception:
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+def get_today_for_user(user_timezone: str | None) -> date:
+    return datetime.now(user_zone(user_timezone)).date()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import POOL_OPTIONS, SessionLocal, engine
+
+# Startup warm-up, run once per worker by the app's lifespan before it takes
+# traffic. It moves work that would otherwise land on the first requests of
+# a fresh worker to boot: opening the pool's connections, loading the time
+# zones users are in (ZoneInfo caches each zone after its first load) and
+# finishing the imports that app.lazy and the token functions defer.
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") == "1"
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", str(POOL_OPTIONS["pool_size"])))
+
+DEFAULT_TIMEZONES = ("UTC", "America/New_York")
+DEFERRED_MODULES = ("numpy", "jose.jwt")
+
+logger = logging.getLogger("app.startup")
+
+
+def prime_pool(bind=engine, connections: int = WARMUP_CONNECTIONS) -> int:
+    """
+    Open `connections` connections at once and hand them back to the pool.
+    """
+    held = []
+    try:
+        for _ in range(connections):
+            conn = bind.connect()
+            held.append(conn)
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in held:
+            conn.close()
+    return len(held)
+
+
+def prime_zoneinfo(db: Session, extra: Iterable[str] = DEFAULT_TIMEZONES) -> int:
+    names = set(extra)
+    names.update(tz for tz in db.execute(select(models.User.timezone).distinct()).scalars() if tz)
+    loaded = 0
+    for name in names:
+        try:
+            ZoneInfo(name)
+            loaded += 1
+        except (ZoneInfoNotFoundError, ValueError):
+            continue
+    return loaded
+
+
+def preload_modules(names: Iterable[str] = DEFERRED_MODULES) -> None:
+    import importlib
+
+    for name in names:
+        # attribute access completes a lazy_import
+        getattr(importlib.import_module(name), "__name__")
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    Run every step and log one JSON line with their timings. A failing step
+    is logged and skipped; the worker still starts.
+    """
+    timings: Dict[str, float] = {}
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            logger.exception("warm-up step %s failed", name)
+        timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+    def zones():
+        with SessionLocal() as db:
+            prime_zoneinfo(db)
+
+    step("pool", prime_pool)
+    step("zoneinfo", zones)
+    step("imports", preload_modules)
+    logger.info(json.dumps({"warmup_ms": timings}))
+    return timings
@@ -0,0 +1,51 @@
+"""
+Run the streak micro-benchmarks and the endpoint macro-benchmarks and emit
+one JSON document, tagged with the current commit so runs can be diffed.
+
+    python -m benchmarks --users 5 --habits 20 --years 3 --out bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import subprocess
+from typing import Optional
+
+from benchmarks import bench_endpoints, bench_streaks
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--habits", type=int, default=20)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--out", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    # the individual benchmarks print their own results; keep stdout to one document
+    with contextlib.redirect_stdout(io.StringIO()):
+        streaks = bench_streaks.main(habits=args.habits, years=args.years, repeat=args.repeat)
+        endpoints = bench_endpoints.main(
+            users=args.users, habits=args.habits, years=args.years, repeat=args.repeat
+        )
+
+    result = {"commit": _commit(), "streaks": streaks, "endpoints": endpoints}
+    out = json.dumps(result, indent=2)
+    print(out)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(out + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Dashboard throughput for the sync and DB_ASYNC=1 request paths at high
+client concurrency.
+
+    python -m benchmarks.bench_async_db
+
+Both apps run in-process behind httpx's ASGI transport against the same
+seeded SQLite file. Sync handlers are limited by the anyio threadpool
+(40 threads by default); async handlers by the event loop and the async
+engine's pool. Sync sessions are closed by a dependency teardown that
+also needs a threadpool thread, so under enough load the sync path can
+run out of pooled connections; those requests show up as `errors`.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.async_routes import asyncify_router
+from app.db import make_async_sessionmaker
+from app.dependencies import get_async_db, get_db
+from app.routers import auth, dashboard, habits, stats
+from app.security import create_access_token
+from benchmarks.datagen import make_engine, seed_user, session_for
+from benchmarks.timing import percentile
+
+
+def sync_app(engine) -> FastAPI:
+    app = FastAPI()
+    for router in (auth.router, habits.router, dashboard.router, stats.router):
+        app.include_router(router)
+
+    def override_get_db():
+        session = session_for(engine)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+def async_app(async_engine) -> FastAPI:
+    app = FastAPI()
+    for router in (auth.router, habits.router, dashboard.router, stats.router):
+        app.include_router(asyncify_router(router))
+    AsyncBenchSession = make_async_sessionmaker(async_engine)
+
+    async def override_get_async_db():
+        async with AsyncBenchSession() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return app
+
+
+async def load(app, path, headers, requests, concurrency):
+    latencies = []
+    errors = []
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def one():
+            async with sem:
+                t0 = time.perf_counter()
+                res = await client.get(path, headers=headers)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if res.status_code != 200:
+                    errors.append(res.status_code)
+
+        # warm up caches and pools
+        await asyncio.gather(*(one() for _ in range(min(concurrency, 50))))
+        latencies.clear()
+        errors.clear()
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - t0
+    return {
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "errors": len(errors),
+    }
+
+
+def main(requests: int = 1000, concurrency: int = 500, path: str = "/dashboard/today", pool_size: int = 40) -> None:
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    seed_engine = make_engine(f"sqlite:///{db_path}")
+    db = session_for(seed_engine)
+    user_id = seed_user(db, habits=10, years=1)
+    db.close()
+    seed_engine.dispose()
+    headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+    # same pool size for both, matching the default threadpool
+    engine = create_engine(
+        f"sqlite:///{db_path}", connect_args={"check_same_thread": False}, pool_size=pool_size, max_overflow=0,
+        pool_timeout=10,
+    )
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", pool_size=pool_size, max_overflow=0, pool_timeout=10)
+    results = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "path": path,
+        "sync": asyncio.run(load(sync_app(engine), path, headers, requests, concurrency)),
+        "async": asyncio.run(load(async_app(async_engine), path, headers, requests, concurrency)),
+    }
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
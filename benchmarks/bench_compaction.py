@@ -0,0 +1,64 @@
+"""
+One user with five years of history, before and after compacting logs older
+than a year: rows in habit_logs and habit_log_months, and the time of the
+read paths that merge the two (SQL streaks, per-habit and per-day counts
+over the last year, every logged day for a streak rebuild). Compaction runs
+with verification, so the outputs are checked to be identical.
+
+    python -m benchmarks.bench_compaction
+"""
+import json
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+
+from app import models, queries
+from app.services.aggregates import sql_period_counts
+from app.services.compaction import compact_logs
+from app.services.streaks import compute_streaks_sql
+from benchmarks.datagen import make_engine, seed_user, session_for
+from benchmarks.timing import sample, summarize
+
+
+def _rows(db, model) -> int:
+    return db.execute(select(func.count()).select_from(model)).scalar_one()
+
+
+def main(habits: int = 40, years: int = 5, horizon_days: int = 365, repeat: int = 20) -> dict:
+    engine = make_engine()
+    db = session_for(engine)
+    today = date.today()
+    user_id = seed_user(db, habits=habits, years=years, end_date=today, weekly_share=0.25)
+    db.commit()
+    rows = queries.active_habits(db, user_id, today)
+    ids = [h.id for h in rows]
+    year_ago = today - timedelta(days=364)
+
+    cases = {
+        "sql_streaks": lambda: compute_streaks_sql(db, rows, today),
+        "period_counts_365d": lambda: sql_period_counts(db, rows, year_ago, today),
+        "day_counts_365d": lambda: queries.daily_log_counts(db, user_id, year_ago, today),
+        "all_log_dates": lambda: queries.log_dates(db, ids),
+    }
+
+    def measure() -> dict:
+        return {
+            "habit_logs_rows": _rows(db, models.HabitLog),
+            "habit_log_months_rows": _rows(db, models.HabitLogMonth),
+            "cases": {name: summarize(sample(fn, repeat)) for name, fn in cases.items()},
+        }
+
+    before = measure()
+    started = time.perf_counter()
+    folded = compact_logs(db, today, horizon_days, verify=True)["logs"]
+    compact_ms = round((time.perf_counter() - started) * 1000, 1)
+    after = measure()
+    result = {"habits": habits, "years": years, "horizon_days": horizon_days, "before": before,
+              "compact_with_verify": {"logs": folded, "ms": compact_ms}, "after": after}
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Macro-benchmark: every endpoint driven through the ASGI app against a
+seeded SQLite file.
+
+    python -m benchmarks.bench_endpoints
+
+Requests are sent one at a time so the numbers are per-request latency.
+The result cache is off unless RESULT_CACHE_BACKEND is set, so read
+endpoints measure the computation rather than cache lookups.
+"""
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("RESULT_CACHE_BACKEND", "none")
+
+import httpx
+
+from app import models
+from app.db import configure_sqlite
+from app.dependencies import get_db
+from app.passwordhash import Hash
+from app.security import create_access_token
+from benchmarks.datagen import make_engine, seed_users, session_for
+from benchmarks.timing import summarize
+from main import app
+
+PASSWORD = "benchpass123"
+
+
+async def _timed(client, method, url, expected, **kwargs):
+    t0 = time.perf_counter()
+    res = await client.request(method, url, **kwargs)
+    elapsed = (time.perf_counter() - t0) * 1000
+    assert res.status_code == expected, (method, url, res.status_code, res.text)
+    return elapsed, res
+
+
+async def run(user_ids, repeat, slow_repeat):
+    headers = [{"Authorization": f"Bearer {create_access_token(user_id)}"} for user_id in user_ids]
+    users = itertools.cycle(range(len(user_ids)))
+    future_days = itertools.count(1)
+    registrations = itertools.count()
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        habits = {}
+        for i, h in enumerate(headers):
+            habits[i] = [habit["id"] for habit in (await client.get("/habits/", headers=h)).json()]
+
+        async def measure(name, n, make_request, rows=None):
+            samples = []
+            for _ in range(n):
+                samples.append(await make_request())
+            stats = summarize(samples)
+            stats["rps"] = round(len(samples) / (sum(samples) / 1000), 1)
+            if rows:
+                stats["rows_per_s"] = round(rows / (stats["p50_ms"] / 1000), 1)
+            results[name] = stats
+
+        def read(url):
+            async def request():
+                u = next(users)
+                return (await _timed(client, "GET", url.format(habit=habits[u][0]), 200, headers=headers[u]))[0]
+            return request
+
+        async def root():
+            return (await _timed(client, "GET", "/", 200))[0]
+
+        await measure("GET /", repeat, root)
+        await measure("GET /auth/me", repeat, read("/auth/me"))
+        await measure("GET /habits/", repeat, read("/habits/"))
+        await measure("GET /habits/{id}", repeat, read("/habits/{habit}"))
+        await measure("GET /habits/{id}/logs", repeat, read("/habits/{habit}/logs"))
+        await measure("GET /habits/{id}/logs?limit=100", repeat, read("/habits/{habit}/logs?limit=100"))
+        await measure("GET /dashboard/today", repeat, read("/dashboard/today"))
+        await measure("GET /stats/heatmap", repeat, read("/stats/heatmap?range=365d"))
+        await measure("GET /stats/consistency", repeat, read("/stats/consistency?range=90d"))
+        await measure("GET /stats/overview", repeat, read("/stats/overview?range=30d"))
+        await measure("GET /stats/bundle", repeat, read("/stats/bundle?range=30d"))
+
+        async def export():
+            u = next(users)
+            return (await _timed(client, "GET", "/export", 200, headers=headers[u]))[0]
+
+        export_rows = len((await client.get("/export", headers=headers[0])).content.splitlines())
+        await measure("GET /export", max(1, repeat // 10), export, rows=export_rows)
+
+        async def create_habit():
+            u = next(users)
+            body = {"name": "bench", "goal_type": "DAILY", "start_date": str(date.today())}
+            return (await _timed(client, "POST", "/habits/", 201, json=body, headers=headers[u]))[0]
+
+        async def update_habit():
+            u = next(users)
+            url = f"/habits/{habits[u][-1]}"
+            return (await _timed(client, "PATCH", url, 200, json={"name": "renamed"}, headers=headers[u]))[0]
+
+        async def archive_and_restore():
+            u = next(users)
+            habit = habits[u][-1]
+            elapsed, _ = await _timed(client, "DELETE", f"/habits/{habit}", 204, headers=headers[u])
+            await client.patch(f"/habits/{habit}/restore", headers=headers[u])
+            return elapsed
+
+        async def create_log():
+            u = next(users)
+            body = {"date": str(date.today() + timedelta(days=next(future_days)))}
+            return (await _timed(client, "POST", f"/habits/{habits[u][0]}/logs", 201, json=body, headers=headers[u]))[0]
+
+        async def batch_logs():
+            u = next(users)
+            start = next(future_days) * 1000
+            body = {"logs": [
+                {"habit_id": habit, "date": str(date.today() + timedelta(days=start + d))}
+                for habit in habits[u] for d in range(10)
+            ]}
+            return (await _timed(client, "POST", "/habits/logs:batch", 200, json=body, headers=headers[u]))[0]
+
+        async def update_me():
+            u = next(users)
+            return (await _timed(client, "PATCH", "/auth/me", 200, json={"timezone": "UTC"}, headers=headers[u]))[0]
+
+        async def login():
+            form = {"username": "user0", "password": PASSWORD}
+            return (await _timed(client, "POST", "/auth/login", 200, data=form))[0]
+
+        async def register():
+            n = next(registrations)
+            body = {"email": f"new{n}@example.com", "username": f"new{n}", "password": PASSWORD}
+            return (await _timed(client, "POST", "/auth/register", 201, json=body))[0]
+
+        await measure("POST /habits/", repeat, create_habit)
+        await measure("PATCH /habits/{id}", repeat, update_habit)
+        await measure("DELETE /habits/{id}", repeat, archive_and_restore)
+        await measure("POST /habits/{id}/logs", repeat, create_log)
+        await measure("POST /habits/logs:batch", max(1, repeat // 10), batch_logs, rows=10 * len(habits[0]))
+        await measure("PATCH /auth/me", repeat, update_me)
+        await measure("POST /auth/login", slow_repeat, login)
+        await measure("POST /auth/register", slow_repeat, register)
+    return results
+
+
+def main(users: int = 5, habits: int = 20, years: int = 3, repeat: int = 100, slow_repeat: int = 5) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = make_engine(f"sqlite:///{path}")
+    configure_sqlite(engine)
+    db = session_for(engine)
+    seeded = seed_users(db, users=users, habits=habits, years=years)
+    db.query(models.User).filter(models.User.id == seeded["user_ids"][0]).update(
+        {"password_hash": Hash.bcrypt(PASSWORD)}
+    )
+    db.commit()
+    db.close()
+
+    def override_get_db():
+        session = session_for(engine)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        endpoints = asyncio.run(run(seeded["user_ids"], repeat, slow_repeat))
+    finally:
+        app.dependency_overrides.clear()
+
+    result = {
+        "users": users,
+        "habits_per_user": habits,
+        "years": years,
+        "logs": seeded["logs"],
+        "seed_rows_per_s": seeded["load_rows_per_s"],
+        "endpoints": endpoints,
+    }
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare the heatmap's old per-log ORM path with the user_daily_counts rollup.
+
+    python -m benchmarks.bench_heatmap
+"""
+import json
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict
+
+from app import models
+from app.services.daily_counts import get_daily_counts
+from benchmarks.datagen import make_engine, seed_user, session_for
+
+
+def orm_counts(db, user_id: int, start_date: date, end_date: date) -> Dict[date, int]:
+    logs = (
+        db.query(models.HabitLog)
+        .filter(
+            models.HabitLog.user_id == user_id,
+            models.HabitLog.date >= start_date,
+            models.HabitLog.date <= end_date,
+        )
+        .all()
+    )
+    count_by_day: Dict[date, int] = {}
+    for log in logs:
+        count_by_day[log.date] = count_by_day.get(log.date, 0) + 1
+    return count_by_day
+
+
+def timed(fn: Callable, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main(habits: int = 20, years: int = 3, repeat: int = 20) -> None:
+    engine = make_engine()
+    db = session_for(engine)
+    today = date.today()
+    user_id = seed_user(db, habits=habits, years=years, end_date=today)
+    start_date = today - timedelta(days=364)
+
+    def old():
+        db.expunge_all()
+        return orm_counts(db, user_id, start_date, today)
+
+    def new():
+        return get_daily_counts(db, user_id, start_date, today)
+
+    assert old() == new()
+    result = {
+        "habits": habits,
+        "years": years,
+        "logs": db.query(models.HabitLog).count(),
+        "orm_ms": round(timed(old, repeat), 3),
+        "rollup_ms": round(timed(new, repeat), 3),
+    }
+    result["speedup"] = round(result["orm_ms"] / result["rollup_ms"], 1)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
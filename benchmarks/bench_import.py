@@ -0,0 +1,91 @@
+"""
+Cold start: import main and build the app in fresh interpreters, report
+wall-clock p50/p95/p99 and the slowest top-level imports (from
+`python -X importtime`), and check the result against a budget.
+
+    python -m benchmarks.bench_import --budget-ms 1500
+
+Exits non-zero when the p50 exceeds the budget or when building the app
+loads a module that should be deferred (app.warmup.DEFERRED_MODULES), so it
+can gate CI.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+from app.warmup import DEFERRED_MODULES
+from benchmarks.timing import summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+_CHILD = """
+import sys, time, types
+t0 = time.perf_counter()
+import main
+main.app
+elapsed = (time.perf_counter() - t0) * 1000
+print(elapsed)
+print(",".join(m for m in {deferred!r} if type(sys.modules.get(m)) is types.ModuleType))
+"""
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int]]:
+    """
+    (module, cumulative microseconds) for the top-level imports.
+    """
+    top = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            top.append((name.strip(), int(cumulative)))
+    return top
+
+
+def run_once(importtime: bool = False) -> Tuple[float, List[str], str]:
+    env = {**os.environ, "SECRET_KEY": os.getenv("SECRET_KEY", "bench-secret")}
+    flags = ["-X", "importtime"] if importtime else []
+    out = subprocess.run(
+        [sys.executable, *flags, "-c", _CHILD.format(deferred=DEFERRED_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    elapsed, loaded = out.stdout.split("\n")[:2]
+    return float(elapsed), [m for m in loaded.split(",") if m], out.stderr
+
+
+def main(repeat: int = 10, budget_ms: float = IMPORT_BUDGET_MS, top: int = 10) -> dict:
+    # wall-clock from plain interpreters; -X importtime adds its own overhead,
+    # so one traced run supplies only the per-module breakdown
+    samples = []
+    loaded = set()
+    for _ in range(repeat):
+        elapsed, eager, _ = run_once()
+        samples.append(elapsed)
+        loaded.update(eager)
+    modules = _parse_importtime(run_once(importtime=True)[2])
+
+    stats = summarize(samples)
+    slowest = sorted(modules, key=lambda item: -item[1])[:top]
+    result = {
+        "import_and_create_app": stats,
+        "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in slowest},
+        "budget_ms": budget_ms,
+        "eagerly_loaded_deferred_modules": sorted(loaded),
+        "within_budget": stats["p50_ms"] <= budget_ms and not loaded,
+    }
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_import")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args()
+    if not main(repeat=args.repeat, budget_ms=args.budget_ms)["within_budget"]:
+        sys.exit(1)
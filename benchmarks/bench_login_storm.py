@@ -0,0 +1,102 @@
+"""
+Dashboard latency with and without a concurrent burst of logins.
+
+    python -m benchmarks.bench_login_storm
+
+Requests go through the ASGI app in-process, so sync endpoints share the
+same anyio threadpool they would under uvicorn. Hashing workers need cores
+of their own for dashboard latency to stay flat; on a single core they
+compete with the app process for CPU.
+
+To approximate the old behaviour, where logins hashed on the shared
+threadpool with no queue limit, run with
+PASSWORD_HASH_EXECUTOR=thread PASSWORD_HASH_WORKERS=40 PASSWORD_HASH_MAX_PENDING=100000.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+
+from app import models, passwordhash
+from app.dependencies import get_db
+from app.passwordhash import Hash
+from app.security import create_access_token
+from benchmarks.datagen import make_engine, seed_user, session_for
+from benchmarks.timing import percentile
+from main import app
+
+
+async def dashboard_load(client, headers, requests, concurrency):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            t0 = time.perf_counter()
+            res = await client.get("/dashboard/today", headers=headers)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            assert res.status_code == 200, res.text
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return {"p50_ms": round(percentile(latencies, 0.5), 2), "p99_ms": round(percentile(latencies, 0.99), 2)}
+
+
+async def login_storm(client, logins, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            res = await client.post("/auth/login", data={"username": "storm", "password": "supersecret123"})
+            return res.status_code
+
+    return await asyncio.gather(*(one() for _ in range(logins)))
+
+
+async def run(requests, concurrency, logins, login_concurrency):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # start the hashing workers before measuring
+        await login_storm(client, passwordhash.WORKERS, passwordhash.WORKERS)
+        idle = await dashboard_load(client, HEADERS, requests, concurrency)
+        storm = asyncio.ensure_future(login_storm(client, logins, login_concurrency))
+        await asyncio.sleep(0.05)
+        busy = await dashboard_load(client, HEADERS, requests, concurrency)
+        statuses = await storm
+    return {
+        "executor": passwordhash.EXECUTOR_KIND,
+        "workers": passwordhash.WORKERS,
+        "dashboard_idle": idle,
+        "dashboard_during_logins": busy,
+        "logins": {str(code): statuses.count(code) for code in sorted(set(statuses))},
+    }
+
+
+def main(requests: int = 200, concurrency: int = 10, logins: int = 200, login_concurrency: int = 100) -> None:
+    global HEADERS
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = make_engine(f"sqlite:///{path}")
+    db = session_for(engine)
+    user_id = seed_user(db, habits=10, years=1)
+    db.add(models.User(email="storm@example.com", username="storm", password_hash=Hash.bcrypt("supersecret123")))
+    db.commit()
+    db.close()
+    HEADERS = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+    def override_get_db():
+        session = session_for(engine)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    print(json.dumps(asyncio.run(run(requests, concurrency, logins, login_concurrency))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Cost of recording request metrics: MetricsRegistry.observe on its own, and
+MetricsMiddleware around a no-op ASGI app compared with the bare app.
+
+    python -m benchmarks.bench_metrics
+"""
+import asyncio
+import json
+import time
+
+from app.metrics import MetricsMiddleware, MetricsRegistry
+
+ROUTES = ["/habits/", "/habits/{habit_id}", "/habits/{habit_id}/logs", "/dashboard/today", "/stats/overview"]
+
+
+class _Route:
+    def __init__(self, path):
+        self.path = path
+
+
+async def _noop_app(scope, receive, send):
+    scope["route"] = scope["_bench_route"]
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+async def _drive(app, scopes):
+    t0 = time.perf_counter()
+    for scope in scopes:
+        await app(dict(scope), _receive, _send)
+    return time.perf_counter() - t0
+
+
+def main(n: int = 200_000) -> dict:
+    registry = MetricsRegistry()
+    latencies = [(i % 997) / 1000 for i in range(n)]
+    t0 = time.perf_counter()
+    for i, seconds in enumerate(latencies):
+        registry.observe("GET", ROUTES[i % len(ROUTES)], 200, seconds)
+    observe_us = (time.perf_counter() - t0) / n * 1e6
+
+    scopes = [
+        {"type": "http", "method": "GET", "path": path, "_bench_route": _Route(path)}
+        for path in (ROUTES[i % len(ROUTES)] for i in range(n))
+    ]
+    bare = asyncio.run(_drive(_noop_app, scopes))
+    wrapped = asyncio.run(_drive(MetricsMiddleware(_noop_app, MetricsRegistry()), scopes))
+
+    result = {
+        "requests": n,
+        "observe_us": round(observe_us, 3),
+        "bare_app_us": round(bare / n * 1e6, 3),
+        "middleware_app_us": round(wrapped / n * 1e6, 3),
+        "middleware_overhead_us": round((wrapped - bare) / n * 1e6, 3),
+        "render_ms": None,
+    }
+    t0 = time.perf_counter()
+    registry.render()
+    result["render_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
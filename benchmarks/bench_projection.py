@@ -0,0 +1,91 @@
+"""
+Full ORM hydration versus the column-projected rows from app.queries, for a
+user with about 100k logs: latency (p50/p95/p99) and peak Python memory
+per call.
+
+    python -m benchmarks.bench_projection
+"""
+import json
+import tracemalloc
+from datetime import date
+
+from app import models, queries
+from benchmarks.datagen import make_engine, seed_user, session_for
+from benchmarks.timing import sample, summarize
+
+
+def orm_logs(db, user_id: int):
+    return db.query(models.HabitLog).filter(models.HabitLog.user_id == user_id).all()
+
+
+def orm_habits_and_streaks(db, user_id: int, today: date):
+    habits = (
+        db.query(models.Habit)
+        .filter(
+            models.Habit.user_id == user_id,
+            models.Habit.is_archived == False,
+            models.Habit.start_date <= today,
+        )
+        .all()
+    )
+    states = db.query(models.HabitStreak).filter(models.HabitStreak.habit_id.in_([h.id for h in habits])).all()
+    return habits, states
+
+
+def projected_habits_and_streaks(db, user_id: int, today: date):
+    habits = queries.active_habits(db, user_id, today)
+    return habits, queries.streak_states(db, [h.id for h in habits])
+
+
+def peak_kib(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def main(habits: int = 40, years: int = 7, repeat: int = 10) -> dict:
+    engine = make_engine()
+    db = session_for(engine)
+    today = date.today()
+    user_id = seed_user(db, habits=habits, years=years, end_date=today, density=1.0, weekly_share=0.25)
+    habit_ids = [h.id for h in queries.active_habits(db, user_id, today)]
+
+    def fresh(fn):
+        # start every call from an empty identity map, as a new request would
+        def call():
+            db.expunge_all()
+            return fn()
+        return call
+
+    cases = {
+        "logs": (
+            fresh(lambda: orm_logs(db, user_id)),
+            fresh(lambda: queries.log_dates(db, habit_ids)),
+        ),
+        "habits_and_streaks": (
+            fresh(lambda: orm_habits_and_streaks(db, user_id, today)),
+            fresh(lambda: projected_habits_and_streaks(db, user_id, today)),
+        ),
+    }
+    assert len(cases["logs"][0]()) == len(cases["logs"][1]())
+
+    result = {"habits": habits, "years": years, "logs": db.query(models.HabitLog).count(), "cases": {}}
+    for name, (orm, projected) in cases.items():
+        orm_stats = summarize(sample(orm, repeat))
+        projected_stats = summarize(sample(projected, repeat))
+        result["cases"][name] = {
+            "orm": {**orm_stats, "peak_kib": peak_kib(orm)},
+            "projected": {**projected_stats, "peak_kib": peak_kib(projected)},
+            "speedup": round(orm_stats["p50_ms"] / projected_stats["p50_ms"], 1),
+        }
+        result["cases"][name]["memory_ratio"] = round(
+            result["cases"][name]["orm"]["peak_kib"] / result["cases"][name]["projected"]["peak_kib"], 1
+        )
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
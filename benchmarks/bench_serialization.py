@@ -0,0 +1,117 @@
+"""
+Response serialization: the model path FastAPI takes for a response_model
+(build the schema objects, validate them against the response model, dump
+to JSON) versus app.fastjson (plain payload straight to bytes), for a
+365-day heatmap, a dashboard with many habits and a long log listing.
+The two paths must produce identical bytes.
+
+    python -m benchmarks.bench_serialization
+"""
+import json
+from datetime import date, datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app import schemas
+from app.fastjson import as_dicts, dumps
+from benchmarks.timing import sample, summarize
+
+
+class _Row:
+    __slots__ = tuple(schemas.HabitLogRead.model_fields)
+
+    def __init__(self, **values):
+        for k, v in values.items():
+            setattr(self, k, v)
+
+
+def heatmap_payload(days: int):
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    return {
+        "start_date": start,
+        "end_date": end,
+        "days": [{"date": start + timedelta(days=d), "count": d % 5} for d in range(days)],
+    }
+
+
+def dashboard_payload(habits: int):
+    created = datetime(2024, 1, 1, 12, 0, 0)
+    return {
+        "date": date.today(),
+        "habits": [
+            {
+                "habit": {
+                    "id": i, "user_id": 1, "name": f"habit {i}", "description": "",
+                    "goal_type": "DAILY" if i % 4 else "X_PER_WEEK", "target_per_period": 1 if i % 4 else 3,
+                    "start_date": date(2024, 1, 1), "is_archived": False, "created_at": created,
+                },
+                "is_completed": bool(i % 2),
+                "current_streak": i % 30,
+                "best_streak": i % 90,
+            }
+            for i in range(habits)
+        ],
+    }
+
+
+def log_rows(logs: int):
+    created = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        _Row(id=i, habit_id=1, user_id=1, date=date(2024, 1, 1) + timedelta(days=i), value=1, created_at=created)
+        for i in range(logs)
+    ]
+
+
+def model_path(build, response_model):
+    adapter = TypeAdapter(response_model)
+
+    def run():
+        # what the handlers used to return, then FastAPI's validate + dump
+        return adapter.dump_json(adapter.validate_python(build()))
+    return run
+
+
+def main(habits: int = 200, logs: int = 5000, repeat: int = 50) -> dict:
+    heatmap = heatmap_payload(365)
+    dashboard = dashboard_payload(habits)
+    rows = log_rows(logs)
+
+    cases = {
+        "heatmap_365d": (
+            model_path(lambda: schemas.HeatmapResponse(**{
+                **heatmap, "days": [schemas.HeatmapDay(**d) for d in heatmap["days"]],
+            }), schemas.HeatmapResponse),
+            lambda: dumps(heatmap_payload(365)),
+        ),
+        f"dashboard_{habits}_habits": (
+            model_path(lambda: schemas.DashboardTodayResponse(date=dashboard["date"], habits=[
+                schemas.TodayHabitItem(**{**item, "habit": schemas.HabitRead(**item["habit"])})
+                for item in dashboard["habits"]
+            ]), schemas.DashboardTodayResponse),
+            lambda: dumps(dashboard_payload(habits)),
+        ),
+        f"logs_{logs}": (
+            model_path(lambda: rows, List[schemas.HabitLogRead]),
+            lambda: dumps(as_dicts(rows, schemas.HabitLogRead)),
+        ),
+    }
+
+    result = {"cases": {}}
+    for name, (model, fast) in cases.items():
+        assert model() == fast(), name
+        model_stats = summarize(sample(model, repeat))
+        fast_stats = summarize(sample(fast, repeat))
+        result["cases"][name] = {
+            "bytes": len(fast()),
+            "model": model_stats,
+            "fast": fast_stats,
+            "speedup": round(model_stats["p50_ms"] / fast_stats["p50_ms"], 1),
+        }
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
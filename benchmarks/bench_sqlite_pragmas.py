@@ -0,0 +1,130 @@
+"""
+Mixed read/write throughput on a SQLite file with and without the
+connection pragmas from app.db (WAL, synchronous=NORMAL, busy_timeout,
+cache_size, optional mmap_size).
+
+    python -m benchmarks.bench_sqlite_pragmas
+
+Worker threads share one engine, as request threads do. Reads are the
+heatmap rollup query plus a 30-day log count; writes insert a log and commit.
+Each configuration runs against its own copy of the same seeded database,
+and the configurations alternate over several rounds so drift in the host
+affects both equally. Going through the ASGI app instead mostly measures
+handler CPU time on small hosts, which hides the database's share.
+"""
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from sqlalchemy import create_engine, func, select
+
+from app import models
+from app.db import configure_sqlite
+from benchmarks.datagen import make_engine, seed_user, session_for
+from benchmarks.timing import percentile
+
+
+def build_engine(path: str, pragmas: bool, pool_size: int):
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size,
+        max_overflow=0,
+    )
+    if pragmas:
+        configure_sqlite(engine)
+    return engine
+
+
+def mixed_load(engine, user_id, habit_ids, threads, duration, write_ratio):
+    reads, writes, errors = [], [], []
+    lock = threading.Lock()
+    next_day = [date.today()]
+    stop = time.perf_counter() + duration
+
+    def read(db):
+        db.execute(
+            select(models.UserDailyCount.date, models.UserDailyCount.count)
+            .where(models.UserDailyCount.user_id == user_id)
+        ).all()
+        db.execute(
+            select(func.count()).select_from(models.HabitLog).where(
+                models.HabitLog.user_id == user_id,
+                models.HabitLog.date >= date.today() - timedelta(days=30),
+            )
+        ).scalar()
+
+    def write(db, rng):
+        with lock:
+            next_day[0] += timedelta(days=1)
+            day = next_day[0]
+        db.add(models.HabitLog(habit_id=rng.choice(habit_ids), user_id=user_id, date=day, value=1))
+        db.commit()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < stop:
+            is_write = rng.random() < write_ratio
+            db = session_for(engine)
+            t0 = time.perf_counter()
+            try:
+                write(db, rng) if is_write else read(db)
+                (writes if is_write else reads).append((time.perf_counter() - t0) * 1000)
+            except Exception as exc:
+                errors.append(type(exc).__name__)
+            finally:
+                db.close()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return {
+        "ops_per_s": (len(reads) + len(writes)) / duration,
+        "read_p99_ms": percentile(reads, 0.99) if reads else None,
+        "write_p99_ms": percentile(writes, 0.99) if writes else None,
+        "errors": len(errors),
+    }
+
+
+def main(threads: int = 8, duration: float = 5.0, rounds: int = 3, write_ratio: float = 0.2) -> None:
+    workdir = tempfile.mkdtemp()
+    seed_path = os.path.join(workdir, "seed.db")
+    engine = make_engine(f"sqlite:///{seed_path}")
+    db = session_for(engine)
+    user_id = seed_user(db, habits=10, years=2)
+    habit_ids = [habit_id for (habit_id,) in db.query(models.Habit.id).filter(models.Habit.user_id == user_id)]
+    db.close()
+    engine.dispose()
+
+    runs = {"defaults": [], "pragmas": []}
+    for r in range(rounds):
+        for name in runs:
+            path = os.path.join(workdir, f"{name}-{r}.db")
+            shutil.copy(seed_path, path)
+            engine = build_engine(path, name == "pragmas", threads)
+            runs[name].append(mixed_load(engine, user_id, habit_ids, threads, duration, write_ratio))
+            engine.dispose()
+
+    results = {"threads": threads, "duration_s": duration, "rounds": rounds, "write_ratio": write_ratio}
+    for name, samples in runs.items():
+        results[name] = {
+            "ops_per_s": round(statistics.median(s["ops_per_s"] for s in samples), 1),
+            "read_p99_ms": round(statistics.median(s["read_p99_ms"] for s in samples), 2),
+            "write_p99_ms": round(statistics.median(s["write_p99_ms"] for s in samples), 2),
+            "errors": sum(s["errors"] for s in samples),
+        }
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
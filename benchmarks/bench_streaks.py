@@ -0,0 +1,71 @@
+"""
+Micro-benchmarks for the streak functions: the per-habit reference
+implementations and the vectorized batch engine.
+
+    python -m benchmarks.bench_streaks
+"""
+import json
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services.streaks import (
+    compute_streaks_batch,
+    compute_streaks_for_daily,
+    compute_streaks_for_x_per_week,
+    latest_runs_batch,
+)
+from benchmarks.timing import sample, summarize
+
+
+def main(habits: int = 40, years: int = 5, repeat: int = 20, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    today = date.today()
+    days = 365 * years
+    history = {
+        hid: [today - timedelta(days=i) for i in range(days) if rng.random() < 0.8]
+        for hid in range(1, habits + 1)
+    }
+    targets = {hid: 3 for hid in history if hid % 2 == 0}
+    daily = {hid: ds for hid, ds in history.items() if hid not in targets}
+    weekly = {hid: ds for hid, ds in history.items() if hid in targets}
+
+    habit_ids = np.array([hid for hid, ds in history.items() for _ in ds], dtype=np.int64)
+    ordinals = np.array([d.toordinal() for ds in history.values() for d in ds], dtype=np.int64)
+
+    def loop():
+        out = {hid: compute_streaks_for_daily(ds, today) for hid, ds in daily.items()}
+        out.update({hid: compute_streaks_for_x_per_week(ds, today, targets[hid]) for hid, ds in weekly.items()})
+        return out
+
+    assert loop() == compute_streaks_batch(habit_ids, ordinals, today, targets)
+
+    cases = {
+        "daily_reference": (lambda: [compute_streaks_for_daily(ds, today) for ds in daily.values()],
+                            sum(map(len, daily.values()))),
+        "x_per_week_reference": (lambda: [compute_streaks_for_x_per_week(ds, today, 3) for ds in weekly.values()],
+                                 sum(map(len, weekly.values()))),
+        "reference_all": (loop, len(ordinals)),
+        "compute_streaks_batch": (lambda: compute_streaks_batch(habit_ids, ordinals, today, targets), len(ordinals)),
+        "latest_runs_batch": (lambda: latest_runs_batch(habit_ids, ordinals, targets), len(ordinals)),
+    }
+    functions = {}
+    for name, (fn, rows) in cases.items():
+        stats = summarize(sample(fn, repeat))
+        stats["rows_per_s"] = round(rows / (stats["p50_ms"] / 1000), 1)
+        functions[name] = stats
+
+    result = {
+        "habits": habits,
+        "years": years,
+        "logs": len(ordinals),
+        "functions": functions,
+        "batch_speedup": round(functions["reference_all"]["p50_ms"] / functions["compute_streaks_batch"]["p50_ms"], 1),
+    }
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
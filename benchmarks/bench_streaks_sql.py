@@ -0,0 +1,49 @@
+"""
+Streaks for one user with five years of history, from the three places they
+can come from: the persisted streak state, the NumPy batch engine over every
+log date, and the window-function queries (STREAK_BACKEND=sql).
+
+    python -m benchmarks.bench_streaks_sql
+"""
+import json
+from datetime import date
+
+from app import models, queries
+from app.services.streak_state import _compute_as_of, get_streaks_for_habits, rebuild_streak_states
+from app.services.streaks import compute_streaks_sql
+from benchmarks.datagen import make_engine, seed_user, session_for
+from benchmarks.timing import sample, summarize
+
+
+def main(habits: int = 40, years: int = 5, repeat: int = 20, density: float = 0.8) -> dict:
+    engine = make_engine()
+    db = session_for(engine)
+    today = date.today()
+    user_id = seed_user(db, habits=habits, years=years, end_date=today, density=density, weekly_share=0.25)
+    rows = queries.active_habits(db, user_id, today)
+    rebuild_streak_states(db, rows)
+    db.commit()
+
+    cases = {
+        "state": lambda: get_streaks_for_habits(db, rows, today),
+        "batch_from_logs": lambda: _compute_as_of(db, rows, today),
+        "sql_window": lambda: compute_streaks_sql(db, rows, today),
+    }
+    expected = cases["batch_from_logs"]()
+    assert all(fn() == expected for fn in cases.values())
+
+    logs = db.query(models.HabitLog).filter(models.HabitLog.user_id == user_id).count()
+    result = {"habits": habits, "years": years, "logs": logs, "cases": {}}
+    for name, fn in cases.items():
+        stats = summarize(sample(fn, repeat))
+        stats["logs_per_s"] = round(logs / (stats["p50_ms"] / 1000), 1)
+        result["cases"][name] = stats
+    result["sql_vs_batch"] = round(
+        result["cases"]["batch_from_logs"]["p50_ms"] / result["cases"]["sql_window"]["p50_ms"], 2
+    )
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Seeded synthetic data for benchmarks. Rows are written with Core bulk
+inserts so multi-year datasets load in seconds.
+"""
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.services.bitmaps import rebuild_all_bitmaps
+from app.services.daily_counts import rebuild_daily_counts
+from app.services.streak_state import rebuild_all_streak_states
+
+
+def make_engine(url: str = "sqlite+pysqlite:///:memory:") -> Engine:
+    if url.endswith(":memory:"):
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _insert_user(
+    db: Session,
+    rng: random.Random,
+    habits: int,
+    years: int,
+    end_date: date,
+    density: float,
+    username: str,
+    weekly_share: float,
+) -> Tuple[int, int]:
+    """
+    Bulk-insert one user with their habits and logs. Returns
+    (user id, number of logs) without committing or deriving state.
+    """
+    start_date = end_date - timedelta(days=365 * years - 1)
+
+    user = models.User(email=f"{username}@example.com", username=username, password_hash="x", timezone="UTC")
+    db.add(user)
+    db.flush()
+
+    weekly = int(habits * weekly_share)
+    habit_rows = [
+        {
+            "user_id": user.id,
+            "name": f"habit {i}",
+            "description": "",
+            "goal_type": "X_PER_WEEK" if i < weekly else "DAILY",
+            "target_per_period": 3 if i < weekly else 1,
+            "start_date": start_date,
+            "is_archived": False,
+        }
+        for i in range(habits)
+    ]
+    habit_ids: List[int] = list(
+        db.scalars(insert(models.Habit).returning(models.Habit.id), habit_rows)
+    )
+
+    logs = 0
+    batch = []
+    for habit_id in habit_ids:
+        d = start_date
+        while d <= end_date:
+            if rng.random() < density:
+                batch.append({"habit_id": habit_id, "user_id": user.id, "date": d, "value": 1})
+            d += timedelta(days=1)
+        if len(batch) >= 50_000:
+            db.execute(insert(models.HabitLog), batch)
+            logs += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(models.HabitLog), batch)
+        logs += len(batch)
+    return user.id, logs
+
+
+def seed_user(
+    db: Session,
+    habits: int = 20,
+    years: int = 3,
+    end_date: Optional[date] = None,
+    density: float = 0.8,
+    seed: int = 0,
+    username: str = "bench",
+    weekly_share: float = 0.0,
+) -> int:
+    """
+    Create one user with `habits` habits and roughly `density` of the days
+    in the last `years` years logged. `weekly_share` of the habits are
+    X_PER_WEEK (3 per week), the rest DAILY. Returns the user id.
+    """
+    user_id, _ = _insert_user(
+        db, random.Random(seed), habits, years, end_date or date.today(), density, username, weekly_share
+    )
+    db.commit()
+    rebuild_daily_counts(db, user_id=user_id)
+    rebuild_all_streak_states(db, user_id=user_id)
+    rebuild_all_bitmaps(db, user_id=user_id)
+    return user_id
+
+
+def seed_users(
+    db: Session,
+    users: int = 10,
+    habits: int = 20,
+    years: int = 3,
+    end_date: Optional[date] = None,
+    density: float = 0.8,
+    seed: int = 0,
+    weekly_share: float = 0.25,
+) -> Dict:
+    """
+    Bulk-load `users` x `habits` x `years` of history, then derive the
+    rollup, streak state and bitmaps for everyone in one pass each. Returns
+    the user ids with row counts and load rates.
+    """
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+
+    t0 = time.perf_counter()
+    user_ids, logs = [], 0
+    for i in range(users):
+        user_id, user_logs = _insert_user(db, rng, habits, years, end_date, density, f"user{i}", weekly_share)
+        user_ids.append(user_id)
+        logs += user_logs
+    db.commit()
+    load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    rebuild_daily_counts(db)
+    rebuild_all_streak_states(db)
+    rebuild_all_bitmaps(db)
+    derive_s = time.perf_counter() - t0
+
+    return {
+        "user_ids": user_ids,
+        "habits": users * habits,
+        "logs": logs,
+        "load_s": round(load_s, 3),
+        "load_rows_per_s": round(logs / load_s, 1) if load_s else None,
+        "derive_s": round(derive_s, 3),
+    }
+
+
+def session_for(engine: Engine) -> Session:
+    return sessionmaker(bind=engine, autoflush=False)()
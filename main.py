@@ -1,9 +1,8 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, habits, dashboard, stats
-from app import models
-from app.db import engine
-import os
 
 
 # the method defined here is used to set up the database locally when uvicorn is run
@@ -11,26 +10,74 @@ import os
     #if os.getenv("ENV") != "test":
         #models.Base.metadata.create_all(bind=engine)
 #create_tables_if_not_exist()
-app = FastAPI(
-    title="Habit Tracker API"
-)
-
-app.include_router(auth.router)
-app.include_router(habits.router)
-app.include_router(dashboard.router)
-app.include_router(stats.router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "https://habit-tracker-rho-topaz.vercel.app",
-        "http://localhost:5173"
-        ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"]
-)
-# this is just a default route and can be removed later 
-@app.get("/")
-def hello():
-    return {"message":"Hello, these are the endpoints for Habit-Tracker-Backend"}
\ No newline at end of file
+
+# The app is built by create_app(), which is also where the routers, the
+# database engine and the configuration are loaded. `uvicorn main:app` and
+# `from main import app` build it on first access (see __getattr__ below);
+# `uvicorn --factory main:create_app` builds one per call.
+
+def create_app() -> FastAPI:
+    from app.async_routes import asyncify_router
+    from app.db import DB_ASYNC
+    from app.instrumentation import REQUEST_TIMING, RequestTimingMiddleware
+    from app.metrics import METRICS_ENABLED, MetricsMiddleware
+    from app.routers import auth, habits, dashboard, stats, export, metrics
+    from app.security import secret_key
+    from app.services.dashboard_snapshot import DASHBOARD_PRECOMPUTE, DashboardPrecomputer
+    from app.warmup import STARTUP_WARMUP, warm_up
+
+    # fail at startup rather than on the first request that signs a token
+    secret_key()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if STARTUP_WARMUP:
+            await run_in_threadpool(warm_up)
+        precomputer = DashboardPrecomputer() if DASHBOARD_PRECOMPUTE else None
+        if precomputer:
+            precomputer.start()
+        yield
+        if precomputer:
+            await precomputer.stop()
+
+    app = FastAPI(
+        title="Habit Tracker API",
+        lifespan=lifespan,
+    )
+
+    for router in (auth.router, habits.router, dashboard.router, stats.router, export.router):
+        app.include_router(asyncify_router(router) if DB_ASYNC else router)
+
+    if METRICS_ENABLED:
+        app.include_router(metrics.router)
+
+    if REQUEST_TIMING:
+        app.add_middleware(RequestTimingMiddleware)
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "https://habit-tracker-rho-topaz.vercel.app",
+            "http://localhost:5173"
+            ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
+    )
+    # this is just a default route and can be removed later
+    @app.get("/")
+    def hello():
+        return {"message":"Hello, these are the endpoints for Habit-Tracker-Backend"}
+
+    return app
+
+
+def __getattr__(name: str):
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
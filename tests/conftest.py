@@ -1,16 +1,24 @@
 import os
+
+os.environ["ENV"] = "test"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+# the app-level engine is never used in tests, so there is nothing to warm
+os.environ.setdefault("STARTUP_WARMUP", "0")
+# off by default in deployments; the tests cover the endpoint
+os.environ.setdefault("METRICS_ENABLED", "1")
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from main import app
 from app.dependencies import get_db
 from app import models
-
-os.environ["ENV"] = "test"
-os.environ.setdefault("SECRET_KEY", "test-secret-key")
+from app.instrumentation import instrument_engine
+from app.services.principal_cache import principal_cache
+from app.services.result_cache import result_cache
 
 TEST_DATABASE_URL = "sqlite+pysqlite:///:memory:"
 
@@ -19,6 +27,21 @@ engine = create_engine(
     connect_args={"check_same_thread":False},
     poolclass=StaticPool,
 )
+instrument_engine(engine)
+
+
+# pysqlite only opens a transaction before DML, so the SAVEPOINT that
+# db_session starts would be the outermost one and a session commit would
+# really commit. Let SQLAlchemy issue BEGIN itself instead.
+@event.listens_for(engine, "connect")
+def _no_implicit_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
@@ -28,12 +51,22 @@ def create_test_schema():
     yield
     models.Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Rolled-back test users reuse ids (and data versions), so cached
+    # principals and results must not leak between tests.
+    principal_cache.clear()
+    result_cache.clear()
+    yield
+    principal_cache.clear()
+    result_cache.clear()
+
 @pytest.fixture()
 def db_session():
     connection = engine.connect()
     transaction = connection.begin()
 
-    session = TestingSessionLocal(bind=connection)
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     try:
         yield session
     finally:
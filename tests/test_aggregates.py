@@ -0,0 +1,92 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import literal, select
+
+from app import models, queries
+from app.services import aggregates
+from app.services.aggregates import bitmap_period_counts, sql_period_counts
+from app.services.bitmaps import rebuild_bitmaps
+from app.services.result_cache import result_cache
+
+
+def _seed(db, rng):
+    user = models.User(email="agg@example.com", username="agg", password_hash="x")
+    db.add(user)
+    db.flush()
+    habits = [
+        models.Habit(user_id=user.id, name=f"h{i}", goal_type=goal_type, target_per_period=target,
+                     start_date=date(2024, 1, 1) + timedelta(days=rng.randrange(60)))
+        for i, (goal_type, target) in enumerate((("DAILY", 1), ("DAILY", 1), ("X_PER_WEEK", 3)))
+    ]
+    db.add_all(habits)
+    db.flush()
+    logs = {}
+    for h in habits:
+        # some logs predate the habit's start_date
+        logs[h.id] = {date(2023, 12, 1) + timedelta(days=d) for d in range(300) if rng.random() < 0.5}
+        db.add_all(models.HabitLog(habit_id=h.id, user_id=user.id, date=d) for d in logs[h.id])
+    db.flush()
+    return user.id, habits, logs
+
+
+def test_sql_counts_match_python(db_session):
+    rng = random.Random(20)
+    user_id, habits, logs = _seed(db_session, rng)
+    bitmaps = rebuild_bitmaps(db_session, habits)
+
+    for _ in range(30):
+        start = date(2023, 11, 20) + timedelta(days=rng.randrange(300))
+        end = start + timedelta(days=rng.randrange(120))
+        sql = sql_period_counts(db_session, habits, start, end)
+        assert sql == bitmap_period_counts(habits, bitmaps, start, end)
+
+        for h in habits:
+            in_range = [d for d in logs[h.id] if start <= d <= end]
+            weeks = {}
+            for d in in_range:
+                monday = d - timedelta(days=d.weekday())
+                weeks[monday] = weeks.get(monday, 0) + 1
+            assert sql[h.id].days == len(in_range)
+            assert sql[h.id].days_since_start == len([d for d in in_range if d >= h.start_date])
+            assert sql[h.id].weeks == weeks
+
+        per_day = {}
+        for dates in logs.values():
+            for d in dates:
+                if start <= d <= end:
+                    per_day[d] = per_day.get(d, 0) + 1
+        assert queries.daily_log_counts(db_session, user_id, start, end) == per_day
+
+
+def test_week_start_is_monday_in_sql(db_session):
+    days = [date(2024, 3, 3) + timedelta(days=i) for i in range(8)]  # Sunday to the next Sunday
+    got = [db_session.execute(select(queries.week_start(literal(d)))).scalar_one() for d in days]
+    assert got == [d - timedelta(days=d.weekday()) for d in days]
+
+
+@pytest.mark.parametrize("range_", ["7d", "30d", "90d"])
+def test_stats_endpoints_agree_across_backends(client, auth_headers, monkeypatch, range_):
+    start = date.today() - timedelta(days=100)
+    for goal_type, target, offset in (("DAILY", 1, 0), ("X_PER_WEEK", 2, 0), ("DAILY", 1, 80)):
+        habit = client.post(
+            "/habits/",
+            json={"name": goal_type, "goal_type": goal_type, "target_per_period": target,
+                  "start_date": str(start + timedelta(days=offset))},
+            headers=auth_headers,
+        ).json()
+        client.post(
+            "/habits/logs:batch",
+            json={"logs": [{"habit_id": habit["id"], "date": str(start + timedelta(days=d))} for d in range(0, 101, 3)]},
+            headers=auth_headers,
+        )
+
+    responses = {}
+    for backend in ("bitmap", "sql"):
+        monkeypatch.setattr(aggregates, "STATS_AGGREGATION", backend)
+        result_cache.clear()
+        res = client.get(f"/stats/bundle?range={range_}", headers=auth_headers)
+        assert res.status_code == 200, res.text
+        responses[backend] = res.json()
+    assert responses["sql"] == responses["bitmap"]
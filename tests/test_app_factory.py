@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+import main
+from app import models, security, warmup
+from app.warmup import prime_pool, prime_zoneinfo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_building_the_app_leaves_heavy_modules_deferred():
+    code = (
+        "import sys, types, main; main.app\n"
+        "from app.warmup import DEFERRED_MODULES\n"
+        "print([m for m in DEFERRED_MODULES if type(sys.modules.get(m)) is types.ModuleType])"
+    )
+    env = {**os.environ, "SECRET_KEY": "x"}
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_missing_secret_key_fails_at_create_app(monkeypatch):
+    monkeypatch.delenv("SECRET_KEY")
+    monkeypatch.setattr("dotenv.load_dotenv", lambda: None)
+    security.secret_key.cache_clear()
+    try:
+        with pytest.raises(RuntimeError, match="SECRET_KEY"):
+            main.create_app()
+    finally:
+        monkeypatch.undo()
+        security.secret_key.cache_clear()
+
+
+def test_lifespan_runs_the_warm_up(monkeypatch):
+    calls = []
+    monkeypatch.setattr(warmup, "STARTUP_WARMUP", True)
+    monkeypatch.setattr(warmup, "warm_up", lambda: calls.append(1))
+    with TestClient(main.create_app()):
+        assert calls == [1]
+
+
+def test_prime_pool_fills_the_pool(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'warm.db'}", pool_size=3)
+    assert prime_pool(engine, 3) == 3
+    assert engine.pool.checkedin() == 3
+    engine.dispose()
+
+
+def test_prime_zoneinfo_loads_user_zones(db_session):
+    db_session.add(models.User(email="tz@example.com", username="tz", password_hash="x", timezone="Asia/Tokyo"))
+    db_session.add(models.User(email="bad@example.com", username="bad", password_hash="x", timezone="Not/AZone"))
+    db_session.flush()
+
+    # UTC, America/New_York and Asia/Tokyo; the invalid zone is skipped
+    assert prime_zoneinfo(db_session) == 3
@@ -0,0 +1,95 @@
+import inspect
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.async_routes import asyncify_router
+from app.db import make_async_sessionmaker
+from app.dependencies import get_async_db
+from app.routers import auth, dashboard, export, habits, stats
+
+
+@pytest.fixture()
+def async_client():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    AsyncTestingSession = make_async_sessionmaker(engine)
+
+    async def create_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+
+    async def override_get_async_db():
+        async with AsyncTestingSession() as db:
+            yield db
+
+    app = FastAPI()
+    for router in (auth.router, habits.router, dashboard.router, stats.router, export.router):
+        app.include_router(asyncify_router(router))
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    with TestClient(app) as c:
+        c.portal.call(create_schema)
+        yield c
+        c.portal.call(engine.dispose)
+
+
+def test_async_routes_are_coroutines():
+    router = asyncify_router(habits.router)
+    assert router.routes
+    for route in router.routes:
+        assert inspect.iscoroutinefunction(route.endpoint)
+
+
+def test_async_mode_end_to_end(async_client, user_payload):
+    res = async_client.post("/auth/register", json=user_payload)
+    assert res.status_code == 201, res.text
+    res = async_client.post(
+        "/auth/login",
+        data={"username": user_payload["username"], "password": user_payload["password"]},
+    )
+    assert res.status_code == 200, res.text
+    headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+    today = datetime.now(timezone.utc).date().isoformat()
+    res = async_client.post(
+        "/habits/",
+        json={"name": "Read", "goal_type": "DAILY", "target_per_period": 1, "start_date": "2020-01-01"},
+        headers=headers,
+    )
+    assert res.status_code == 201, res.text
+    habit_id = res.json()["id"]
+
+    res = async_client.post(f"/habits/{habit_id}/logs", json={"date": today}, headers=headers)
+    assert res.status_code == 201, res.text
+
+    res = async_client.get("/habits/", headers=headers)
+    assert [h["id"] for h in res.json()] == [habit_id]
+
+    res = async_client.patch("/auth/me", json={"timezone": "UTC"}, headers=headers)
+    assert res.status_code == 200 and res.json()["timezone"] == "UTC"
+
+    res = async_client.get("/dashboard/today", headers=headers)
+    assert res.status_code == 200, res.text
+    assert res.json()["habits"][0]["is_completed"] is True
+    assert res.json()["habits"][0]["current_streak"] == 1
+
+    res = async_client.get("/stats/heatmap?range=7d", headers=headers)
+    assert res.status_code == 200, res.text
+    assert res.json()["days"][-1]["count"] == 1
+    res = async_client.get("/stats/heatmap?range=7d", headers={**headers, "If-None-Match": res.headers["ETag"]})
+    assert res.status_code == 304
+
+    res = async_client.get("/export?format=ndjson", headers=headers)
+    assert res.status_code == 200, res.text
+    assert [line.count('"record": "log"') for line in res.text.splitlines()] == [0, 1]
+
+    assert async_client.delete(f"/habits/{habit_id}", headers=headers).status_code == 204
@@ -0,0 +1,82 @@
+import random
+from datetime import date, timedelta
+
+from app import models
+from app.services.bitmaps import count_days, load_bitmaps, rebuild_bitmaps, set_day, week_counts
+
+
+def _habit(db, start=date(2024, 1, 1), goal_type="DAILY"):
+    user = models.User(email="bits@example.com", username="bits", password_hash="x")
+    db.add(user)
+    db.flush()
+    habit = models.Habit(user_id=user.id, name="h", goal_type=goal_type, target_per_period=1, start_date=start)
+    db.add(habit)
+    db.flush()
+    return habit
+
+
+def _log(db, habit, d):
+    db.add(models.HabitLog(habit_id=habit.id, user_id=habit.user_id, date=d))
+    db.flush()
+    set_day(db, habit, d)
+
+
+def test_counts_match_log_sets(db_session):
+    rng = random.Random(3)
+    habit = _habit(db_session)
+    days = {date(2024, 1, 1) + timedelta(days=i) for i in range(400) if rng.random() < 0.6}
+    for d in days:
+        _log(db_session, habit, d)
+
+    bitmap = load_bitmaps(db_session, [habit])[habit.id]
+    for _ in range(50):
+        a = date(2023, 12, 1) + timedelta(days=rng.randrange(450))
+        b = a + timedelta(days=rng.randrange(120))
+        assert count_days(bitmap, a, b) == len({d for d in days if a <= d <= b})
+
+        expected = {}
+        for d in days:
+            if a <= d <= b:
+                ws = d - timedelta(days=d.weekday())
+                expected[ws] = expected.get(ws, 0) + 1
+        assert week_counts(bitmap, a, b) == expected
+
+    assert rebuild_bitmaps(db_session, [habit])[habit.id] == bitmap
+
+
+def test_log_before_origin_reanchors(db_session):
+    habit = _habit(db_session, start=date(2024, 3, 1))
+    _log(db_session, habit, date(2024, 3, 2))
+    _log(db_session, habit, date(2024, 2, 20))
+
+    row = db_session.get(models.HabitBitmap, habit.id)
+    assert row.origin == date(2024, 2, 20)
+    bitmap = load_bitmaps(db_session, [habit])[habit.id]
+    assert count_days(bitmap, date(2024, 1, 1), date(2024, 12, 31)) == 2
+
+
+def test_ten_year_daily_habit_is_compact(db_session):
+    habit = _habit(db_session, start=date(2015, 1, 1))
+    for i in range(3650):
+        db_session.add(models.HabitLog(habit_id=habit.id, user_id=habit.user_id, date=date(2015, 1, 1) + timedelta(days=i)))
+    db_session.flush()
+    rebuild_bitmaps(db_session, [habit])
+
+    assert len(db_session.get(models.HabitBitmap, habit.id).bits) <= 460
+
+
+def test_weekly_consistency_counts_each_week_once(client, auth_headers):
+    today = date.fromisoformat(client.get("/dashboard/today", headers=auth_headers).json()["date"])
+    ws = today - timedelta(days=today.weekday())
+    res = client.post(
+        "/habits/",
+        json={"name": "Gym", "goal_type": "X_PER_WEEK", "target_per_period": 2, "start_date": str(ws - timedelta(days=7))},
+        headers=auth_headers,
+    )
+    habit_id = res.json()["id"]
+    for d in (ws - timedelta(days=7), ws - timedelta(days=6), ws - timedelta(days=5)):
+        client.post(f"/habits/{habit_id}/logs", json={"date": str(d)}, headers=auth_headers)
+
+    data = client.get("/stats/consistency?range=30d", headers=auth_headers).json()
+    assert data["total_periods"] == 2
+    assert data["successful_periods"] == 1
@@ -0,0 +1,177 @@
+import json
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app import models
+from app.queries import daily_log_counts
+from app.schemas import HabitLogBatchItem
+from app.services import aggregates, compaction, streaks
+from app.services.compaction import CompactionMismatch, analytics_fingerprint, compact_logs, compaction_cutoff
+from app.services.log_batch import upsert_logs
+from app.services.streak_state import get_streaks_for_habits
+from app.services.streaks import compute_streaks_for_x_per_week
+from app.services.result_cache import result_cache
+
+TODAY = date(2025, 6, 18)
+
+
+def _seed(db, rng):
+    user = models.User(email="cold@example.com", username="cold", password_hash="x")
+    db.add(user)
+    db.flush()
+    for i in range(12):
+        weekly = rng.random() < 0.5
+        habit = models.Habit(
+            user_id=user.id, name=f"h{i}", goal_type="X_PER_WEEK" if weekly else "DAILY",
+            target_per_period=rng.randint(1, 4) if weekly else 1,
+            start_date=date(2023, 1, 1) + timedelta(days=rng.randrange(60)),
+        )
+        db.add(habit)
+        db.flush()
+        density = rng.choice((0.2, 0.6, 1.0))
+        db.add_all(
+            models.HabitLog(habit_id=habit.id, user_id=user.id, date=date(2022, 12, 1) + timedelta(days=d),
+                            value=rng.choice((1, 1, 1, 2)))
+            for d in range(930) if rng.random() < density
+        )
+    db.flush()
+    return user.id
+
+
+def _count(db, model):
+    return db.execute(select(func.count()).select_from(model)).scalar_one()
+
+
+def test_compaction_keeps_analytics_identical(db_session):
+    user_id = _seed(db_session, random.Random(24))
+    before = analytics_fingerprint(db_session, user_id, TODAY)
+    raw_before = _count(db_session, models.HabitLog)
+
+    result = compact_logs(db_session, TODAY, horizon_days=90, verify=True)
+
+    assert result["users"] == 1 and result["logs"] > 0
+    assert _count(db_session, models.HabitLog) == raw_before - result["logs"]
+    assert db_session.execute(
+        select(func.min(models.HabitLog.date)).where(models.HabitLog.value == 1)
+    ).scalar_one() == compaction_cutoff(TODAY, 90)
+    assert analytics_fingerprint(db_session, user_id, TODAY) == before
+
+    # a second run with a shorter horizon merges into the existing months
+    compact_logs(db_session, TODAY, horizon_days=30, verify=True)
+    assert analytics_fingerprint(db_session, user_id, TODAY) == before
+
+
+def test_verify_rolls_back_a_user_whose_analytics_change(db_session, monkeypatch):
+    user_id = _seed(db_session, random.Random(7))
+    db_session.commit()
+    raw_before = _count(db_session, models.HabitLog)
+    compact_user = compaction.compact_user
+
+    def lossy(db, uid, cutoff, **kwargs):
+        folded = compact_user(db, uid, cutoff, **kwargs)
+        db.query(models.HabitLog).filter(models.HabitLog.value == 2).delete()
+        return folded
+
+    monkeypatch.setattr(compaction, "compact_user", lossy)
+    with pytest.raises(CompactionMismatch) as exc:
+        compact_logs(db_session, TODAY, horizon_days=90, verify=True)
+    assert exc.value.user_id == user_id
+    assert _count(db_session, models.HabitLog) == raw_before
+    assert _count(db_session, models.HabitLogMonth) == 0
+
+
+def _get(client, auth_headers, url):
+    result_cache.clear()
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    return response
+
+
+def test_read_and_write_paths_merge_compacted_months(client, auth_headers, db_session, monkeypatch):
+    monkeypatch.setattr(aggregates, "STATS_AGGREGATION", "sql")
+    monkeypatch.setattr(streaks, "STREAK_BACKEND", "sql")
+    today = date.fromisoformat(_get(client, auth_headers, "/dashboard/today").json()["date"])
+    start = today - timedelta(days=200)
+    habit = client.post(
+        "/habits/", json={"name": "walk", "goal_type": "DAILY", "start_date": str(start)}, headers=auth_headers,
+    ).json()
+    client.post(
+        "/habits/logs:batch",
+        json={"logs": [{"habit_id": habit["id"], "date": str(start + timedelta(days=d)), "value": 1 + (d == 11)}
+                       for d in range(201) if d % 7 != 3]},
+        headers=auth_headers,
+    )
+
+    urls = ["/dashboard/today", "/stats/bundle?range=365d", "/stats/overview?range=365d"]
+    before = {url: _get(client, auth_headers, url).json() for url in urls}
+    logs_before = _get(client, auth_headers, f"/habits/{habit['id']}/logs").json()
+    export_before = [json.loads(line) for line in _get(client, auth_headers, "/export").text.splitlines()]
+
+    result = compact_logs(db_session, today, horizon_days=60)
+    assert result["logs"] > 100
+
+    assert {url: _get(client, auth_headers, url).json() for url in urls} == before
+    logs_after = _get(client, auth_headers, f"/habits/{habit['id']}/logs").json()
+    assert [(log["date"], log["value"]) for log in logs_after] == [(log["date"], log["value"]) for log in logs_before]
+    kept = next(i for i, log in enumerate(logs_before) if log["value"] == 2)
+    assert logs_after[0]["id"] is None and logs_after[kept]["id"] == logs_before[kept]["id"]
+    export_after = [json.loads(line) for line in _get(client, auth_headers, "/export").text.splitlines()]
+    assert [{**r, "created_at": None} for r in export_after] == [{**r, "created_at": None} for r in export_before]
+
+    # paging walks across the compacted and raw halves without gaps or repeats
+    paged, cursor = [], None
+    while True:
+        url = f"/habits/{habit['id']}/logs?limit=7" + (f"&cursor={cursor}" if cursor else "")
+        response = _get(client, auth_headers, url)
+        paged += [log["date"] for log in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert paged == [log["date"] for log in logs_before]
+
+    # a compacted day is still logged
+    response = client.post(f"/habits/{habit['id']}/logs", json={"date": str(start)}, headers=auth_headers)
+    assert response.status_code == 400
+    batch = client.post(
+        "/habits/logs:batch",
+        json={"logs": [{"habit_id": habit["id"], "date": str(start), "value": 5},
+                       {"habit_id": habit["id"], "date": str(start + timedelta(days=3))}]},
+        headers=auth_headers,
+    ).json()
+    assert [r["status"] for r in batch["results"]] == ["updated", "created"]
+    logs = _get(client, auth_headers, f"/habits/{habit['id']}/logs").json()
+    assert [(log["date"], log["value"]) for log in logs[:4]] == [
+        (str(start), 5), (str(start + timedelta(days=1)), 1), (str(start + timedelta(days=2)), 1),
+        (str(start + timedelta(days=3)), 1),
+    ]
+    assert daily_log_counts(db_session, habit["user_id"], start, start + timedelta(days=3)) == {
+        start: 1, start + timedelta(days=1): 1, start + timedelta(days=2): 1, start + timedelta(days=3): 1,
+    }
+
+
+def test_rewriting_a_folded_day_does_not_count_it_twice(db_session):
+    today = date(2025, 9, 30)
+    user = models.User(email="weekly@example.com", username="weekly", password_hash="x")
+    db_session.add(user)
+    db_session.flush()
+    habit = models.Habit(user_id=user.id, name="gym", goal_type="X_PER_WEEK", target_per_period=3,
+                         start_date=date(2025, 8, 1))
+    db_session.add(habit)
+    db_session.flush()
+    folded = [date(2025, 8, 25), date(2025, 8, 28)]
+    db_session.add_all(models.HabitLog(habit_id=habit.id, user_id=user.id, date=d) for d in folded)
+    db_session.commit()
+    assert compact_logs(db_session, today, horizon_days=20)["logs"] == 2
+
+    upsert_logs(db_session, user.id, [
+        HabitLogBatchItem(habit_id=habit.id, date=date(2025, 8, 25)),
+        HabitLogBatchItem(habit_id=habit.id, date=date(2025, 9, 11)),
+    ], today=today)
+
+    # the week of Aug 25 still has two days, short of the target
+    expected = compute_streaks_for_x_per_week(folded + [date(2025, 9, 11)], today, 3)
+    assert expected == (0, 0)
+    assert get_streaks_for_habits(db_session, [habit], today)[habit.id] == expected
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from app import models
+from app.services.daily_counts import get_daily_counts, rebuild_daily_counts
+
+
+def test_heatmap_counts_logs_across_habits(client, auth_headers):
+    today = date.fromisoformat(client.get("/dashboard/today", headers=auth_headers).json()["date"])
+    habit_ids = []
+    for name in ("Read", "Run"):
+        res = client.post(
+            "/habits/",
+            json={"name": name, "goal_type": "DAILY", "start_date": str(today - timedelta(days=10))},
+            headers=auth_headers,
+        )
+        habit_ids.append(res.json()["id"])
+
+    for habit_id in habit_ids:
+        client.post(f"/habits/{habit_id}/logs", json={"date": str(today)}, headers=auth_headers)
+    client.post(f"/habits/{habit_ids[0]}/logs", json={"date": str(today - timedelta(days=2))}, headers=auth_headers)
+
+    res = client.get("/stats/heatmap?range=7d", headers=auth_headers)
+    assert res.status_code == 200, res.text
+    counts = {d["date"]: d["count"] for d in res.json()["days"]}
+    assert counts[str(today)] == 2
+    assert counts[str(today - timedelta(days=2))] == 1
+    assert counts[str(today - timedelta(days=1))] == 0
+
+
+def test_rebuild_matches_incremental_counts(client, auth_headers, db_session):
+    res = client.post(
+        "/habits/",
+        json={"name": "Read", "goal_type": "DAILY", "start_date": "2024-01-01"},
+        headers=auth_headers,
+    )
+    habit_id = res.json()["id"]
+    for i in range(0, 20, 3):
+        client.post(f"/habits/{habit_id}/logs", json={"date": str(date(2024, 1, 1) + timedelta(days=i))}, headers=auth_headers)
+
+    user_id = res.json()["user_id"]
+    incremental = get_daily_counts(db_session, user_id, date(2024, 1, 1), date(2024, 1, 31))
+    assert sum(incremental.values()) == 7
+
+    rebuild_daily_counts(db_session, user_id=user_id)
+    assert get_daily_counts(db_session, user_id, date(2024, 1, 1), date(2024, 1, 31)) == incremental
+    assert db_session.query(models.UserDailyCount).count() == 7
@@ -0,0 +1,127 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+
+from app import models
+from app.services.dashboard_snapshot import (
+    DashboardPrecomputer,
+    build_snapshots,
+    dashboard_items,
+    load_snapshot,
+    precompute_all,
+    zone_groups,
+)
+from app.services.result_cache import result_cache
+from app.services.streaks import compute_streaks_for_daily, compute_streaks_for_x_per_week
+
+BASE = date(2024, 1, 1)
+
+
+def _reference(habit, dates, today):
+    dates = [d for d in dates if d <= today]
+    if habit.goal_type == "DAILY":
+        return compute_streaks_for_daily(dates, today)
+    return compute_streaks_for_x_per_week(dates, today, habit.target_per_period)
+
+
+def test_snapshot_plus_todays_logs_matches_reference(db_session):
+    rng = random.Random(23)
+    user = models.User(email="snap@example.com", username="snap", password_hash="x")
+    db_session.add(user)
+    db_session.flush()
+    habits, history = {}, {}
+    for i in range(40):
+        weekly = rng.random() < 0.5
+        habit = models.Habit(
+            user_id=user.id, name=f"h{i}", goal_type="X_PER_WEEK" if weekly else "DAILY",
+            target_per_period=rng.randint(1, 5) if weekly else 1, start_date=BASE,
+        )
+        db_session.add(habit)
+        db_session.flush()
+        density = rng.choice((0.1, 0.5, 0.9, 1.0))
+        history[habit.id] = {BASE + timedelta(days=d) for d in range(rng.randrange(1, 150)) if rng.random() < density}
+        db_session.add_all(models.HabitLog(habit_id=habit.id, user_id=user.id, date=d) for d in history[habit.id])
+        habits[habit.id] = habit
+    db_session.flush()
+
+    for _ in range(25):
+        today = BASE + timedelta(days=rng.randrange(0, 160))
+        assert build_snapshots(db_session, [user.id], today) == 1
+        entries = load_snapshot(db_session, user.id, today)
+        completed = {habit_id for habit_id, dates in history.items() if today in dates}
+        for item in dashboard_items(entries, completed):
+            habit = habits[item["habit"]["id"]]
+            expected = _reference(habit, history[habit.id], today)
+            assert (item["current_streak"], item["best_streak"]) == expected
+
+
+def test_snapshot_is_only_served_for_its_date_and_version(db_session):
+    user = models.User(email="v@example.com", username="v", password_hash="x")
+    db_session.add(user)
+    db_session.flush()
+    build_snapshots(db_session, [user.id], BASE)
+
+    assert load_snapshot(db_session, user.id, BASE) == []
+    assert load_snapshot(db_session, user.id, BASE + timedelta(days=1)) is None
+    user.data_version += 1
+    db_session.flush()
+    assert load_snapshot(db_session, user.id, BASE) is None
+
+
+def _dashboard(client, auth_headers):
+    result_cache.clear()
+    return client.get("/dashboard/today", headers=auth_headers).json()
+
+
+def test_dashboard_serves_and_keeps_snapshot_across_todays_logs(client, auth_headers, db_session):
+    today = date.fromisoformat(_dashboard(client, auth_headers)["date"])
+    habit = client.post(
+        "/habits/",
+        json={"name": "read", "goal_type": "DAILY", "start_date": str(today - timedelta(days=10))},
+        headers=auth_headers,
+    ).json()
+    client.post(
+        "/habits/logs:batch",
+        json={"logs": [{"habit_id": habit["id"], "date": str(today - timedelta(days=d))} for d in range(1, 4)]},
+        headers=auth_headers,
+    )
+    live = _dashboard(client, auth_headers)
+
+    user_id = habit["user_id"]
+    precompute_all(db_session)
+    assert load_snapshot(db_session, user_id, today) is not None
+    assert _dashboard(client, auth_headers) == live
+
+    # logging today advances the snapshot along with the data version
+    client.post(f"/habits/{habit['id']}/logs", json={"date": str(today)}, headers=auth_headers)
+    assert load_snapshot(db_session, user_id, today) is not None
+    item = _dashboard(client, auth_headers)["habits"][0]
+    assert (item["is_completed"], item["current_streak"], item["best_streak"]) == (True, 4, 4)
+
+    # a log on an earlier day can change the run, so the snapshot is dropped
+    client.post(f"/habits/{habit['id']}/logs", json={"date": str(today - timedelta(days=5))}, headers=auth_headers)
+    assert load_snapshot(db_session, user_id, today) is None
+    item = _dashboard(client, auth_headers)["habits"][0]
+    assert (item["current_streak"], item["best_streak"]) == (4, 4)
+
+
+def test_zone_groups_resolve_invalid_and_missing_zones_to_the_default():
+    groups = zone_groups(["Asia/Tokyo", None, "Not/AZone", "America/New_York"])
+    assert groups == {"Asia/Tokyo": ["Asia/Tokyo"], "America/New_York": [None, "Not/AZone", "America/New_York"]}
+
+
+def test_precomputer_runs_each_zone_once_after_its_midnight():
+    precomputer = DashboardPrecomputer(delay=timedelta(minutes=5), poll_seconds=900)
+    precomputer.zones = {"Asia/Tokyo": ["Asia/Tokyo"], "UTC": ["UTC"]}
+
+    # 00:03 UTC is 09:03 in Tokyo
+    now = datetime(2024, 3, 1, 0, 3, tzinfo=timezone.utc)
+    assert precomputer.due(now) == {"Asia/Tokyo": date(2024, 3, 1)}
+    precomputer.done["Asia/Tokyo"] = date(2024, 3, 1)
+    assert precomputer.seconds_until_next(now) == 120
+
+    now += timedelta(minutes=2)
+    assert precomputer.due(now) == {"UTC": date(2024, 3, 1)}
+    precomputer.done["UTC"] = date(2024, 3, 1)
+    assert precomputer.due(now) == {}
+    # next is Tokyo's midnight at 15:00 UTC, past the poll interval
+    assert precomputer.seconds_until_next(now) == 900
@@ -0,0 +1,17 @@
+from sqlalchemy import create_engine, text
+
+from app import db
+from app.db import configure_sqlite
+
+
+def test_sqlite_connections_get_wal_and_pragmas(tmp_path, monkeypatch):
+    monkeypatch.setitem(db.SQLITE_PRAGMAS, "mmap_size", "1048576")
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    configure_sqlite(engine)
+    with engine.connect() as conn:
+        pragma = lambda name: conn.execute(text(f"PRAGMA {name}")).scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1
+        assert pragma("busy_timeout") == 5000
+        assert pragma("mmap_size") == 1048576
+    engine.dispose()
@@ -0,0 +1,65 @@
+from app import models
+
+
+def _get(client, url, headers, etag=None):
+    if etag:
+        headers = {**headers, "If-None-Match": etag}
+    return client.get(url, headers=headers)
+
+
+def test_unchanged_data_answers_304(client, auth_headers):
+    for url in ("/dashboard/today", "/stats/overview", "/stats/heatmap?range=7d", "/stats/consistency", "/habits/"):
+        first = _get(client, url, auth_headers)
+        assert first.status_code == 200, first.text
+        etag = first.headers["ETag"]
+        assert etag.startswith('W/"')
+        again = _get(client, url, auth_headers, etag)
+        assert again.status_code == 304, url
+        assert again.content == b""
+        assert again.headers["ETag"] == etag
+
+
+def test_writes_change_the_etag(client, auth_headers):
+    etag = _get(client, "/dashboard/today", auth_headers).headers["ETag"]
+
+    habit = client.post(
+        "/habits/",
+        json={"name": "Read", "goal_type": "DAILY", "start_date": "2024-01-01"},
+        headers=auth_headers,
+    ).json()
+    res = _get(client, "/dashboard/today", auth_headers, etag)
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    client.post(f"/habits/{habit['id']}/logs", json={"date": "2024-01-02"}, headers=auth_headers)
+    res = _get(client, "/dashboard/today", auth_headers, etag)
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    client.patch("/auth/me", json={"timezone": "UTC"}, headers=auth_headers)
+    assert _get(client, "/dashboard/today", auth_headers, etag).status_code == 200
+
+
+def test_etag_depends_on_query(client, auth_headers):
+    week = _get(client, "/stats/heatmap?range=7d", auth_headers).headers["ETag"]
+    month = _get(client, "/stats/heatmap?range=30d", auth_headers).headers["ETag"]
+    assert week != month
+    assert _get(client, "/stats/heatmap?range=30d", auth_headers, week).status_code == 200
+
+
+def test_each_write_bumps_data_version(client, auth_headers, db_session):
+    def version():
+        db_session.expire_all()
+        return db_session.query(models.User.data_version).scalar()
+
+    start = version()
+    habit = client.post(
+        "/habits/",
+        json={"name": "Read", "goal_type": "DAILY", "start_date": "2024-01-01"},
+        headers=auth_headers,
+    ).json()
+    client.patch(f"/habits/{habit['id']}", json={"name": "Read more"}, headers=auth_headers)
+    client.post(f"/habits/{habit['id']}/logs", json={"date": "2024-01-02"}, headers=auth_headers)
+    client.post("/habits/logs:batch", json={"logs": [{"habit_id": habit["id"], "date": "2024-01-03"}]}, headers=auth_headers)
+    client.delete(f"/habits/{habit['id']}", headers=auth_headers)
+    assert version() == start + 5
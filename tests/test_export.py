@@ -0,0 +1,131 @@
+import asyncio
+import csv
+import gc
+import gzip
+import io
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app import models
+from main import app
+
+
+def _seed(client, auth_headers):
+    habit = client.post(
+        "/habits/",
+        json={"name": "Read", "goal_type": "DAILY", "start_date": "2024-01-01"},
+        headers=auth_headers,
+    ).json()
+    logs = [{"habit_id": habit["id"], "date": str(date(2024, 1, 1) + timedelta(days=d))} for d in range(10)]
+    client.post("/habits/logs:batch", json={"logs": logs}, headers=auth_headers)
+    return habit
+
+
+def test_ndjson_export_with_date_filter(client, auth_headers):
+    habit = _seed(client, auth_headers)
+    res = client.get("/export?from=2024-01-03&to=2024-01-05", headers=auth_headers)
+    assert res.status_code == 200, res.text
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in res.text.splitlines()]
+    assert records[0]["record"] == "habit" and records[0]["id"] == habit["id"]
+    assert [r["date"] for r in records[1:]] == ["2024-01-03", "2024-01-04", "2024-01-05"]
+    assert all(r["record"] == "log" and r["habit_id"] == habit["id"] for r in records[1:])
+
+
+def test_csv_export_gzipped(client, auth_headers):
+    habit = _seed(client, auth_headers)
+    res = client.get("/export?format=csv&gzip=true", headers=auth_headers)
+    assert res.status_code == 200, res.text
+    assert res.headers["content-type"] == "application/gzip"
+    assert 'filename="habit-tracker-export.csv.gz"' in res.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(res.content).decode())))
+    assert [r["record"] for r in rows] == ["habit"] + ["log"] * 10
+    assert rows[0]["habit_id"] == str(habit["id"]) and rows[0]["name"] == "Read"
+    assert rows[-1]["date"] == "2024-01-10"
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+async def _drain(path: str, query: bytes, token: str) -> int:
+    """
+    Call the app directly so the response body is counted, not buffered.
+    """
+    sent = 0
+    done = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+        elif message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query, "root_path": "",
+        "headers": [(b"host", b"test"), (b"authorization", f"Bearer {token}".encode())],
+        "server": ("test", 80), "client": ("test", 1),
+    }
+    await app(scope, receive, send)
+    return sent
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc to sample RSS")
+def test_million_row_export_runs_in_bounded_memory(client, access_token, db_session):
+    user_id = db_session.query(models.User.id).scalar()
+    habit_ids = []
+    for i in range(100):
+        habit = models.Habit(user_id=user_id, name=f"h{i}", goal_type="DAILY", start_date=date(1990, 1, 1))
+        db_session.add(habit)
+        db_session.flush()
+        habit_ids.append(habit.id)
+    start = date(1990, 1, 1)
+    days = [start + timedelta(days=d) for d in range(10_000)]
+    for habit_id in habit_ids:
+        db_session.execute(
+            insert(models.HabitLog),
+            [{"habit_id": habit_id, "user_id": user_id, "date": d, "value": 1} for d in days],
+        )
+    db_session.commit()
+    gc.collect()
+
+    baseline = _rss_bytes()
+    peak = baseline
+    stop = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not stop.is_set():
+            peak = max(peak, _rss_bytes())
+            stop.wait(0.01)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        sent = asyncio.run(_drain("/export", b"format=ndjson", access_token))
+    finally:
+        stop.set()
+        sampler.join()
+
+    # about 1,000,000 lines of ~70 bytes each
+    assert sent > 60_000_000
+    assert peak - baseline < 64 * 1024 * 1024, (peak - baseline) / 2**20
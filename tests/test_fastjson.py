@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app import fastjson
+from app.pagination import NEXT_CURSOR_HEADER
+from app.services.result_cache import result_cache
+
+URLS = [
+    "/habits/",
+    "/habits/?include_archived=true&limit=2",
+    "/habits/{habit}/logs",
+    "/habits/{habit}/logs?limit=5",
+    "/dashboard/today",
+    "/stats/heatmap?range=30d",
+    "/stats/consistency?range=90d",
+    "/stats/overview?range=30d",
+    "/stats/bundle?range=7d",
+    "/stats/bundle?range=30d&parts=heatmap,consistency",
+]
+
+
+@pytest.fixture
+def seeded(client, auth_headers):
+    start = date.today() - timedelta(days=60)
+    ids = []
+    for name, goal_type, target in (("Read", "DAILY", 1), ("Gym", "X_PER_WEEK", 2), ("Old", "DAILY", 1)):
+        habit = client.post(
+            "/habits/",
+            json={"name": name, "description": "", "goal_type": goal_type,
+                  "target_per_period": target, "start_date": str(start)},
+            headers=auth_headers,
+        ).json()
+        client.post(
+            "/habits/logs:batch",
+            json={"logs": [{"habit_id": habit["id"], "date": str(start + timedelta(days=d))} for d in range(0, 61, 3)]},
+            headers=auth_headers,
+        )
+        ids.append(habit["id"])
+    client.delete(f"/habits/{ids[-1]}", headers=auth_headers)
+    return ids
+
+
+def _get(client, auth_headers, url, fast, monkeypatch):
+    monkeypatch.setattr(fastjson, "FAST_JSON", fast)
+    res = client.get(url, headers=auth_headers)
+    assert res.status_code == 200, res.text
+    return res
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_fast_path_bytes_match_the_model_path(client, auth_headers, seeded, monkeypatch, url):
+    url = url.format(habit=seeded[0])
+    model = _get(client, auth_headers, url, False, monkeypatch)
+    result_cache.clear()
+    fast = _get(client, auth_headers, url, True, monkeypatch)
+
+    assert fast.content == model.content
+    assert fast.headers["content-type"] == model.headers["content-type"]
+    for header in ("ETag", NEXT_CURSOR_HEADER):
+        assert fast.headers.get(header) == model.headers.get(header)
+
+
+def test_result_cache_hits_serve_the_same_bytes(client, auth_headers, seeded, monkeypatch):
+    miss = _get(client, auth_headers, "/stats/overview", True, monkeypatch)
+    hit = _get(client, auth_headers, "/stats/overview", True, monkeypatch)
+    validated_hit = _get(client, auth_headers, "/stats/overview", False, monkeypatch)
+
+    assert result_cache.stats()["hits"] == 2
+    assert hit.content == miss.content == validated_hit.content
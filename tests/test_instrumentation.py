@@ -0,0 +1,63 @@
+import json
+import logging
+
+from app import instrumentation
+
+
+def _metrics(header):
+    metrics = {}
+    for part in header.split(", "):
+        name, *params = part.split(";")
+        metrics[name] = dict(p.split("=", 1) for p in params)
+    return metrics
+
+
+def _log_lines(caplog, logger):
+    return [json.loads(r.getMessage()) for r in caplog.records if r.name == logger]
+
+
+def test_server_timing_reports_db_and_phases(client, auth_headers):
+    client.post(
+        "/habits/",
+        json={"name": "Read", "goal_type": "DAILY", "start_date": "2024-01-01"},
+        headers=auth_headers,
+    )
+    res = client.get("/stats/overview", headers=auth_headers)
+    assert res.status_code == 200
+
+    metrics = _metrics(res.headers["Server-Timing"])
+    assert set(metrics) == {"db", "app", "streaks", "total"}
+    assert metrics["db"]["desc"].strip('"').endswith("queries")
+    assert int(metrics["db"]["desc"].strip('"').split()[0]) > 0
+    assert float(metrics["total"]["dur"]) >= float(metrics["db"]["dur"])
+
+
+def test_request_log_line(client, auth_headers, caplog):
+    with caplog.at_level(logging.INFO, logger="app.requests"):
+        res = client.get("/habits/", headers=auth_headers)
+
+    (line,) = _log_lines(caplog, "app.requests")
+    assert line["method"] == "GET"
+    assert line["path"] == "/habits/"
+    assert line["status"] == 200
+    assert line["queries"] > 0
+    assert 0 <= line["db_ms"] <= line["duration_ms"]
+    assert f'"{line["queries"]} queries"' in res.headers["Server-Timing"]
+
+
+def test_slow_queries_are_logged_without_parameters(client, auth_headers, caplog, monkeypatch):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+        client.get("/auth/me", headers=auth_headers)
+
+    lines = _log_lines(caplog, "app.slow_queries")
+    assert lines
+    assert all(line["path"] == "/auth/me" for line in lines)
+    assert any("FROM users" in line["statement"] for line in lines)
+
+
+def test_slow_query_log_can_be_disabled(client, auth_headers, caplog, monkeypatch):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", -1.0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+        client.get("/auth/me", headers=auth_headers)
+    assert not _log_lines(caplog, "app.slow_queries")
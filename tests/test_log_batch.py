@@ -0,0 +1,88 @@
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func
+
+from app import models
+from app.services.bitmaps import count_days, load_bitmaps
+from app.services.daily_counts import get_daily_counts
+
+
+def _habit(client, auth_headers, name="Read", start="2024-01-01"):
+    res = client.post("/habits/", json={"name": name, "goal_type": "DAILY", "start_date": start}, headers=auth_headers)
+    assert res.status_code == 201, res.text
+    return res.json()
+
+
+def test_batch_reports_per_item_status(client, auth_headers):
+    habit = _habit(client, auth_headers)
+    client.post(f"/habits/{habit['id']}/logs", json={"date": "2024-01-01"}, headers=auth_headers)
+
+    res = client.post(
+        "/habits/logs:batch",
+        json={"logs": [
+            {"habit_id": habit["id"], "date": "2024-01-01", "value": 3},
+            {"habit_id": habit["id"], "date": "2024-01-02"},
+            {"habit_id": habit["id"], "date": "2024-01-02", "value": 2},
+            {"habit_id": 999999, "date": "2024-01-02"},
+        ]},
+        headers=auth_headers,
+    )
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert [r["status"] for r in body["results"]] == ["updated", "duplicate", "created", "habit_not_found"]
+    assert (body["created"], body["updated"]) == (1, 1)
+
+    logs = client.get(f"/habits/{habit['id']}/logs", headers=auth_headers).json()
+    assert [(l["date"], l["value"]) for l in logs] == [("2024-01-01", 3), ("2024-01-02", 2)]
+
+
+def test_batch_ignores_other_users_habits(client, auth_headers, db_session):
+    other = models.User(email="other@example.com", username="other", password_hash="x")
+    db_session.add(other)
+    db_session.flush()
+    foreign = models.Habit(user_id=other.id, name="Theirs", goal_type="DAILY", start_date=date(2024, 1, 1))
+    db_session.add(foreign)
+    db_session.commit()
+
+    res = client.post(
+        "/habits/logs:batch",
+        json={"logs": [{"habit_id": foreign.id, "date": "2024-01-01"}]},
+        headers=auth_headers,
+    )
+    assert res.json()["results"][0]["status"] == "habit_not_found"
+    assert db_session.query(models.HabitLog).filter_by(habit_id=foreign.id).count() == 0
+
+
+def test_year_import_keeps_derived_state_in_step(client, auth_headers, db_session):
+    start = date(2024, 1, 1)
+    habits = [_habit(client, auth_headers, name=f"h{i}") for i in range(10)]
+    logs = [
+        {"habit_id": h["id"], "date": str(start + timedelta(days=d))}
+        for h in habits
+        for d in range(365)
+    ]
+
+    t0 = time.perf_counter()
+    res = client.post("/habits/logs:batch", json={"logs": logs}, headers=auth_headers)
+    elapsed = time.perf_counter() - t0
+    assert res.status_code == 200, res.text
+    assert res.json()["created"] == 3650
+    assert elapsed < 5
+
+    user_id = habits[0]["user_id"]
+    assert db_session.query(func.count(models.HabitLog.id)).filter_by(user_id=user_id).scalar() == 3650
+    counts = get_daily_counts(db_session, user_id, start, start + timedelta(days=364))
+    assert set(counts.values()) == {10}
+
+    habit_rows = db_session.query(models.Habit).filter_by(user_id=user_id).all()
+    bitmaps = load_bitmaps(db_session, habit_rows)
+    assert all(count_days(bitmaps[h.id], start, start + timedelta(days=364)) == 365 for h in habit_rows)
+    states = {s.habit_id: s for s in db_session.query(models.HabitStreak).filter_by(user_id=user_id)}
+    assert all(states[h.id].best_run == 365 for h in habit_rows)
+
+
+def test_batch_rejects_oversized_requests(client, auth_headers):
+    logs = [{"habit_id": 1, "date": "2024-01-01"}] * 10001
+    res = client.post("/habits/logs:batch", json={"logs": logs}, headers=auth_headers)
+    assert res.status_code == 422
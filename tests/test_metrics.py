@@ -0,0 +1,61 @@
+from fastapi.testclient import TestClient
+
+import main
+from app import metrics as app_metrics
+from app.metrics import MetricsRegistry, metrics
+
+
+def _samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.01, 0.05, 2.0):
+        registry.observe("GET", "/habits/", 200, seconds)
+    registry.observe("GET", "/habits/", 404, 0.001)
+
+    samples = _samples(registry.render())
+    labels = 'method="GET",route="/habits/",status="200"'
+    assert samples[f'http_request_duration_seconds_bucket{{{labels},le="0.01"}}'] == 2
+    assert samples[f'http_request_duration_seconds_bucket{{{labels},le="0.1"}}'] == 3
+    assert samples[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 4
+    assert samples[f"http_request_duration_seconds_count{{{labels}}}"] == 4
+    assert abs(samples[f"http_request_duration_seconds_sum{{{labels}}}"] - 2.065) < 1e-9
+    assert samples[f"http_requests_total{{{labels}}}"] == 4
+    assert samples['http_requests_total{method="GET",route="/habits/",status="404"}'] == 1
+
+
+def test_metrics_endpoint_reports_routes_and_caches(client, auth_headers):
+    metrics.reset()
+    client.get("/habits/", headers=auth_headers)
+    client.get("/habits/", headers=auth_headers)
+    client.get("/habits/999", headers=auth_headers)
+    client.get("/no/such/path")
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _samples(res.text)
+
+    assert samples['http_requests_total{method="GET",route="/habits/",status="200"}'] == 2
+    assert samples['http_requests_total{method="GET",route="/habits/{habit_id}",status="404"}'] == 1
+    assert samples['http_requests_total{method="GET",route="unmatched",status="404"}'] == 1
+    assert samples['http_request_duration_seconds_count{method="GET",route="/habits/",status="200"}'] == 2
+    # the scrape itself is in flight
+    assert samples["http_requests_in_flight"] == 1
+    assert samples['cache_hits_total{cache="principal"}'] >= 2
+    assert 0 < samples['cache_hit_ratio{cache="principal"}'] <= 1
+    assert 'cache_hit_ratio{cache="result"}' in samples
+    assert 'db_pool_checked_out{engine="sync"}' in samples
+    assert "password_hash_pending" in samples
+
+
+def test_metrics_endpoint_is_not_served_when_disabled(monkeypatch):
+    monkeypatch.setattr(app_metrics, "METRICS_ENABLED", False)
+    assert TestClient(main.create_app()).get("/metrics").status_code == 404
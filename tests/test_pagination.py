@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+from app.pagination import NEXT_CURSOR_HEADER
+
+
+def _pages(client, url, headers, limit):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        res = client.get(url, params=params, headers=headers)
+        assert res.status_code == 200, res.text
+        pages.append(res.json())
+        cursor = res.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+
+def test_habit_logs_pages_match_full_listing(client, auth_headers):
+    habit = client.post(
+        "/habits/",
+        json={"name": "Read", "goal_type": "DAILY", "start_date": "2024-01-01"},
+        headers=auth_headers,
+    ).json()
+    logs = [{"habit_id": habit["id"], "date": str(date(2024, 1, 1) + timedelta(days=d))} for d in range(0, 50, 2)]
+    client.post("/habits/logs:batch", json={"logs": logs}, headers=auth_headers)
+
+    url = f"/habits/{habit['id']}/logs"
+    full = client.get(url, headers=auth_headers)
+    assert NEXT_CURSOR_HEADER not in full.headers
+    pages = _pages(client, url, auth_headers, limit=10)
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert [log["id"] for p in pages for log in p] == [log["id"] for log in full.json()]
+
+
+def test_habit_list_pages_break_created_at_ties_by_id(client, auth_headers):
+    ids = [
+        client.post(
+            "/habits/",
+            json={"name": f"h{i}", "goal_type": "DAILY", "start_date": "2024-01-01"},
+            headers=auth_headers,
+        ).json()["id"]
+        for i in range(5)
+    ]
+    pages = _pages(client, "/habits/", auth_headers, limit=2)
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [h["id"] for p in pages for h in p] == ids
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers):
+    res = client.get("/habits/", params={"limit": 2, "cursor": "not-a-cursor"}, headers=auth_headers)
+    assert res.status_code == 400
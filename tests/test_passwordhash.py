@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from app import passwordhash
+from app.passwordhash import Hash, HashingPoolBusy
+
+
+def test_async_hash_round_trip():
+    async def run():
+        hashed = await Hash.bcrypt_async("supersecret123")
+        return hashed, await Hash.verify_async("supersecret123", hashed), await Hash.verify_async("wrong", hashed)
+
+    hashed, ok, bad = asyncio.run(run())
+    assert ok is True and bad is False
+    assert Hash.verify("supersecret123", hashed)
+    assert passwordhash.pending() == 0
+
+
+def test_full_queue_fails_fast(monkeypatch):
+    monkeypatch.setattr(passwordhash, "MAX_PENDING", 0)
+    with pytest.raises(HashingPoolBusy):
+        asyncio.run(Hash.bcrypt_async("supersecret123"))
+
+
+def test_login_returns_503_when_hashing_pool_is_full(client, user_payload, register_user, monkeypatch):
+    monkeypatch.setattr(passwordhash, "MAX_PENDING", 0)
+    res = client.post(
+        "/auth/login",
+        data={"username": user_payload["username"], "password": user_payload["password"]},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert res.status_code == 503, res.text
+    assert res.headers["Retry-After"] == "1"
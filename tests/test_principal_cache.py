@@ -0,0 +1,65 @@
+import time
+
+from app.security import TokenPayload
+from app.services.principal_cache import PrincipalCache, principal_cache
+from app import models
+
+
+def _user(user_id=1):
+    return models.User(id=user_id, email="a@example.com", username="a", timezone="UTC", password_hash="x")
+
+
+def _payload(user_id=1, exp_in=3600):
+    return TokenPayload(sub=user_id, exp=int(time.time()) + exp_in)
+
+
+def test_repeat_requests_hit_the_cache(client, auth_headers):
+    for _ in range(3):
+        res = client.get("/auth/me", headers=auth_headers)
+        assert res.status_code == 200, res.text
+    stats = principal_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+
+def test_update_me_invalidates_cached_principal(client, auth_headers):
+    assert client.get("/auth/me", headers=auth_headers).json()["timezone"] == "EST"
+    res = client.patch("/auth/me", json={"timezone": "UTC"}, headers=auth_headers)
+    assert res.status_code == 200, res.text
+    assert res.json()["timezone"] == "UTC"
+    assert client.get("/auth/me", headers=auth_headers).json()["timezone"] == "UTC"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    cache = PrincipalCache(maxsize=10, ttl=5)
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache.put("t", _payload(), _user())
+    assert cache.get("t") is not None
+    now[0] += 6
+    assert cache.get("t") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_entries_never_outlive_the_token():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    cache.put("t", _payload(exp_in=-1), _user())
+    assert cache.get("t") is None
+
+
+def test_lru_eviction_and_snapshot_is_detached():
+    cache = PrincipalCache(maxsize=2, ttl=60)
+    user = _user(1)
+    cache.put("a", _payload(1), user)
+    cache.put("b", _payload(2), _user(2))
+    cache.get("a")
+    cache.put("c", _payload(3), _user(3))
+    assert cache.get("b") is None
+    assert cache.get("a")[1] is not user
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_ttl_disables_cache():
+    cache = PrincipalCache(maxsize=10, ttl=0)
+    cache.put("t", _payload(), _user())
+    assert cache.get("t") is None
@@ -0,0 +1,54 @@
+from datetime import date
+
+from app import models, queries, schemas
+from app.services.bitmaps import load_bitmaps, rebuild_bitmaps
+from app.services.streak_state import get_streaks_for_habits, rebuild_streak_states
+
+
+def _seed(db):
+    user = models.User(email="q@example.com", username="q", password_hash="x")
+    db.add(user)
+    db.flush()
+    habits = [
+        models.Habit(user_id=user.id, name="a", goal_type="DAILY", start_date=date(2024, 1, 1)),
+        models.Habit(user_id=user.id, name="b", goal_type="X_PER_WEEK", target_per_period=1, start_date=date(2024, 1, 1)),
+        models.Habit(user_id=user.id, name="archived", goal_type="DAILY", start_date=date(2024, 1, 1), is_archived=True),
+        models.Habit(user_id=user.id, name="later", goal_type="DAILY", start_date=date(2024, 3, 1)),
+    ]
+    db.add_all(habits)
+    db.flush()
+    for d in (date(2024, 1, 1), date(2024, 1, 2)):
+        db.add(models.HabitLog(habit_id=habits[0].id, user_id=user.id, date=d))
+    db.add(models.HabitLog(habit_id=habits[1].id, user_id=user.id, date=date(2024, 1, 2)))
+    db.flush()
+    ids = user.id, [h.id for h in habits]
+    db.expunge_all()
+    return ids
+
+
+def test_projected_rows_stay_out_of_the_identity_map(db_session):
+    user_id, habit_ids = _seed(db_session)
+
+    habits = queries.active_habits(db_session, user_id, date(2024, 1, 31))
+    assert [h.name for h in habits] == ["a", "b"]
+    assert queries.logged_habit_ids(db_session, user_id, habit_ids, date(2024, 1, 2)) == set(habit_ids[:2])
+    assert sorted((r.habit_id, r.date) for r in queries.log_dates(db_session, habit_ids, until=date(2024, 1, 1))) == [
+        (habit_ids[0], date(2024, 1, 1))
+    ]
+    assert len(db_session.identity_map) == 0
+
+
+def test_rows_stand_in_for_orm_habits(db_session):
+    user_id, _ = _seed(db_session)
+    habits = queries.active_habits(db_session, user_id, date(2024, 1, 31), queries.HABIT_READ)
+
+    # streak state and bitmaps are built from the rows...
+    rebuild_streak_states(db_session, habits)
+    rebuild_bitmaps(db_session, habits)
+    db_session.expunge_all()
+
+    # ...and read back through the projection
+    streaks = get_streaks_for_habits(db_session, habits, date(2024, 1, 2))
+    assert streaks == {habits[0].id: (2, 2), habits[1].id: (1, 1)}
+    assert set(load_bitmaps(db_session, habits)) == {h.id for h in habits}
+    assert schemas.HabitRead.model_validate(habits[0]).name == "a"
@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import models
+from app.services import aggregates, streaks
+from app.services.dashboard_snapshot import precompute_all
+from app.services.result_cache import result_cache
+
+# Every SELECT the hot endpoints issue is replayed under EXPLAIN QUERY PLAN
+# and must be answered from an index: no full scan of a table (or of an
+# index, which costs the same) and no temp B-tree to sort or de-duplicate.
+# Scans of CTEs, subqueries and constant rows are fine; they are built from
+# index reads.
+#
+# The SQL aggregation and window-function streak backends group and sort by
+# derived keys (week_start(date), row_number() partitions) that no index
+# can provide, so only their table access is checked.
+DEFAULT_BACKENDS = {"STATS_AGGREGATION": "bitmap", "STREAK_BACKEND": "state"}
+SORTING_BACKENDS = {"STATS_AGGREGATION": "sql", "STREAK_BACKEND": "sql"}
+TABLES = set(models.Base.metadata.tables)
+
+
+def _offenders(db, statements, allow_sort=False):
+    conn = db.connection()
+    offenders = []
+    for sql, params in statements:
+        for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params):
+            detail = row[-1]
+            words = detail.split()
+            scan = words[0] == "SCAN" and words[1] in TABLES
+            sort = detail.startswith("USE TEMP B-TREE") and not allow_sort
+            if scan or sort:
+                offenders.append(f"{detail}\n    {' '.join(sql.split())}")
+    return offenders
+
+
+@pytest.fixture()
+def captured(db_session):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")) and not executemany:
+            statements.append((statement, parameters))
+
+    engine = db_session.get_bind().engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _seed(client, auth_headers):
+    today = date.fromisoformat(client.get("/dashboard/today", headers=auth_headers).json()["date"])
+    ids = []
+    for i, goal in enumerate(("DAILY", "X_PER_WEEK", "DAILY")):
+        habit = client.post(
+            "/habits/", json={"name": f"h{i}", "goal_type": goal, "target_per_period": 2,
+                              "start_date": str(today - timedelta(days=60))},
+            headers=auth_headers,
+        ).json()
+        ids.append(habit["id"])
+    client.patch(f"/habits/{ids[2]}", json={"is_archived": True}, headers=auth_headers)
+    client.post(
+        "/habits/logs:batch",
+        json={"logs": [{"habit_id": h, "date": str(today - timedelta(days=d))}
+                       for h in ids[:2] for d in range(0, 60, 2)]},
+        headers=auth_headers,
+    )
+    return today, ids
+
+
+def _hot_requests(client, auth_headers, ids):
+    def get(url):
+        result_cache.clear()
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        return response
+
+    page = get("/habits/?limit=1")
+    get(f"/habits/?limit=1&cursor={page.headers['X-Next-Cursor']}")
+    get("/habits/?include_archived=true&limit=2")
+    get(f"/habits/{ids[0]}")
+    page = get(f"/habits/{ids[0]}/logs?limit=5")
+    get(f"/habits/{ids[0]}/logs?limit=5&cursor={page.headers['X-Next-Cursor']}")
+    get("/dashboard/today")
+    for part in ("overview", "heatmap", "consistency"):
+        get(f"/stats/{part}?range=30d")
+    get("/stats/bundle?range=90d")
+    get("/export")
+    get("/export?format=csv")
+
+
+@pytest.mark.parametrize("backends", [DEFAULT_BACKENDS, SORTING_BACKENDS], ids=["default", "sql"])
+def test_hot_queries_use_indexes(client, auth_headers, user_payload, db_session, captured, monkeypatch, backends):
+    today, ids = _seed(client, auth_headers)
+    for name, value in backends.items():
+        monkeypatch.setattr(aggregates if name == "STATS_AGGREGATION" else streaks, name, value)
+
+    precompute_all(db_session)
+
+    del captured[:]
+    client.post("/auth/login", data={"username": user_payload["username"], "password": user_payload["password"]})
+    _hot_requests(client, auth_headers, ids)
+    # a retroactive log makes the snapshot stale, so the dashboard is computed from scratch
+    client.post(f"/habits/{ids[1]}/logs", json={"date": str(today - timedelta(days=1))}, headers=auth_headers)
+    _hot_requests(client, auth_headers, ids)
+
+    assert captured
+    assert _offenders(db_session, captured, allow_sort=backends is SORTING_BACKENDS) == []
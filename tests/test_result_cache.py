@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from app.services.result_cache import MemoryBackend, ResultCache, SQLiteBackend, result_cache
+
+
+def _habit(client, auth_headers):
+    return client.post(
+        "/habits/",
+        json={"name": "Read", "goal_type": "DAILY", "start_date": "2024-01-01"},
+        headers=auth_headers,
+    ).json()
+
+
+def test_repeat_reads_hit_and_writes_invalidate(client, auth_headers):
+    habit = _habit(client, auth_headers)
+    today = client.get("/dashboard/today", headers=auth_headers).json()["date"]
+    assert result_cache.stats()["misses"] == 1
+
+    first = client.get("/dashboard/today", headers=auth_headers).json()
+    assert result_cache.stats()["hits"] == 1
+    assert first["habits"][0]["is_completed"] is False
+
+    client.post(f"/habits/{habit['id']}/logs", json={"date": today}, headers=auth_headers)
+    assert result_cache.stats()["entries"] == 0
+    after = client.get("/dashboard/today", headers=auth_headers).json()
+    assert after["habits"][0]["is_completed"] is True
+
+
+def test_query_params_are_part_of_the_key(client, auth_headers):
+    week = client.get("/stats/heatmap?range=7d", headers=auth_headers).json()
+    month = client.get("/stats/heatmap?range=30d", headers=auth_headers).json()
+    assert len(week["days"]) == 7 and len(month["days"]) == 30
+    assert result_cache.stats()["hits"] == 0
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_bytes=1024)
+    return SQLiteBackend(str(tmp_path / "cache.db"))
+
+
+def test_backend_round_trip_expiry_and_invalidation(backend):
+    cache = ResultCache(backend)
+    later = time.time() + 60
+    cache.set("a", 1, b"one", later)
+    cache.set("b", 2, b"two", later)
+    cache.set("gone", 1, b"old", time.time() - 1)
+
+    assert cache.get("a") == b"one"
+    assert cache.get("gone") is None
+    cache.invalidate_user(1)
+    assert cache.get("a") is None
+    assert cache.get("b") == b"two"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_memory_backend_evicts_by_size():
+    backend = MemoryBackend(max_bytes=10)
+    later = time.time() + 60
+    backend.set("a", 1, b"12345", later)
+    backend.set("b", 1, b"12345", later)
+    backend.get("a")
+    backend.set("c", 2, b"12345", later)
+    assert backend.get("b") is None
+    assert backend.get("a") == b"12345"
+    assert backend.size() == (2, 10)
@@ -28,4 +28,47 @@ def test_stats_overview_returns_shape(client, auth_headers):
     data = res.json()
     assert "overall_completion_rate" in data
     assert "habits" in data
-    assert len(data["habits"]) >= 1
\ No newline at end of file
+    assert len(data["habits"]) >= 1
+
+
+def _queries(res):
+    db = next(m for m in res.headers["Server-Timing"].split(", ") if m.startswith("db;"))
+    return int(db.split('desc="')[1].split()[0])
+
+
+def _seed_habits(client, auth_headers):
+    start = date.today() - timedelta(days=40)
+    for goal_type, target in (("DAILY", 1), ("X_PER_WEEK", 2)):
+        habit = client.post(
+            "/habits/",
+            json={"name": goal_type, "goal_type": goal_type, "target_per_period": target, "start_date": str(start)},
+            headers=auth_headers,
+        ).json()
+        client.post(
+            "/habits/logs:batch",
+            json={"logs": [{"habit_id": habit["id"], "date": str(start + timedelta(days=i))} for i in range(0, 41, 2)]},
+            headers=auth_headers,
+        )
+
+
+def test_stats_bundle_matches_separate_endpoints(client, auth_headers):
+    _seed_habits(client, auth_headers)
+
+    bundle = client.get("/stats/bundle?range=30d", headers=auth_headers)
+    assert bundle.status_code == 200, bundle.text
+    data = bundle.json()
+    separate = 0
+    for part in ("overview", "consistency", "heatmap"):
+        res = client.get(f"/stats/{part}?range=30d", headers=auth_headers)
+        assert data[part] == res.json()
+        separate += _queries(res)
+    assert _queries(bundle) < separate
+
+    only = client.get("/stats/bundle?range=7d&parts=heatmap", headers=auth_headers).json()
+    assert set(only) == {"start_date", "end_date", "heatmap"}
+    assert len(only["heatmap"]["days"]) == 7
+
+
+def test_stats_bundle_rejects_unknown_parts(client, auth_headers):
+    res = client.get("/stats/bundle?parts=overview,streaks", headers=auth_headers)
+    assert res.status_code == 400
@@ -0,0 +1,101 @@
+import random
+from datetime import date, timedelta
+
+from app import models
+from app.services.streak_state import (
+    apply_log_to_streak_state,
+    get_streaks_for_habits,
+    rebuild_all_streak_states,
+)
+from app.services.streaks import compute_streaks_for_daily, compute_streaks_for_x_per_week
+
+
+def _make_habit(db, goal_type, target=1):
+    user = models.User(email=f"{goal_type}@example.com", username=goal_type, password_hash="x")
+    db.add(user)
+    db.flush()
+    habit = models.Habit(
+        user_id=user.id,
+        name="h",
+        goal_type=goal_type,
+        target_per_period=target,
+        start_date=date(2024, 1, 1),
+    )
+    db.add(habit)
+    db.flush()
+    return habit
+
+
+def _add_log(db, habit, d):
+    db.add(models.HabitLog(habit_id=habit.id, user_id=habit.user_id, date=d))
+    db.flush()
+    apply_log_to_streak_state(db, habit, d)
+
+
+def test_incremental_daily_state_matches_full_recompute(db_session):
+    rng = random.Random(7)
+    habit = _make_habit(db_session, "DAILY")
+    start = date(2024, 1, 1)
+    days = [start + timedelta(days=i) for i in range(120) if rng.random() < 0.7]
+    # mostly in order, with a few retroactive logs mixed in
+    order = days[:]
+    for _ in range(10):
+        i, j = rng.randrange(len(order)), rng.randrange(len(order))
+        order[i], order[j] = order[j], order[i]
+
+    logged = []
+    for d in order:
+        _add_log(db_session, habit, d)
+        logged.append(d)
+        today = max(logged)
+        assert get_streaks_for_habits(db_session, [habit], today)[habit.id] == \
+            compute_streaks_for_daily(logged, today)
+
+    for today in (start + timedelta(days=130), days[-1], days[len(days) // 2]):
+        expected = compute_streaks_for_daily([d for d in logged if d <= today], today)
+        assert get_streaks_for_habits(db_session, [habit], today)[habit.id] == expected
+
+
+def test_incremental_weekly_state_matches_full_recompute(db_session):
+    rng = random.Random(11)
+    habit = _make_habit(db_session, "X_PER_WEEK", target=3)
+    start = date(2024, 1, 1)
+    logged = []
+    for i in range(200):
+        d = start + timedelta(days=i)
+        if rng.random() < 0.55:
+            _add_log(db_session, habit, d)
+            logged.append(d)
+            assert get_streaks_for_habits(db_session, [habit], d)[habit.id] == \
+                compute_streaks_for_x_per_week(logged, d, 3)
+
+
+def test_goal_change_rebuilds_state(client, auth_headers):
+    today = client.get("/dashboard/today", headers=auth_headers).json()["date"]
+    d = date.fromisoformat(today)
+    res = client.post(
+        "/habits/",
+        json={"name": "Run", "goal_type": "DAILY", "target_per_period": 1, "start_date": str(d - timedelta(days=14))},
+        headers=auth_headers,
+    )
+    habit_id = res.json()["id"]
+    for i in range(3):
+        client.post(f"/habits/{habit_id}/logs", json={"date": str(d - timedelta(days=i))}, headers=auth_headers)
+
+    item = client.get("/dashboard/today", headers=auth_headers).json()["habits"][0]
+    assert (item["current_streak"], item["best_streak"]) == (3, 3)
+
+    client.patch(f"/habits/{habit_id}", json={"goal_type": "X_PER_WEEK", "target_per_period": 7}, headers=auth_headers)
+    item = client.get("/dashboard/today", headers=auth_headers).json()["habits"][0]
+    assert (item["current_streak"], item["best_streak"]) == (0, 0)
+
+
+def test_rebuild_all_backfills_missing_state(db_session):
+    habit = _make_habit(db_session, "DAILY")
+    for i in range(5):
+        db_session.add(models.HabitLog(habit_id=habit.id, user_id=habit.user_id, date=date(2024, 1, 1) + timedelta(days=i)))
+    db_session.flush()
+
+    assert rebuild_all_streak_states(db_session) == 1
+    state = db_session.get(models.HabitStreak, habit.id)
+    assert (state.current_run, state.best_run, state.last_period_end) == (5, 5, date(2024, 1, 5))
@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+
+import numpy as np
+from hypothesis import given, settings, strategies as st
+
+from app.services.streaks import (
+    _week_start,
+    compute_streaks_batch,
+    compute_streaks_for_daily,
+    compute_streaks_for_x_per_week,
+    latest_runs_batch,
+)
+
+BASE = date(2024, 1, 1)
+
+day_offsets = st.lists(st.integers(min_value=0, max_value=120), max_size=80)
+histories = st.dictionaries(
+    keys=st.integers(min_value=1, max_value=40),
+    values=st.tuples(day_offsets, st.one_of(st.none(), st.integers(min_value=1, max_value=7))),
+    max_size=8,
+)
+
+
+def _arrays(history):
+    pairs = [(hid, (BASE + timedelta(days=o)).toordinal()) for hid, (offsets, _) in history.items() for o in offsets]
+    return np.array([p[0] for p in pairs], dtype=np.int64), np.array([p[1] for p in pairs], dtype=np.int64)
+
+
+def _reference(dates, today, target):
+    if target is None:
+        return compute_streaks_for_daily(dates, today)
+    return compute_streaks_for_x_per_week(dates, today, target)
+
+
+@settings(max_examples=300, deadline=None)
+@given(history=histories, today_offset=st.integers(min_value=-10, max_value=140))
+def test_batch_matches_reference(history, today_offset):
+    today = BASE + timedelta(days=today_offset)
+    targets = {hid: target for hid, (_, target) in history.items() if target is not None}
+    habit_ids, ordinals = _arrays(history)
+
+    result = compute_streaks_batch(habit_ids, ordinals, today, targets)
+
+    for hid, (offsets, target) in history.items():
+        dates = [BASE + timedelta(days=o) for o in offsets]
+        assert result.get(hid, (0, 0)) == _reference(dates, today, target), hid
+
+
+@settings(max_examples=300, deadline=None)
+@given(history=histories)
+def test_latest_runs_match_reference(history):
+    targets = {hid: target for hid, (_, target) in history.items() if target is not None}
+    habit_ids, ordinals = _arrays(history)
+
+    result = latest_runs_batch(habit_ids, ordinals, targets)
+
+    for hid, (offsets, target) in history.items():
+        dates = [BASE + timedelta(days=o) for o in offsets]
+        current, best, last_end = result.get(hid, (0, 0, None))
+        if target is None:
+            if not dates:
+                assert (current, best, last_end) == (0, 0, None)
+                continue
+            assert last_end == max(dates)
+            assert (current, best) == compute_streaks_for_daily(dates, last_end)
+        else:
+            counts = {}
+            for d in dates:
+                counts[_week_start(d)] = counts.get(_week_start(d), 0) + 1
+            successful = [ws for ws, c in counts.items() if c >= target]
+            if not successful:
+                assert (current, best, last_end) == (0, 0, None)
+                continue
+            assert last_end == max(successful) + timedelta(days=6)
+            assert (current, best) == compute_streaks_for_x_per_week(dates, max(successful), target)
+
+
+def test_batch_handles_empty_input():
+    empty = np.array([], dtype=np.int64)
+    assert compute_streaks_batch(empty, empty, BASE, {1: 3}) == {}
+    assert latest_runs_batch(empty, empty) == {}
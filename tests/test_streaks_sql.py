@@ -0,0 +1,72 @@
+import random
+from datetime import date, timedelta
+
+from app import models
+from app.services import streaks
+from app.services.result_cache import result_cache
+from app.services.streaks import compute_streaks_for_daily, compute_streaks_for_x_per_week, compute_streaks_sql
+
+BASE = date(2024, 1, 1)
+
+
+def _seed(db, rng, count):
+    user = models.User(email="sql@example.com", username="sql", password_hash="x")
+    db.add(user)
+    db.flush()
+    habits, history = [], {}
+    for i in range(count):
+        weekly = rng.random() < 0.5
+        habit = models.Habit(
+            user_id=user.id, name=f"h{i}", goal_type="X_PER_WEEK" if weekly else "DAILY",
+            target_per_period=rng.randint(1, 5) if weekly else 1, start_date=BASE,
+        )
+        db.add(habit)
+        db.flush()
+        density = rng.choice((0.1, 0.5, 0.9, 1.0))
+        history[habit.id] = {BASE + timedelta(days=d) for d in range(rng.randrange(1, 200)) if rng.random() < density}
+        db.add_all(models.HabitLog(habit_id=habit.id, user_id=user.id, date=d) for d in history[habit.id])
+        habits.append(habit)
+    db.flush()
+    return habits, history
+
+
+def _reference(habit, dates, today):
+    dates = [d for d in dates if d <= today]
+    if habit.goal_type == "DAILY":
+        return compute_streaks_for_daily(dates, today)
+    return compute_streaks_for_x_per_week(dates, today, habit.target_per_period)
+
+
+def test_sql_streaks_match_reference_on_random_histories(db_session):
+    rng = random.Random(21)
+    habits, history = _seed(db_session, rng, 60)
+    habits.append(models.Habit(id=10 ** 6, goal_type="DAILY", target_per_period=1))  # no logs at all
+
+    for _ in range(25):
+        today = BASE + timedelta(days=rng.randrange(-5, 210))
+        got = compute_streaks_sql(db_session, habits, today)
+        assert got == {h.id: _reference(h, history.get(h.id, ()), today) for h in habits}
+
+
+def test_dashboard_agrees_across_streak_backends(client, auth_headers, monkeypatch):
+    today = date.fromisoformat(client.get("/dashboard/today", headers=auth_headers).json()["date"])
+    for goal_type, target, step in (("DAILY", 1, 1), ("DAILY", 1, 2), ("X_PER_WEEK", 2, 2)):
+        habit = client.post(
+            "/habits/",
+            json={"name": goal_type, "goal_type": goal_type, "target_per_period": target,
+                  "start_date": str(today - timedelta(days=60))},
+            headers=auth_headers,
+        ).json()
+        client.post(
+            "/habits/logs:batch",
+            json={"logs": [{"habit_id": habit["id"], "date": str(today - timedelta(days=d))} for d in range(0, 60, step)]},
+            headers=auth_headers,
+        )
+
+    responses = {}
+    for backend in ("state", "sql"):
+        monkeypatch.setattr(streaks, "STREAK_BACKEND", backend)
+        result_cache.clear()
+        responses[backend] = client.get("/dashboard/today", headers=auth_headers).json()
+    assert responses["sql"] == responses["state"]
+    assert [h["current_streak"] for h in responses["sql"]["habits"][:2]] == [60, 1]